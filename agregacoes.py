@@ -0,0 +1,28 @@
+"""
+Tabelas do Dashboard.
+
+Os totais por mês vêm já agregados do índice de recebíveis (ver
+recebiveis); aqui eles só são dispostos em uma tabela de situação por mês.
+"""
+from typing import Dict, List
+import pandas as pd
+
+MESES_NOMES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+               "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+STATUS_PAGO = "Valor Pago"
+STATUS_ABERTO = "Valor a Receber"
+
+
+def resumo_mensal(df: pd.DataFrame) -> pd.DataFrame:
+    """Tabela de valores por situação (linhas) e mês (colunas, em ordem de calendário) de um quadro de parcelas."""
+    tabela = df.groupby(["paga", "mes"])["valor"].sum().unstack("mes", fill_value=0.0)
+    tabela = tabela.reindex([True, False]).dropna(how="all").fillna(0.0)
+    tabela.index = pd.Index([STATUS_PAGO if paga else STATUS_ABERTO for paga in tabela.index], name="status")
+    tabela.columns = pd.Index([MESES_NOMES[mes - 1] for mes in tabela.columns], name="mes_nome")
+    return tabela
+
+
+def resumo_mensal_de_totais(linhas: List[Dict]) -> pd.DataFrame:
+    """Como resumo_mensal, a partir de totais já agregados por mês ([{"ano", "mes", "paga", "total"}])."""
+    quadro = pd.DataFrame(linhas, columns=["ano", "mes", "paga", "total"]).rename(columns={"total": "valor"})
+    return resumo_mensal(quadro)
@@ -0,0 +1,756 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+from contextlib import contextmanager
+from typing import Dict, List, Set, Union
+from cliente_github import ClienteGitHub
+from consultas import (ORDEM_NOME, ORDEM_VALOR, ORDEM_VENCIMENTO, SITUACAO_ABERTAS, SITUACAO_PAGAS,
+                       FiltroParcelas, IndiceParcelas, PaginaParcelas, _limitar_pagina)
+from repositorio import RepositorioDevedores, normalizar_nome
+from serializacao import FORMATO_COMPACTO, FORMATOS, desserializar, serializar
+from diario import diferencas, escrever_entradas, ler_diario, reaplicar
+from metricas import METRICAS, registrar
+
+
+class ConflitoDeVersao(Exception):
+    """
+    A versão armazenada mudou desde a leitura usada como base da gravação.
+
+    Carrega o conteúdo e a versão atuais, para que o chamador possa mesclar
+    as alterações e tentar de novo.
+    """
+
+    def __init__(self, dados_atuais: List[Dict], versao_atual: Union[str, None]):
+        super().__init__(f"Os dados foram alterados por outra sessão (versão atual: {versao_atual}).")
+        self.dados_atuais = dados_atuais
+        self.versao_atual = versao_atual
+
+
+class Armazenamento:
+    """
+    Interface dos backends de persistência usados pelo ClientControl.
+
+    Os dados trafegam no formato de lista do Gist: [{"nome", "parcelas": [...]}].
+    As consultas (consultar_parcelas, listar_devedores, consultar_pagina) têm
+    uma implementação genérica sobre carregar(); backends com índices próprios,
+    como o SQLite, as sobrescrevem para não precisar carregar tudo. Os totais
+    do Dashboard e da cobrança vêm do índice de recebíveis do ClientControl
+    (ver recebiveis), mantido a partir das mutações.
+    """
+
+    def autenticar(self):
+        """Verifica as credenciais do backend. Por padrão, não há o que verificar."""
+
+    @property
+    def versao(self) -> Union[str, None]:
+        """Identificador da versão dos dados carregados (muda a cada gravação)."""
+        return None
+
+    def invalidar_cache(self):
+        """Descarta qualquer cache de leitura mantido pelo backend."""
+
+    def estatisticas(self) -> Dict:
+        """Contadores de acesso do backend (latência, cota restante etc.), se houver."""
+        return {}
+
+    def carregar(self) -> Union[List[Dict], None]:
+        """
+        Retorna todos os devedores, ou None em caso de erro.
+
+        A lista pode ser o próprio cache do backend e não deve ser alterada.
+        """
+        raise NotImplementedError
+
+    def salvar(self, dados: List[Dict], alterados: Union[Set[str], None] = None,
+               versao_esperada: Union[str, None] = None) -> bool:
+        """
+        Grava os devedores. Retorna True em caso de sucesso.
+
+        Args:
+            dados (List[Dict]): A base completa.
+            alterados (Set[str] | None): Chaves normalizadas dos devedores
+                incluídos, removidos ou modificados. Backends que gravam de
+                forma incremental usam essa informação; None significa "tudo".
+            versao_esperada (str | None): Versão lida antes das alterações.
+                Se informada e a versão armazenada for outra, nada é gravado.
+
+        Raises:
+            ConflitoDeVersao: Se `versao_esperada` não for a versão atual.
+        """
+        raise NotImplementedError
+
+    def listar_devedores(self) -> List[str]:
+        """Nomes de todos os devedores, em ordem alfabética."""
+        return sorted(devedor["nome"] for devedor in self.carregar() or [])
+
+    def _indice(self) -> IndiceParcelas:
+        """
+        Índice das parcelas carregadas, refeito só quando carregar() devolve outra lista.
+
+        Backends que usam as consultas genéricas inicializam `_cache_indice` com None.
+        """
+        dados = self.carregar() or []
+        if self._cache_indice is None or self._cache_indice[0] is not dados:
+            self._cache_indice = (dados, IndiceParcelas(dados))
+        return self._cache_indice[1]
+
+    def consultar_parcelas(self, nome_devedor: Union[str, None] = None) -> List[Dict]:
+        """
+        Parcelas em formato plano (id, nome, valor, vencimento, paga).
+
+        Args:
+            nome_devedor (str | None): Restringe o resultado a um devedor.
+        """
+        return self._indice().do_devedor(nome_devedor)
+
+    def consultar_pagina(self, filtro: Union[FiltroParcelas, None] = None, ordem: str = ORDEM_VENCIMENTO,
+                         decrescente: bool = False, pagina: int = 1, tamanho: int = 50) -> PaginaParcelas:
+        """
+        Uma página das parcelas que atendem ao filtro, na ordem pedida (ver consultas).
+
+        A página é limitada ao intervalo válido: pedir uma página além da
+        última devolve a última.
+        """
+        return self._indice().consultar(filtro, ordem, decrescente, pagina, tamanho)
+
+
+class ArmazenamentoMemoria(Armazenamento):
+    """Backend em memória, sem persistência. Útil para testes e como visão de dados já carregados."""
+
+    def __init__(self, dados: Union[List[Dict], None] = None):
+        self._dados: List[Dict] = dados if dados is not None else []
+        self._versao = 0
+        # Índice das consultas: (lista indexada, IndiceParcelas); ver Armazenamento._indice.
+        self._cache_indice: Union[tuple, None] = None
+
+    @property
+    def versao(self) -> Union[str, None]:
+        return str(self._versao)
+
+    def carregar(self) -> Union[List[Dict], None]:
+        return self._dados
+
+    def salvar(self, dados: List[Dict], alterados: Union[Set[str], None] = None,
+               versao_esperada: Union[str, None] = None) -> bool:
+        if versao_esperada is not None and versao_esperada != self.versao:
+            raise ConflitoDeVersao(self._dados, self.versao)
+        self._dados = dados
+        self._versao += 1
+        return True
+
+
+class ArmazenamentoGist(Armazenamento):
+    """
+    Backend que guarda a base inteira no arquivo "dados.json" de um Gist.
+
+    O conteúdo lido é mantido em cache junto com a ETag da resposta. Dentro do
+    TTL a cópia local é devolvida sem acessar a rede; depois dele, a leitura é
+    revalidada com If-None-Match e uma resposta 304 reaproveita o cache.
+    As chamadas HTTP passam por um ClienteGitHub (sessão compartilhada,
+    timeouts e novas tentativas); um cliente próprio pode ser informado,
+    por exemplo apontando para um servidor local de testes.
+    """
+
+    def __init__(self, token: str, gist_id: str, ttl_cache: float = 10.0,
+                 cliente: Union[ClienteGitHub, None] = None, formato: str = FORMATO_COMPACTO):
+        if not token:
+            raise ValueError("❌ ERRO: O token do GitHub não foi fornecido.")
+        if formato not in FORMATOS:
+            raise ValueError(f"❌ ERRO: Formato de serialização desconhecido: '{formato}'.")
+        self.token = token
+        self.gist_id = gist_id
+        # O nome do arquivo no Gist é um detalhe de implementação interno e fixo.
+        self.filename = "dados.json"
+        # Formato das gravações (ver serializacao); a leitura aceita qualquer um.
+        self.formato = formato
+        self.cliente = cliente or ClienteGitHub(token)
+        # Cache de leitura: último conteúdo lido, sua ETag, a versão do histórico
+        # do Gist e o instante da última validação.
+        self.ttl_cache = ttl_cache
+        self._cache_dados: Union[List[Dict], None] = None
+        self._cache_etag: Union[str, None] = None
+        self._cache_versao: Union[str, None] = None
+        self._cache_validado_em = 0.0
+        # Índice das consultas: (lista indexada, IndiceParcelas); ver Armazenamento._indice.
+        self._cache_indice: Union[tuple, None] = None
+
+    def autenticar(self):
+        """Verifica o token com um GET em /user (uma vez por sessão; depois vem do cache do ClienteGitHub)."""
+        if self.cliente.identidade_em_cache() is not None:
+            return
+        try:
+            login = self.cliente.verificar_identidade()
+            registrar("autenticacao", f"Autenticação bem-sucedida como '{login}'.", login=login)
+        except requests.exceptions.HTTPError as err:
+            if err.response.status_code == 401:
+                raise ConnectionError("ERRO DE AUTENTICAÇÃO: O token fornecido é inválido ou expirou.")
+            else:
+                raise ConnectionError(f"Falha na autenticação com status: {err.response.status_code}.")
+        except requests.exceptions.RequestException as err:
+            raise ConnectionError(f"Erro de conexão com a API do GitHub: {err}")
+
+    @property
+    def versao(self) -> Union[str, None]:
+        """SHA da versão do Gist (history[0].version) do último conteúdo lido."""
+        return self._cache_versao
+
+    def estatisticas(self) -> Dict:
+        """Latências e cota restante das chamadas à API (ver EstatisticasHTTP)."""
+        return self.cliente.estatisticas.como_dict()
+
+    def invalidar_cache(self):
+        self._cache_dados = None
+        self._cache_etag = None
+        self._cache_versao = None
+        self._cache_validado_em = 0.0
+        self._cache_indice = None
+
+    def _guardar_em_cache(self, response: requests.Response, agora: float) -> List[Dict]:
+        """Decodifica uma resposta 200 do GET do Gist e a guarda no cache."""
+        with METRICAS.medir("json_desserializar", origem="resposta_gist") as medida:
+            medida["bytes"] = len(response.content)
+            corpo = response.json()
+        dados = self._decodificar(corpo["files"])
+        historico = corpo.get("history") or [{}]
+        self._cache_dados = dados
+        self._cache_etag = response.headers.get("ETag")
+        self._cache_versao = historico[0].get("version")
+        self._cache_validado_em = agora
+        return dados
+
+    def carregar(self) -> Union[List[Dict], None]:
+        agora = time.monotonic()
+        if self._cache_dados is not None and agora - self._cache_validado_em < self.ttl_cache:
+            METRICAS.contar_cache("gist_ttl", True)
+            return self._cache_dados
+        METRICAS.contar_cache("gist_ttl", False)
+
+        headers = {}
+        if self._cache_dados is not None and self._cache_etag:
+            headers["If-None-Match"] = self._cache_etag
+        try:
+            response = self.cliente.get(f"/gists/{self.gist_id}", headers=headers)
+            if response.status_code == 304:
+                self._cache_validado_em = agora
+                METRICAS.contar_cache("gist_etag", True)
+                registrar("gist_inalterado", "Dados inalterados, usando o cache local.", logging.DEBUG,
+                          gist_id=self.gist_id)
+                return self._cache_dados
+            response.raise_for_status()
+            if headers:
+                METRICAS.contar_cache("gist_etag", False)
+            dados = self._guardar_em_cache(response, agora)
+            registrar("gist_lido", "Dados lidos do Gist.", gist_id=self.gist_id, versao=self._cache_versao,
+                      bytes=len(response.content), devedores=len(dados))
+            return dados
+        except Exception as err:
+            registrar("gist_erro_leitura", f"Erro ao consultar o Gist: {err}", logging.ERROR, gist_id=self.gist_id)
+            return None
+
+    def _verificar_versao(self, versao_esperada: str):
+        """
+        Confere se o Gist ainda está na versão esperada antes de gravar.
+
+        Usa If-None-Match quando o cache corresponde à versão esperada, de modo
+        que o caso comum (sem concorrência) custa uma resposta 304. Se a versão
+        mudou, o conteúdo atual vai para o cache e é entregue no conflito.
+
+        Raises:
+            ConflitoDeVersao: Se outra sessão gravou desde a leitura.
+        """
+        headers = {}
+        if self._cache_etag and self._cache_versao == versao_esperada:
+            headers["If-None-Match"] = self._cache_etag
+        response = self.cliente.get(f"/gists/{self.gist_id}", headers=headers)
+        if response.status_code == 304:
+            return
+        response.raise_for_status()
+        dados = self._guardar_em_cache(response, time.monotonic())
+        if self._cache_versao != versao_esperada:
+            raise ConflitoDeVersao(dados, self._cache_versao)
+
+    def salvar(self, dados: List[Dict], alterados: Union[Set[str], None] = None,
+               versao_esperada: Union[str, None] = None) -> bool:
+        """
+        Grava no Gist com um PATCH dos arquivos alterados.
+
+        A API de Gists não oferece gravação condicional, então a versão é
+        conferida imediatamente antes do PATCH (ver _verificar_versao); uma
+        gravação concorrente entre as duas chamadas ainda pode passar.
+        """
+        try:
+            if versao_esperada is not None:
+                self._verificar_versao(versao_esperada)
+            arquivos = self._codificar(dados, alterados)
+            if not arquivos:
+                registrar("gist_sem_alteracoes", "Nenhum arquivo alterado, nada a gravar.", gist_id=self.gist_id)
+                return True
+            payload = {"files": arquivos}
+            response = self.cliente.patch(f"/gists/{self.gist_id}", json=payload)
+            response.raise_for_status()
+            self.invalidar_cache()
+            registrar("gist_gravado", "Gist atualizado no GitHub.", gist_id=self.gist_id,
+                      arquivos=sorted(arquivos), bytes=len(response.request.body or b""))
+            return True
+        except ConflitoDeVersao as conflito:
+            registrar("gist_conflito", "Conflito de versão: o Gist foi alterado por outra sessão.", logging.WARNING,
+                      gist_id=self.gist_id, versao_esperada=versao_esperada, versao_atual=conflito.versao_atual)
+            raise
+        except Exception as err:
+            registrar("gist_erro_gravacao", f"Erro ao atualizar o Gist: {err}", logging.ERROR, gist_id=self.gist_id)
+            return False
+
+    def _decodificar(self, arquivos: Dict[str, Dict]) -> List[Dict]:
+        """Converte os arquivos da resposta do Gist na lista de devedores."""
+        return self._ler_arquivo(arquivos[self.filename])
+
+    def _codificar(self, dados: List[Dict], alterados: Union[Set[str], None]) -> Dict[str, Dict]:
+        """Monta o campo "files" do PATCH."""
+        return {self.filename: {"content": serializar(dados, self.formato)}}
+
+    def _ler_arquivo(self, arquivo: Dict) -> List[Dict]:
+        """
+        Decodifica um arquivo da resposta do Gist.
+
+        A API corta o campo "content" de arquivos grandes ("truncated"); nesse
+        caso o conteúdo completo é baixado pelo raw_url. O conteúdo pode estar
+        em qualquer formato de serializacao, inclusive o legado. O resultado
+        passa pelo repositório para que toda parcela tenha um "id".
+        """
+        return RepositorioDevedores.de_dados(desserializar(self._conteudo_arquivo(arquivo))).para_dados()
+
+    def _conteudo_arquivo(self, arquivo: Dict) -> str:
+        """Texto completo de um arquivo da resposta, baixado pelo raw_url se vier truncado."""
+        if arquivo.get("truncated"):
+            resposta = self.cliente.get(arquivo["raw_url"])
+            resposta.raise_for_status()
+            return resposta.text
+        return arquivo["content"]
+
+
+class ArmazenamentoGistFragmentado(ArmazenamentoGist):
+    """
+    Backend que distribui os devedores em vários arquivos do mesmo Gist.
+
+    Cada devedor vai para "dados_NN.json" conforme o CRC32 do nome normalizado
+    (ver _nome_fragmento); "manifesto.json" registra a quantidade de
+    fragmentos, que prevalece sobre o valor passado ao construtor. Com o
+    manifesto presente, "dados.json" não é mais lido; a gravação que cria o
+    manifesto também o remove do Gist (o conteúdo anterior continua no
+    histórico de revisões).
+    O cache de fragmentos sobrevive a invalidar_cache(): como é validado
+    pelo raw_url, apenas os fragmentos que mudaram são lidos de novo.
+    """
+
+    def __init__(self, token: str, gist_id: str, ttl_cache: float = 10.0, n_fragmentos: int = 16,
+                 cliente: Union[ClienteGitHub, None] = None, formato: str = FORMATO_COMPACTO):
+        super().__init__(token, gist_id, ttl_cache, cliente, formato)
+        self.arquivo_manifesto = "manifesto.json"
+        self.n_fragmentos = n_fragmentos
+        # Cada fragmento lido fica em cache junto com o seu raw_url,
+        # que muda quando o conteúdo do arquivo muda.
+        self._cache_fragmentos: Dict[str, tuple] = {}
+        self._manifesto_presente = False
+        # Se o Gist lido ainda tem o arquivo único, e se a última codificação o migrava.
+        self._arquivo_unico_presente = False
+        self._migrando = False
+
+    def _nome_fragmento(self, nome_devedor: str) -> str:
+        """Arquivo do Gist onde o devedor é armazenado."""
+        indice = zlib.crc32(normalizar_nome(nome_devedor).encode("utf-8")) % self.n_fragmentos
+        return f"dados_{indice:02d}.json"
+
+    def _decodificar(self, arquivos: Dict[str, Dict]) -> List[Dict]:
+        """
+        Monta a base a partir do manifesto e dos fragmentos do Gist.
+
+        Fragmentos cujo raw_url não mudou desde a última leitura são
+        reaproveitados do cache sem novo download nem json.loads. Se o Gist
+        ainda não tiver manifesto, o arquivo único é usado como ponto de
+        partida; a primeira gravação cria o manifesto e todos os fragmentos
+        e remove o arquivo único.
+        """
+        self._arquivo_unico_presente = self.filename in arquivos
+        if self.arquivo_manifesto not in arquivos:
+            self._manifesto_presente = False
+            self._cache_fragmentos = {}
+            return self._ler_arquivo(arquivos[self.filename]) if self.filename in arquivos else []
+
+        manifesto = json.loads(arquivos[self.arquivo_manifesto]["content"])
+        self.n_fragmentos = manifesto["n_fragmentos"]
+        self._manifesto_presente = True
+
+        fragmentos = {}
+        dados = []
+        for nome_arquivo in sorted(arquivos):
+            if not (nome_arquivo.startswith("dados_") and nome_arquivo.endswith(".json")):
+                continue
+            arquivo = arquivos[nome_arquivo]
+            em_cache = self._cache_fragmentos.get(nome_arquivo)
+            reaproveitado = em_cache is not None and em_cache[0] == arquivo.get("raw_url")
+            METRICAS.contar_cache("gist_fragmentos", reaproveitado)
+            devedores = em_cache[1] if reaproveitado else self._ler_arquivo(arquivo)
+            fragmentos[nome_arquivo] = (arquivo.get("raw_url"), devedores)
+            dados.extend(devedores)
+        self._cache_fragmentos = fragmentos
+        return dados
+
+    def _codificar(self, dados: List[Dict], alterados: Union[Set[str], None]) -> Dict[str, Dict]:
+        """
+        Monta o campo "files" do PATCH apenas com os fragmentos alterados.
+
+        Com `alterados`, só os fragmentos desses devedores são enviados. Sem
+        essa informação, cada fragmento é comparado com a versão em cache.
+        Sem manifesto no Gist, todos os fragmentos e o manifesto são enviados,
+        e o arquivo único é removido, para não ficar como uma segunda cópia
+        desatualizada da base.
+        """
+        grupos: Dict[str, List[Dict]] = {}
+        for devedor in dados:
+            grupos.setdefault(self._nome_fragmento(devedor.get("nome", "")), []).append(devedor)
+
+        if not self._manifesto_presente:
+            nomes = {f"dados_{i:02d}.json" for i in range(self.n_fragmentos)}
+        elif alterados is not None:
+            nomes = {self._nome_fragmento(chave) for chave in alterados}
+        else:
+            nomes = {nome for nome in set(grupos) | set(self._cache_fragmentos)
+                     if grupos.get(nome, []) != self._cache_fragmentos.get(nome, (None, []))[1]}
+
+        arquivos = {nome: {"content": serializar(grupos.get(nome, []), self.formato)} for nome in sorted(nomes)}
+        self._migrando = not self._manifesto_presente
+        if self._migrando:
+            manifesto = {"versao": 1, "estrategia": "crc32", "n_fragmentos": self.n_fragmentos}
+            arquivos[self.arquivo_manifesto] = {"content": json.dumps(manifesto, indent=2)}
+            if self._arquivo_unico_presente:
+                arquivos[self.filename] = None  # Remove o arquivo do Gist
+        return arquivos
+
+    def salvar(self, dados: List[Dict], alterados: Union[Set[str], None] = None,
+               versao_esperada: Union[str, None] = None) -> bool:
+        self._migrando = False
+        gravado = super().salvar(dados, alterados, versao_esperada)
+        if gravado and self._migrando:
+            # O Gist já tem o manifesto e não tem mais o arquivo único, mesmo antes da próxima leitura.
+            self._manifesto_presente = True
+            self._arquivo_unico_presente = False
+        return gravado
+
+
+class ArmazenamentoGistDiario(ArmazenamentoGist):
+    """
+    Backend que grava as mudanças como um diário de operações ao lado de um instantâneo da base.
+
+    "dados.json" guarda o instantâneo (em qualquer formato de serializacao) e
+    "diario.jsonl" as operações gravadas depois dele (ver diario). Uma
+    gravação envia só o diário, com as novas entradas acrescentadas, então o
+    custo não cresce com a base. Quando o diário passa de `limite_diario`
+    entradas, a gravação seguinte compacta: reescreve o instantâneo com a base
+    atual e remove o diário. As entradas anteriores continuam no histórico
+    de revisões do Gist.
+
+    Na leitura, o instantâneo fica em cache pelo raw_url e o diário é
+    reaplicado sobre ele; se o diário só cresceu desde a última leitura,
+    apenas as entradas novas são aplicadas.
+    """
+
+    def __init__(self, token: str, gist_id: str, ttl_cache: float = 10.0, limite_diario: int = 500,
+                 cliente: Union[ClienteGitHub, None] = None, formato: str = FORMATO_COMPACTO):
+        super().__init__(token, gist_id, ttl_cache, cliente, formato)
+        self.arquivo_diario = "diario.jsonl"
+        self.limite_diario = limite_diario
+        # Diário da última leitura: texto (base para acrescentar) e entradas.
+        self._texto_diario = ""
+        self._entradas: List[Dict] = []
+        # Repositório do instantâneo com as entradas já aplicadas: (raw_url do
+        # instantâneo, repositório, quantidade de entradas aplicadas, id da última).
+        self._cache_reaplicado: Union[tuple, None] = None
+
+    def historico(self) -> List[Dict]:
+        """Entradas do diário desde a última compactação, da mais antiga para a mais nova."""
+        self.carregar()
+        return list(self._entradas)
+
+    def _decodificar(self, arquivos: Dict[str, Dict]) -> List[Dict]:
+        diario = arquivos.get(self.arquivo_diario)
+        self._texto_diario = self._conteudo_arquivo(diario) if diario else ""
+        self._entradas = ler_diario(self._texto_diario)
+
+        instantaneo = arquivos.get(self.filename)
+        raw_url = instantaneo.get("raw_url") if instantaneo else None
+        em_cache = self._cache_reaplicado
+        if (em_cache is not None and em_cache[0] == raw_url and em_cache[2] <= len(self._entradas)
+                and (em_cache[2] == 0 or self._entradas[em_cache[2] - 1]["id"] == em_cache[3])):
+            repositorio, aplicadas = em_cache[1], em_cache[2]
+            METRICAS.contar_cache("gist_instantaneo", True)
+        else:
+            METRICAS.contar_cache("gist_instantaneo", False)
+            dados = desserializar(self._conteudo_arquivo(instantaneo)) if instantaneo else []
+            repositorio, aplicadas = RepositorioDevedores.de_dados(dados), 0
+
+        reaplicar(repositorio, self._entradas[aplicadas:])
+        ultima = self._entradas[-1]["id"] if self._entradas else None
+        self._cache_reaplicado = (raw_url, repositorio, len(self._entradas), ultima)
+        return repositorio.para_dados()
+
+    def _codificar(self, dados: List[Dict], alterados: Union[Set[str], None]) -> Dict[str, Dict]:
+        """
+        Acrescenta ao diário as operações que levam da última leitura a `dados`.
+
+        A base da comparação é o repositório reaplicado na leitura, que
+        salvar() acabou de conferir contra a versão esperada. Não se usa a
+        lista devolvida por carregar(): quem a recebeu pode tê-la alterado, e
+        as alterações feitas nela não apareceriam na comparação.
+        """
+        if self._cache_dados is None:
+            self.carregar()
+        base = self._cache_reaplicado[1].para_dados() if self._cache_reaplicado is not None else []
+        novas = diferencas(base, dados, alterados, self.cliente.identidade_em_cache())
+        if not novas:
+            return {}
+        if len(self._entradas) + len(novas) > self.limite_diario:
+            return self._arquivos_compactados(dados)
+        return {self.arquivo_diario: {"content": self._texto_diario + escrever_entradas(novas)}}
+
+    def _arquivos_compactados(self, dados: List[Dict]) -> Dict[str, Dict]:
+        arquivos = {self.filename: {"content": serializar(dados, self.formato)}}
+        if self._texto_diario:
+            arquivos[self.arquivo_diario] = None  # Remove o arquivo do Gist
+        return arquivos
+
+    def compactar(self) -> bool:
+        """Reescreve o instantâneo com a base atual e esvazia o diário."""
+        dados = self.carregar()
+        if dados is None:
+            return False
+        if not self._texto_diario:
+            return True
+        try:
+            self._verificar_versao(self.versao)
+            response = self.cliente.patch(f"/gists/{self.gist_id}", json={"files": self._arquivos_compactados(dados)})
+            response.raise_for_status()
+            registrar("diario_compactado", f"Diário compactado ({len(self._entradas)} entradas).",
+                      gist_id=self.gist_id, entradas=len(self._entradas))
+            self.invalidar_cache()
+            return True
+        except ConflitoDeVersao:
+            registrar("diario_conflito", "O Gist foi alterado durante a compactação; tente novamente.",
+                      logging.WARNING, gist_id=self.gist_id)
+            return False
+        except Exception as err:
+            registrar("diario_erro", f"Erro ao compactar o diário: {err}", logging.ERROR, gist_id=self.gist_id)
+            return False
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Backend local em SQLite, sem acesso à rede.
+
+    O banco usa WAL, para que leituras não bloqueiem a gravação, e índices
+    pelo nome normalizado do devedor e pelo vencimento das parcelas. Cada
+    gravação incrementa um contador de versão, que também valida o cache de
+    leitura. Use ":memory:" como caminho para um banco temporário.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS devedores (
+            chave TEXT PRIMARY KEY,
+            nome TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS parcelas (
+            id TEXT PRIMARY KEY,
+            chave_devedor TEXT NOT NULL REFERENCES devedores(chave) ON DELETE CASCADE,
+            posicao INTEGER NOT NULL,
+            valor REAL NOT NULL,
+            vencimento TEXT NOT NULL,
+            paga INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_parcelas_devedor ON parcelas(chave_devedor, posicao);
+        CREATE INDEX IF NOT EXISTS idx_parcelas_vencimento ON parcelas(vencimento);
+        CREATE INDEX IF NOT EXISTS idx_parcelas_paga_vencimento ON parcelas(paga, vencimento);
+        CREATE TABLE IF NOT EXISTS meta (
+            chave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', '0');
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        # Uma única conexão compartilhada entre as threads do Streamlit, protegida por lock.
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute("PRAGMA foreign_keys=ON")
+            self._conexao.executescript(self.ESQUEMA)
+        # lower() do SQLite só converte letras ASCII; a ordenação por nome usa a
+        # do Python, como IndiceParcelas, para que "Ágata" fique no mesmo lugar.
+        self._conexao.create_function("minusculas", 1, str.lower, deterministic=True)
+        self._cache_dados: Union[List[Dict], None] = None
+        self._cache_versao: Union[str, None] = None
+
+    def _versao_atual(self) -> str:
+        return self._conexao.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+
+    @contextmanager
+    def _transacao_leitura(self):
+        """
+        Faz as consultas do bloco sobre um mesmo instantâneo do banco.
+
+        Sem a transação, cada SELECT vê o banco do seu momento, e uma gravação
+        de outro processo entre duas consultas as deixaria inconsistentes.
+        """
+        with self._lock:
+            self._conexao.execute("BEGIN")
+            try:
+                yield
+            finally:
+                self._conexao.execute("COMMIT")
+
+    @property
+    def versao(self) -> Union[str, None]:
+        """Versão do último conteúdo carregado (não necessariamente a atual do banco)."""
+        return self._cache_versao
+
+    def invalidar_cache(self):
+        self._cache_dados = None
+        self._cache_versao = None
+
+    def carregar(self) -> Union[List[Dict], None]:
+        with self._transacao_leitura():
+            versao = self._versao_atual()
+            if self._cache_dados is not None and versao == self._cache_versao:
+                METRICAS.contar_cache("sqlite", True)
+                return self._cache_dados
+            METRICAS.contar_cache("sqlite", False)
+            dados: List[Dict] = []
+            por_chave: Dict[str, Dict] = {}
+            for chave, nome in self._conexao.execute("SELECT chave, nome FROM devedores ORDER BY rowid"):
+                devedor = {"nome": nome, "parcelas": []}
+                por_chave[chave] = devedor
+                dados.append(devedor)
+            consulta = "SELECT chave_devedor, id, valor, vencimento, paga FROM parcelas ORDER BY chave_devedor, posicao"
+            for chave, id_parcela, valor, vencimento, paga in self._conexao.execute(consulta):
+                por_chave[chave]["parcelas"].append(
+                    {"id": id_parcela, "valor": valor, "vencimento": vencimento, "paga": bool(paga)})
+            self._cache_dados = dados
+            self._cache_versao = versao
+            return dados
+
+    def salvar(self, dados: List[Dict], alterados: Union[Set[str], None] = None,
+               versao_esperada: Union[str, None] = None) -> bool:
+        """
+        Grava em uma transação; com `alterados`, só os devedores indicados são reescritos.
+
+        A versão é conferida dentro de uma transação BEGIN IMMEDIATE, então a
+        verificação e a gravação são atômicas mesmo entre processos.
+        """
+        if alterados is not None:
+            dados = [devedor for devedor in dados if normalizar_nome(devedor["nome"]) in alterados]
+        conflito = False
+        try:
+            with self._lock:
+                self._conexao.execute("BEGIN IMMEDIATE")
+                with self._conexao:
+                    if versao_esperada is not None and self._versao_atual() != versao_esperada:
+                        conflito = True
+                    else:
+                        self._gravar(dados, alterados)
+        except sqlite3.Error as err:
+            registrar("sqlite_erro_gravacao", f"Erro ao gravar no SQLite: {err}", logging.ERROR, caminho=self.caminho)
+            return False
+        if conflito:
+            dados_atuais = self.carregar()
+            raise ConflitoDeVersao(dados_atuais, self._cache_versao)
+        return True
+
+    def _gravar(self, dados: List[Dict], alterados: Union[Set[str], None]):
+        if alterados is None:
+            self._conexao.execute("DELETE FROM devedores")
+        else:
+            presentes = {normalizar_nome(devedor["nome"]) for devedor in dados}
+            self._conexao.executemany("DELETE FROM devedores WHERE chave = ?",
+                                      [(chave,) for chave in alterados - presentes])
+            self._conexao.executemany("DELETE FROM parcelas WHERE chave_devedor = ?",
+                                      [(chave,) for chave in presentes])
+        for devedor in dados:
+            chave = normalizar_nome(devedor["nome"])
+            # O upsert preserva o rowid (e portanto a ordem) dos devedores já existentes.
+            self._conexao.execute(
+                "INSERT INTO devedores (chave, nome) VALUES (?, ?) "
+                "ON CONFLICT(chave) DO UPDATE SET nome = excluded.nome",
+                (chave, devedor["nome"]))
+            self._conexao.executemany(
+                "INSERT INTO parcelas (id, chave_devedor, posicao, valor, vencimento, paga) VALUES (?, ?, ?, ?, ?, ?)",
+                [(p["id"], chave, posicao, float(p["valor"]), p["vencimento"], int(bool(p["paga"])))
+                 for posicao, p in enumerate(devedor.get("parcelas", []))])
+        self._conexao.execute("UPDATE meta SET valor = CAST(valor AS INTEGER) + 1 WHERE chave = 'versao'")
+
+    def listar_devedores(self) -> List[str]:
+        with self._lock:
+            return [nome for (nome,) in self._conexao.execute("SELECT nome FROM devedores ORDER BY nome")]
+
+    def consultar_parcelas(self, nome_devedor: Union[str, None] = None) -> List[Dict]:
+        consulta = ("SELECT p.id, d.nome, p.valor, p.vencimento, p.paga FROM parcelas p "
+                    "JOIN devedores d ON d.chave = p.chave_devedor")
+        parametros: tuple = ()
+        if nome_devedor is not None:
+            consulta += " WHERE p.chave_devedor = ?"
+            parametros = (normalizar_nome(nome_devedor),)
+        consulta += " ORDER BY d.rowid, p.posicao"
+        with self._lock:
+            return [{"id": id_parcela, "nome": nome, "valor": valor, "vencimento": vencimento, "paga": bool(paga)}
+                    for id_parcela, nome, valor, vencimento, paga in self._conexao.execute(consulta, parametros)]
+
+    def consultar_pagina(self, filtro: Union[FiltroParcelas, None] = None, ordem: str = ORDEM_VENCIMENTO,
+                         decrescente: bool = False, pagina: int = 1, tamanho: int = 50) -> PaginaParcelas:
+        """Como em Armazenamento, com o filtro, a ordenação e o LIMIT/OFFSET feitos pelo SQLite."""
+        filtro = filtro or FiltroParcelas()
+        efetivo = filtro.efetivo()
+        condicoes, parametros = [], []
+        if efetivo.nome_devedor is not None:
+            condicoes.append("p.chave_devedor = ?")
+            parametros.append(normalizar_nome(efetivo.nome_devedor))
+        if efetivo.situacao in (SITUACAO_PAGAS, SITUACAO_ABERTAS):
+            condicoes.append("p.paga = ?")
+            parametros.append(int(efetivo.situacao == SITUACAO_PAGAS))
+        if efetivo.vencimento_de is not None:
+            condicoes.append("p.vencimento >= ?")
+            parametros.append(efetivo.vencimento_de)
+        if efetivo.vencimento_ate is not None:
+            condicoes.append("p.vencimento <= ?")
+            parametros.append(efetivo.vencimento_ate)
+        onde = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        direcao = "DESC" if decrescente else "ASC"
+        # Desempate pela ordem da base, para que a paginação seja estável.
+        ordenacao = {ORDEM_VENCIMENTO: f"p.vencimento {direcao}",
+                     ORDEM_VALOR: f"p.valor {direcao}",
+                     ORDEM_NOME: f"minusculas(d.nome) {direcao}, p.vencimento {direcao}"}[ordem]
+        juncao = " JOIN devedores d ON d.chave = p.chave_devedor"
+
+        with self._transacao_leitura():
+            total = self._conexao.execute(f"SELECT COUNT(*) FROM parcelas p{onde}", parametros).fetchone()[0]
+            pagina = _limitar_pagina(pagina, total, tamanho)
+            consulta = (f"SELECT p.id, d.nome, p.valor, p.vencimento, p.paga FROM parcelas p{juncao}{onde} "
+                        f"ORDER BY {ordenacao}, d.rowid {direcao}, p.posicao {direcao} LIMIT ? OFFSET ?")
+            linhas = [{"id": id_parcela, "nome": nome, "valor": valor, "vencimento": vencimento, "paga": bool(paga)}
+                      for id_parcela, nome, valor, vencimento, paga
+                      in self._conexao.execute(consulta, [*parametros, tamanho, (pagina - 1) * tamanho])]
+        return PaginaParcelas(linhas, total, pagina, tamanho, filtro)
+
+
+def migrar_para_sqlite(dados: List[Dict], caminho: str) -> ArmazenamentoSQLite:
+    """
+    Importa uma base no formato do Gist para um banco SQLite, substituindo o conteúdo dele.
+
+    Os dados passam pelo repositório, então parcelas sem "id" recebem um.
+    """
+    destino = ArmazenamentoSQLite(caminho)
+    if not destino.salvar(RepositorioDevedores.de_dados(dados).para_dados()):
+        raise RuntimeError(f"Não foi possível gravar os dados em '{caminho}'.")
+    return destino
@@ -0,0 +1,238 @@
+"""
+Benchmark do ClientControl em bases sintéticas de tamanhos crescentes.
+
+Para cada backend e tamanho (devedores x parcelas), mede:
+- consultar_dados com o cache vazio e com revalidação (304 no Gist);
+- cada mutação do ClientControl, gravando de verdade;
+- a gravação da página Consultar: consultar a página, montar o DataFrame,
+  converter o delta do editor e chamar atualizar_parcelas;
+- o Dashboard (totais e resumo mensal do índice de recebíveis) e a página
+  de cobrança (faixas de atraso, prioridade e próximos vencimentos);
+- a importação de uma planilha CSV de 100 devedores novos, da leitura à gravação.
+
+Os backends de Gist rodam contra o servidor local de stub_gist, com a
+latência informada; o volume enviado em cada gravação também é registrado.
+Os resultados vão para a tela e, opcionalmente, para JSON e CSV, para
+comparar execuções e achar regressões.
+
+Uso:
+    python benchmark.py --tamanhos 100x12 1000x12 5000x24 --json resultados.json --csv resultados.csv
+    python benchmark.py --backends gist sqlite --repeticoes 10 --latencia 50
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+import armazenamento
+import client_control
+import consultas
+from cliente_github import ClienteGitHub
+from dados_sinteticos import gerar_dados
+from metricas import METRICAS
+from serializacao import FORMATO_COMPACTO, FORMATOS, serializar
+from stub_gist import ServidorGistLocal
+
+BACKENDS = ("gist", "fragmentado", "diario", "sqlite")
+COLUNAS = ["backend", "devedores", "parcelas_por_devedor", "parcelas", "operacao", "repeticoes",
+           "mediana_ms", "p95_ms", "minimo_ms", "maximo_ms", "bytes_enviados_medio", "bytes_armazenados"]
+
+
+def _percentil(valores: List[float], percentil: float) -> float:
+    ordenados = sorted(valores)
+    posicao = min(len(ordenados) - 1, max(0, round(percentil / 100 * (len(ordenados) - 1))))
+    return ordenados[posicao]
+
+
+def _tamanho(texto: str) -> Tuple[int, int]:
+    devedores, parcelas = texto.lower().split("x")
+    return int(devedores), int(parcelas)
+
+
+class Medicao:
+    """Contexto de um backend e tamanho: cria o ClientControl e mede operações sobre ele."""
+
+    def __init__(self, backend: str, dados: List[Dict], latencia: float, formato: str, diretorio: str):
+        self.backend = backend
+        self.dados = dados
+        self.servidor = None
+        self.caminho_sqlite = None
+        if backend == "sqlite":
+            self.caminho_sqlite = os.path.join(diretorio, f"benchmark_{len(dados)}.db")
+            armazenamento.migrar_para_sqlite(dados, self.caminho_sqlite)
+            backend_armazenamento = armazenamento.ArmazenamentoSQLite(self.caminho_sqlite)
+        else:
+            self.servidor = ServidorGistLocal({"dados.json": serializar(dados, formato)}, latencia=latencia).iniciar()
+            cliente = ClienteGitHub("benchmark", url_base=self.servidor.url_base)
+            classe = {"gist": armazenamento.ArmazenamentoGist,
+                      "fragmentado": armazenamento.ArmazenamentoGistFragmentado,
+                      "diario": armazenamento.ArmazenamentoGistDiario}[backend]
+            # ttl_cache=0: toda leitura revalida com o servidor, como depois do prazo do cache no app.
+            backend_armazenamento = classe("benchmark", self.servidor.gist_id, 0.0, cliente=cliente, formato=formato)
+        self.controle = client_control.ClientControl(armazenamento=backend_armazenamento)
+        self.controle.autenticar()
+        if backend == "fragmentado":
+            # A primeira gravação cria o manifesto e todos os fragmentos; fica fora da medição.
+            self.controle.atualizar_gist(self.controle.consultar_dados())
+
+    def encerrar(self):
+        if self.servidor is not None:
+            self.servidor.encerrar()
+
+    def bytes_armazenados(self) -> int:
+        if self.servidor is not None:
+            return sum(len(conteudo.encode()) for conteudo in self.servidor.arquivos.values())
+        return os.path.getsize(self.caminho_sqlite)
+
+    def medir(self, operacao: str, funcao: Callable[[int], object], repeticoes: int) -> Dict:
+        tempos = []
+        if self.servidor is not None:
+            self.servidor.zerar_contadores()
+        for i in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao(i)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            if isinstance(resultado, client_control.ResultadoOperacao) and not resultado:
+                raise RuntimeError(f"{operacao} falhou no benchmark: {resultado.mensagem}")
+        return {
+            "operacao": operacao,
+            "repeticoes": repeticoes,
+            "mediana_ms": round(statistics.median(tempos), 3),
+            "p95_ms": round(_percentil(tempos, 95), 3),
+            "minimo_ms": round(min(tempos), 3),
+            "maximo_ms": round(max(tempos), 3),
+            "bytes_enviados_medio": (round(self.servidor.bytes_recebidos / repeticoes)
+                                     if self.servidor is not None else None),
+        }
+
+
+def medir_tamanho(backend: str, n_devedores: int, n_parcelas: int, repeticoes: int, latencia: float,
+                  formato: str, diretorio: str) -> List[Dict]:
+    import pandas as pd
+    import agregacoes
+    import importacao
+
+    dados = gerar_dados(n_devedores, n_parcelas, semente=n_devedores)
+    # Cada repetição usa devedores e parcelas diferentes, para não repetir operações sobre o mesmo item.
+    alvos = [dados[(i * 7919) % n_devedores] for i in range(4 * repeticoes)]
+    medicao = Medicao(backend, dados, latencia, formato, diretorio)
+    controle = medicao.controle
+
+    def consultar_frio(_):
+        controle.invalidar_cache()
+        return controle.consultar_dados(copiar=False)
+
+    def salvar_edicao_consultar(i):
+        pagina = controle.consultar_pagina(consultas.FiltroParcelas(situacao=consultas.SITUACAO_ABERTAS), pagina=i + 1)
+        df = pd.DataFrame(pagina.linhas, columns=["id", "valor", "vencimento", "paga", "nome"])
+        df["vencimento"] = pd.to_datetime(df["vencimento"]).dt.date
+        linhas_editadas = {posicao: {"paga": True} for posicao in range(min(5, len(df)))}
+        return controle.atualizar_parcelas(consultas.alteracoes_do_editor(linhas_editadas, df["id"].to_numpy()))
+
+    def dashboard(_):
+        indice = controle.recebiveis()
+        ano = indice.anos()[0]
+        indice.totais(ano)
+        return agregacoes.resumo_mensal_de_totais(indice.totais_por_mes(ano))
+
+    def cobranca(_):
+        indice = controle.recebiveis()
+        indice.faixas_atraso()
+        indice.prioridade_cobranca(25)
+        return indice.proximos_vencimentos(25)
+
+    def importar_planilha(i):
+        linhas = ["nome,n_parcelas,valor_parcela,primeiro_vencimento"]
+        linhas.extend(f"Importado {i:03d}-{j:03d},{n_parcelas},150.00,31/01/2025" for j in range(100))
+        plano = importacao.ler_planilha(io.BytesIO("\n".join(linhas).encode()), "planilha.csv")
+        return controle.importar(plano)
+
+    operacoes = [
+        ("consultar_dados_frio", consultar_frio),
+        ("consultar_dados_revalidacao", lambda _: controle.consultar_dados(copiar=False)),
+        ("consultar_pagina", lambda i: controle.consultar_pagina(
+            consultas.FiltroParcelas(somente_vencidas=True), consultas.ORDEM_VALOR, True, pagina=i + 1)),
+        ("cadastrar_novo_devedor", lambda i: controle.cadastrar_novo_devedor(
+            f"Benchmark {i:05d}", n_parcelas, 100.0, "2025-01-10")),
+        ("adicionar_parcela", lambda i: controle.adicionar_parcela(alvos[i]["nome"], 10.0, "2030-01-10")),
+        ("atualizar_parcelas", lambda i: controle.atualizar_parcelas(
+            {alvos[i]["parcelas"][-1]["id"]: {"valor": 123.45, "paga": True}})),
+        ("deletar_parcela_por_id", lambda i: controle.deletar_parcela_por_id(alvos[repeticoes + i]["parcelas"][0]["id"])),
+        ("deletar_parcela", lambda i: controle.deletar_parcela(
+            alvos[2 * repeticoes + i]["nome"], alvos[2 * repeticoes + i]["parcelas"][1]["vencimento"])),
+        ("deletar_devedor", lambda i: controle.deletar_devedor(alvos[3 * repeticoes + i]["nome"])),
+        ("salvar_edicao_consultar", salvar_edicao_consultar),
+        ("dashboard", dashboard),
+        ("cobranca", cobranca),
+        ("importar_planilha", importar_planilha),
+    ]
+
+    linhas = []
+    try:
+        for nome, funcao in operacoes:
+            linha = {"backend": backend, "devedores": n_devedores, "parcelas_por_devedor": n_parcelas,
+                     "parcelas": n_devedores * n_parcelas}
+            linha.update(medicao.medir(nome, funcao, repeticoes))
+            linhas.append(linha)
+        tamanho_final = medicao.bytes_armazenados()
+        for linha in linhas:
+            linha["bytes_armazenados"] = tamanho_final
+    finally:
+        medicao.encerrar()
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do ClientControl em bases sintéticas.")
+    parser.add_argument("--tamanhos", nargs="+", default=["100x12", "1000x12", "5000x12"],
+                        help="Tamanhos no formato DEVEDORESxPARCELAS.")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência simulada do Gist, em ms.")
+    parser.add_argument("--formato", choices=FORMATOS, default=FORMATO_COMPACTO, help="Formato gravado no Gist.")
+    parser.add_argument("--json", help="Arquivo JSON de saída.")
+    parser.add_argument("--csv", help="Arquivo CSV de saída.")
+    parser.add_argument("--metricas", help="Arquivo para as métricas internas (HTTP, JSON, DataFrames) em JSON.")
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for tamanho in args.tamanhos:
+            n_devedores, n_parcelas = _tamanho(tamanho)
+            for backend in args.backends:
+                linhas = medir_tamanho(backend, n_devedores, n_parcelas, args.repeticoes,
+                                       args.latencia / 1000, args.formato, diretorio)
+                for linha in linhas:
+                    print(f"{backend:<12} {tamanho:>10} {linha['operacao']:<28} "
+                          f"mediana {linha['mediana_ms']:>9.2f} ms   p95 {linha['p95_ms']:>9.2f} ms"
+                          + (f"   enviados {linha['bytes_enviados_medio']:>9} B" if linha["bytes_enviados_medio"] else ""))
+                resultados.extend(linhas)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "parametros": vars(args),
+                "resultados": resultados,
+            }, arquivo, indent=2, ensure_ascii=False)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS)
+            escritor.writeheader()
+            escritor.writerows(resultados)
+    if args.metricas:
+        with open(args.metricas, "w", encoding="utf-8") as arquivo:
+            arquivo.write(METRICAS.como_json())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Mede o custo de inicialização do app.
+
+1. Importação a frio: tempo, em um interpretador novo, para importar os
+   módulos da tela de login, comparado com importar também pandas,
+   agregacoes e streamlit_option_menu (o que o app fazia antes de adiar
+   essas importações).
+2. Login até os primeiros dados: autenticação seguida da leitura (modo
+   sequencial) contra a leitura com a autenticação em paralelo
+   (ClientControl.iniciar_sessao).
+
+Sem --token, a etapa 2 usa o servidor local de stub_gist, com a latência
+informada em --latencia e uma base sintética de 200 devedores.
+
+Uso:
+    python benchmark_inicializacao.py --latencia 150 --repeticoes 5
+    python benchmark_inicializacao.py --token ghp_... --gist-id abc123
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+MODULOS_LOGIN = ["streamlit", "client_control", "armazenamento"]
+MODULOS_ADIADOS = ["pandas", "agregacoes", "streamlit_option_menu"]
+
+
+def tempo_de_importacao(modulos: List[str], repeticoes: int) -> float:
+    """Mediana, em segundos, do tempo de importação dos módulos em um interpretador novo."""
+    codigo = ("import time; inicio = time.perf_counter(); "
+              + "; ".join(f"import {modulo}" for modulo in modulos)
+              + "; print(time.perf_counter() - inicio)")
+    tempos = []
+    for _ in range(repeticoes):
+        # Roda na pasta do projeto, para achar os módulos dele de onde quer que o script seja chamado.
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return statistics.median(tempos)
+
+
+def medir(funcao: Callable[[int], None], repeticoes: int) -> float:
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def tempos_de_login(token: str, gist_id: str, url_base: str, repeticoes: int) -> Dict[str, float]:
+    import armazenamento
+    import cliente_github
+    import client_control
+
+    def controle(em_segundo_plano: bool) -> client_control.ClientControl:
+        cliente = cliente_github.ClienteGitHub(token, url_base=url_base)
+        gist = armazenamento.ArmazenamentoGist(token, gist_id, cliente=cliente)
+        return client_control.ClientControl(armazenamento=gist, autenticar_em_segundo_plano=em_segundo_plano)
+
+    def sequencial(_):
+        controle(False).consultar_dados(copiar=False)
+
+    def paralelo(_):
+        controle(True).iniciar_sessao()
+
+    return {
+        "login_sequencial": medir(sequencial, repeticoes),
+        "login_paralelo": medir(paralelo, repeticoes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do ClientControl.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=150.0,
+                        help="Latência simulada de cada requisição, em ms (sem --token).")
+    parser.add_argument("--token", help="Token do GitHub para medir contra a API real.")
+    parser.add_argument("--gist-id", default="benchmark", help="ID do Gist (com --token).")
+    args = parser.parse_args()
+
+    resultados = {
+        "importacao_login": tempo_de_importacao(MODULOS_LOGIN, args.repeticoes),
+        "importacao_com_adiados": tempo_de_importacao(MODULOS_LOGIN + MODULOS_ADIADOS, args.repeticoes),
+    }
+    if args.token:
+        from cliente_github import URL_API_GITHUB
+        resultados.update(tempos_de_login(args.token, args.gist_id, URL_API_GITHUB, args.repeticoes))
+    else:
+        from dados_sinteticos import gerar_dados
+        from serializacao import serializar
+        from stub_gist import ServidorGistLocal
+        with ServidorGistLocal({"dados.json": serializar(gerar_dados(200, 12))}, latencia=args.latencia / 1000) as servidor:
+            resultados.update(tempos_de_login("simulado", servidor.gist_id, servidor.url_base, args.repeticoes))
+
+    for nome, segundos in resultados.items():
+        print(f"{nome:<28} {segundos * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
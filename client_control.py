@@ -1,164 +1,679 @@
-import os
-import requests
-import json
+import logging
+import threading
 import streamlit as st
-from dotenv import load_dotenv
-from typing import Union, List, Dict
-from datetime import datetime, timedelta
+from concurrent.futures import Future, TimeoutError as TempoEsgotado
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Iterator, Tuple, Union, List, Dict
+from datetime import date, datetime
+from armazenamento import (Armazenamento, ArmazenamentoGist, ArmazenamentoGistDiario, ArmazenamentoGistFragmentado,
+                            ArmazenamentoMemoria, ConflitoDeVersao)
+from fila_persistencia import FilaPersistencia
+from mesclagem import ConflitoDeMesclagem, mesclar
+from consultas import ORDEM_VENCIMENTO, FiltroParcelas, PaginaParcelas
+from recebiveis import IndiceRecebiveis
+from serializacao import FORMATO_COMPACTO
+from metricas import METRICAS, registrar
+from repositorio import Devedor, Parcela, RepositorioDevedores, novo_id_parcela, vencimentos_mensais
+
+if TYPE_CHECKING:
+    from importacao import PlanoImportacao
+
+MODO_UNICO = "unico"
+MODO_FRAGMENTADO = "fragmentado"
+MODO_DIARIO = "diario"
 
 class ClientControl:
     """
-    Uma classe para gerenciar uma base de dados JSON simples armazenada 
-    em um único arquivo dentro de um Gist do GitHub.
+    Uma classe para gerenciar uma base de devedores e parcelas.
+
+    Por padrão os dados ficam em um Gist do GitHub, em um único arquivo ou
+    fragmentados em vários; qualquer outro backend de `armazenamento`
+    (por exemplo, ArmazenamentoSQLite) pode ser usado no lugar.
     """
-    def __init__(self, token: str, gist_id: str):
+    def __init__(self, token: Union[str, None] = None, gist_id: Union[str, None] = None, ttl_cache: float = 10.0,
+                 modo_armazenamento: str = MODO_UNICO, n_fragmentos: int = 16,
+                 armazenamento: Union[Armazenamento, None] = None, max_tentativas_conflito: int = 3,
+                 autenticar_em_segundo_plano: bool = True, formato_serializacao: str = FORMATO_COMPACTO):
         """
-        Inicializa o objeto e autentica a conexão com o Gist.
+        Inicializa o objeto e inicia a autenticação com o backend de armazenamento.
 
         Args:
             token (str): O Personal Access Token (PAT) do GitHub.
             gist_id (str): O ID do Gist que será usado como banco de dados.
-        
+            ttl_cache (float): Segundos durante os quais o conteúdo lido é
+                reutilizado sem consultar o GitHub. Após esse prazo, a leitura
+                é revalidada com uma requisição condicional (If-None-Match).
+            modo_armazenamento (str): MODO_UNICO grava tudo em "dados.json";
+                MODO_FRAGMENTADO distribui os devedores em vários arquivos
+                descritos por "manifesto.json" (ver ArmazenamentoGistFragmentado);
+                MODO_DIARIO acrescenta as mudanças a "diario.jsonl" e só
+                reescreve "dados.json" ao compactar (ver ArmazenamentoGistDiario).
+            n_fragmentos (int): Quantidade de fragmentos ao criar o manifesto.
+                Se o Gist já tiver um manifesto, o valor dele prevalece.
+            armazenamento (Armazenamento): Backend já configurado. Quando
+                informado, os parâmetros do Gist são ignorados.
+            max_tentativas_conflito (int): Quantas vezes uma gravação é
+                mesclada e repetida quando outra sessão gravou antes.
+            autenticar_em_segundo_plano (bool): Se True, a verificação das
+                credenciais roda em uma thread e o construtor retorna na hora;
+                o resultado é conferido por autenticar() e antes de cada
+                gravação. Se False, o construtor espera a verificação.
+            formato_serializacao (str): Formato dos arquivos gravados no Gist
+                (ver serializacao). Qualquer formato conhecido é lido.
+
         Raises:
-            ValueError: Se o token não for fornecido.
-            ConnectionError: Se a autenticação com a API do GitHub falhar.
-        """
-        if not token:
-            raise ValueError("❌ ERRO: O token do GitHub não foi fornecido.")
-        
-        self.token = token
-        self.gist_id = gist_id
-        # O nome do arquivo no Gist é um detalhe de implementação interno e fixo.
-        self.filename = "dados.json" 
-        self.api_headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github+json"
-        }
-        
-        # A autenticação é chamada no momento da criação do objeto.
-        self._autenticar()
-
-    def _autenticar(self):
-        """Método privado para verificar o token na inicialização."""
-        print("--- Verificando autenticação com o GitHub... ---")
-        url = "https://api.github.com/user"
-        try:
-            response = requests.get(url, headers=self.api_headers)
-            response.raise_for_status() # Lança erro para status 4xx ou 5xx
-            usuario = response.json()
-            print(f"✅ Autenticação bem-sucedida como '{usuario['login']}'.")
-        except requests.exceptions.HTTPError as err:
-            if err.response.status_code == 401:
-                raise ConnectionError("ERRO DE AUTENTICAÇÃO: O token fornecido é inválido ou expirou.")
+            ValueError: Se o token não for fornecido ou o modo for desconhecido.
+            ConnectionError: Se a autenticação falhar (só com autenticar_em_segundo_plano=False).
+        """
+        if armazenamento is None:
+            if modo_armazenamento == MODO_UNICO:
+                armazenamento = ArmazenamentoGist(token, gist_id, ttl_cache, formato=formato_serializacao)
+            elif modo_armazenamento == MODO_FRAGMENTADO:
+                armazenamento = ArmazenamentoGistFragmentado(token, gist_id, ttl_cache, n_fragmentos,
+                                                             formato=formato_serializacao)
+            elif modo_armazenamento == MODO_DIARIO:
+                armazenamento = ArmazenamentoGistDiario(token, gist_id, ttl_cache, formato=formato_serializacao)
             else:
-                raise ConnectionError(f"Falha na autenticação com status: {err.response.status_code}.")
-        except requests.exceptions.RequestException as err:
-            raise ConnectionError(f"Erro de conexão com a API do GitHub: {err}")
-
-    def consultar_dados(self) -> Union[List[Dict], None]:
-        """Consulta o Gist e retorna todo o conteúdo do arquivo JSON."""
-        print(f"\n--- Consultando dados do Gist '{self.gist_id}'... ---")
-        url = f"https://api.github.com/gists/{self.gist_id}"
+                raise ValueError(f"❌ ERRO: Modo de armazenamento desconhecido: '{modo_armazenamento}'.")
+        self.armazenamento = armazenamento
+        self.max_tentativas_conflito = max_tentativas_conflito
+
+        # Lote de operações em andamento (ver lote()); None fora de um lote.
+        self._lote_ativo: Union["LoteDeOperacoes", None] = None
+
+        # Gravação em segundo plano (ver iniciar_fila_persistencia). Enquanto houver
+        # alterações na fila, as leituras vêm de `_otimista`, que já as contém.
+        self.fila: Union[FilaPersistencia, None] = None
+        self._otimista: Union[ArmazenamentoMemoria, None] = None
+        self._repositorio_otimista: Union[RepositorioDevedores, None] = None
+        self._lock_otimista = threading.RLock()
+        # Serializa o acesso ao backend entre a thread da fila e a do Streamlit.
+        self._lock_backend = threading.RLock()
+
+        # Calendário de recebíveis e atraso, atualizado a cada mutação (ver recebiveis()).
+        self._recebiveis = IndiceRecebiveis()
+
+        # A verificação das credenciais corre em paralelo com a primeira leitura (ver iniciar_sessao).
+        self._autenticacao: Future = Future()
+        if autenticar_em_segundo_plano:
+            threading.Thread(target=self._verificar_credenciais, name="autenticacao", daemon=True).start()
+        else:
+            self._verificar_credenciais()
+            self.autenticar()
+
+    def _verificar_credenciais(self):
         try:
-            response = requests.get(url, headers=self.api_headers)
-            response.raise_for_status()
-            gist_data = response.json()
-            conteudo_string = gist_data["files"][self.filename]["content"]
-            print("✅ Dados lidos com sucesso!")
-            return json.loads(conteudo_string)
+            self.armazenamento.autenticar()
+            self._autenticacao.set_result(True)
         except Exception as err:
-            print(f"❌ Erro ao consultar o Gist: {err}")
+            self._autenticacao.set_exception(err)
+
+    def autenticar(self, timeout: Union[float, None] = None):
+        """
+        Espera a verificação das credenciais iniciada pelo construtor.
+
+        Raises:
+            ConnectionError: Se a autenticação falhar ou não terminar dentro do timeout.
+        """
+        try:
+            self._autenticacao.result(timeout)
+        except TempoEsgotado:
+            raise ConnectionError("A autenticação não respondeu a tempo.")
+
+    def iniciar_sessao(self) -> Union[List[Dict], None]:
+        """
+        Carrega os dados enquanto a autenticação termina em segundo plano.
+
+        As duas requisições ocorrem ao mesmo tempo, de modo que o login custa
+        uma ida ao servidor em vez de duas. Retorna os dados carregados
+        (somente leitura), ou None se a leitura falhar.
+
+        Raises:
+            ConnectionError: Se a autenticação falhar.
+        """
+        dados = self._ler_dados()
+        self.autenticar()
+        return dados
+
+    @property
+    def versao_dados(self) -> Union[str, None]:
+        """
+        Versão dos últimos dados lidos (o SHA do histórico, no Gist), ou None se não houver cache.
+
+        Com alterações ainda na fila de persistência, a versão do backend ganha
+        o sufixo "~N", que muda a cada alteração local.
+        """
+        with self._lock_otimista:
+            if self._otimista is not None:
+                return f"{self._repositorio_otimista.versao_origem}~{self._otimista.versao}"
+        with self._lock_backend:
+            return self.armazenamento.versao
+
+    def invalidar_cache(self):
+        """Descarta o conteúdo em cache, forçando uma leitura completa na próxima consulta."""
+        with self._lock_backend:
+            self.armazenamento.invalidar_cache()
+
+    def _leitura(self) -> Armazenamento:
+        """Backend a usar nas consultas: o estado otimista, se houver, ou o armazenamento."""
+        with self._lock_otimista:
+            if self._otimista is not None:
+                return self._otimista
+        return self.armazenamento
+
+    def _ler_dados(self) -> Union[List[Dict], None]:
+        """Retorna a lista em cache do backend (ou do estado otimista), que não deve ser alterada."""
+        leitura = self._leitura()
+        if leitura is self.armazenamento:
+            with self._lock_backend:
+                return self.armazenamento.carregar()
+        return leitura.carregar()
+
+    def _ler_dados_e_versao(self) -> Tuple[Union[List[Dict], None], Union[str, None]]:
+        """Como _ler_dados(), mas junto com a versão correspondente aos dados devolvidos (ver versao_dados)."""
+        with self._lock_otimista:
+            if self._otimista is not None:
+                return (self._otimista.carregar(),
+                        f"{self._repositorio_otimista.versao_origem}~{self._otimista.versao}")
+        # Carrega antes de ler a versão: carregar() pode trazer uma versão nova do backend.
+        with self._lock_backend:
+            dados = self.armazenamento.carregar()
+            return dados, self.armazenamento.versao
+
+    def consultar_dados(self, copiar: bool = True) -> Union[List[Dict], None]:
+        """
+        Consulta o armazenamento e retorna todos os devedores.
+
+        Por padrão os devedores e as parcelas são copiados, para que alterações
+        feitas pelo chamador não contaminem o cache (seus campos são valores
+        simples, então basta copiar os dicionários, bem mais barato que um
+        deepcopy). Com `copiar=False` a própria lista em cache é devolvida, sem
+        o custo da cópia; ela deve ser tratada como somente leitura.
+        """
+        dados = self._ler_dados()
+        if dados is None or not copiar:
+            return dados
+        return [{**devedor, "parcelas": [dict(parcela) for parcela in devedor.get("parcelas", [])]}
+                for devedor in dados]
+
+    def consultar_repositorio(self) -> Union[RepositorioDevedores, None]:
+        """Consulta o armazenamento e retorna os dados como um RepositorioDevedores indexado."""
+        dados, versao = self._ler_dados_e_versao()
+        if dados is None:
+            return None
+        repositorio = RepositorioDevedores.de_dados(dados)
+        repositorio.origem = dados
+        repositorio.versao_origem = versao
+        return repositorio
+
+    def listar_devedores(self) -> List[str]:
+        """Nomes de todos os devedores, em ordem alfabética."""
+        leitura = self._leitura()
+        if leitura is self.armazenamento:
+            with self._lock_backend:
+                return self.armazenamento.listar_devedores()
+        return leitura.listar_devedores()
+
+    def consultar_parcelas(self, nome_devedor: Union[str, None] = None) -> List[Dict]:
+        """Parcelas em formato plano (id, nome, valor, vencimento, paga), opcionalmente de um só devedor."""
+        leitura = self._leitura()
+        if leitura is self.armazenamento:
+            with self._lock_backend:
+                return self.armazenamento.consultar_parcelas(nome_devedor)
+        return leitura.consultar_parcelas(nome_devedor)
+
+    def consultar_pagina(self, filtro: Union[FiltroParcelas, None] = None, ordem: str = ORDEM_VENCIMENTO,
+                         decrescente: bool = False, pagina: int = 1, tamanho: int = 50) -> PaginaParcelas:
+        """Uma página das parcelas que atendem ao filtro (ver consultas.FiltroParcelas)."""
+        leitura = self._leitura()
+        if leitura is self.armazenamento:
+            with self._lock_backend:
+                return self.armazenamento.consultar_pagina(filtro, ordem, decrescente, pagina, tamanho)
+        return leitura.consultar_pagina(filtro, ordem, decrescente, pagina, tamanho)
+
+    def recebiveis(self) -> Union[IndiceRecebiveis, None]:
+        """
+        Índice de recebíveis (totais por mês, saldos, próximos vencimentos e atraso) dos dados atuais.
+
+        As mutações feitas por este ClientControl atualizam o índice só nos
+        devedores alterados; quando a versão dos dados muda por outro motivo,
+        ele é conciliado com a leitura atual, também por devedor (ver
+        recebiveis.IndiceRecebiveis). Retorna None se os dados não puderem ser lidos.
+        """
+        dados, versao = self._ler_dados_e_versao()
+        if dados is None:
             return None
+        self._recebiveis.sincronizar(dados, versao)
+        return self._recebiveis
+
+    def atualizar_gist(self, novo_conteudo: Union[List[Dict], RepositorioDevedores]) -> bool:
+        """
+        Sobrescreve o conteúdo armazenado (lista ou repositório).
+
+        O nome é mantido por compatibilidade; a gravação vai para o backend
+        configurado, com controle de versão (ver _gravar). Um repositório
+        obtido por consultar_repositorio() leva consigo a base da mesclagem;
+        uma lista é conferida contra a versão da última leitura, sem mesclagem.
+
+        Alterações ainda na fila de persistência são gravadas antes.
+        """
+        self.esvaziar_fila()
+        if isinstance(novo_conteudo, RepositorioDevedores):
+            erro = self._gravar_repositorio(novo_conteudo)
+        else:
+            erro = self._gravar(novo_conteudo, None, None, self.versao_dados)
+        if erro:
+            registrar("gravacao_falhou", erro, logging.ERROR)
+        return erro is None
 
-    def atualizar_gist(self, novo_conteudo: List[Dict]) -> bool:
-        """Sobrescreve o arquivo no Gist com o novo conteúdo."""
-        print(f"--- Atualizando dados no Gist... ---")
-        url = f"https://api.github.com/gists/{self.gist_id}"
-        payload = {"files": {self.filename: {"content": json.dumps(novo_conteudo, indent=2)}}}
+    def _gravar_repositorio(self, repositorio: RepositorioDevedores) -> Union[str, None]:
+        erro = self._gravar(repositorio.para_dados(), repositorio.alterados,
+                            repositorio.origem, repositorio.versao_origem)
+        if erro is None:
+            # A versão gravada só é conhecida na próxima leitura, que concilia o índice.
+            self._recebiveis.aplicar(repositorio, repositorio.alterados, repositorio.versao_origem, None)
+        return erro
+
+    def _gravar(self, dados: List[Dict], alterados: Union[set, None], base: Union[List[Dict], None],
+                versao_base: Union[str, None]) -> Union[str, None]:
+        """
+        Grava com controle de concorrência otimista.
+
+        A gravação só é aceita se o armazenamento ainda estiver em
+        `versao_base`. Em caso de conflito, as nossas alterações (base -> dados)
+        são mescladas com as da outra sessão (base -> atual) e a gravação é
+        repetida sobre a versão atual, até max_tentativas_conflito vezes.
+
+        Returns:
+            None em caso de sucesso, ou a mensagem de erro.
+        """
         try:
-            response = requests.patch(url, headers=self.api_headers, json=payload)
-            response.raise_for_status()
-            print("✅ Gist atualizado com sucesso no GitHub!")
-            return True
-        except Exception as err:
-            print(f"❌ Erro ao atualizar o Gist: {err}")
-            return False
-
-    def _encontrar_devedor(self, lista_devedores: List[Dict], nome: str) -> Union[Dict, None]:
-        """Método auxiliar para encontrar um devedor na lista pelo nome."""
-        for devedor in lista_devedores:
-            if devedor.get("nome", "").lower() == nome.lower():
-                return devedor
-        return None
-
-    def cadastrar_novo_devedor(self, nome: str, n_parcelas: int, vl_par: float, p_vencimento: str):
-        """Cadastra um novo devedor com suas parcelas iniciais."""
-        print(f"\n--- Cadastrando '{nome}'... ---")
-        dados = self.consultar_dados()
-        if dados is None: dados = []
-        if self._encontrar_devedor(dados, nome):
-            print(f"⚠️  Devedor '{nome}' já está cadastrado. Operação cancelada.")
-            return
+            self.autenticar()
+        except ConnectionError as err:
+            return str(err)
+        for _ in range(self.max_tentativas_conflito):
+            try:
+                with self._lock_backend:
+                    if self.armazenamento.salvar(dados, alterados, versao_esperada=versao_base):
+                        return None
+                return "Falha ao gravar as alterações."
+            except ConflitoDeVersao as conflito:
+                if base is None:
+                    return "Os dados foram alterados por outra sessão. Recarregue e tente novamente."
+                try:
+                    dados = mesclar(base, dados, conflito.dados_atuais, alterados)
+                except ConflitoDeMesclagem as err:
+                    return f"Conflito com alterações de outra sessão em {err}. Recarregue e tente novamente."
+                registrar("gravacao_mesclada", "Alterações mescladas com as de outra sessão; gravando de novo.",
+                          versao_base=versao_base, versao_atual=conflito.versao_atual)
+                base, versao_base = conflito.dados_atuais, conflito.versao_atual
+        return "Os dados continuaram mudando durante a gravação. Tente novamente."
+
+    def _executar(self, aplicar: Callable[[RepositorioDevedores], "ResultadoOperacao"]) -> "ResultadoOperacao":
+        """
+        Executa uma mutação sobre o repositório de devedores.
+
+        Dentro de um lote a mutação é aplicada apenas em memória e registrada no
+        lote; fora dele, os dados são lidos, alterados e gravados imediatamente,
+        ou, com a fila de persistência ativa, aplicados ao estado otimista e
+        enfileirados para gravação em segundo plano.
+        """
+        if self._lote_ativo is not None:
+            resultado = aplicar(self._lote_ativo.repositorio)
+            self._lote_ativo.registrar(resultado)
+            return resultado
+
+        if self.fila is not None:
+            return self._executar_em_segundo_plano(aplicar)
+
+        repositorio = self.consultar_repositorio()
+        if repositorio is None:
+            return ResultadoOperacao(False, "Não foi possível consultar os dados.")
+        resultado = aplicar(repositorio)
+        if resultado:
+            erro = self._gravar_repositorio(repositorio)
+            if erro:
+                resultado = ResultadoOperacao(False, erro, resultado.operacao)
+        return resultado
+
+    @contextmanager
+    def lote(self) -> Iterator["LoteDeOperacoes"]:
+        """
+        Agrupa várias mutações em uma única leitura e uma única gravação.
+
+        Exemplo:
+            with controle.lote() as lote:
+                controle.cadastrar_novo_devedor("Ana", 3, 100.0, "2025-01-10")
+                controle.adicionar_parcela("Bruno", 50.0, "2025-02-10")
+            print(lote.resultados)
+
+        Se o bloco lançar uma exceção, nada é gravado. Se a gravação final
+        falhar, os resultados bem-sucedidos do lote são marcados como falhos
+        e o motivo fica em `lote.erro`.
+
+        Raises:
+            RuntimeError: Se já houver um lote em andamento.
+            ConnectionError: Se os dados não puderem ser carregados.
+        """
+        if self._lote_ativo is not None:
+            raise RuntimeError("Já existe um lote de operações em andamento.")
+        self.esvaziar_fila()
+        repositorio = self.consultar_repositorio()
+        if repositorio is None:
+            raise ConnectionError("Não foi possível carregar os dados para o lote.")
+
+        lote = LoteDeOperacoes(repositorio)
+        self._lote_ativo = lote
         try:
-            vencimento_base = datetime.strptime(p_vencimento, "%Y-%m-%d")
-            parcelas = []
-            for i in range(n_parcelas):
-                vencimento = vencimento_base + timedelta(days=30 * i)
-                parcelas.append({"valor": vl_par, "vencimento": vencimento.strftime("%Y-%m-%d"), "paga": False})
-            novo_devedor = {"nome": nome, "parcelas": parcelas}
-            dados.append(novo_devedor)
-            if self.atualizar_gist(dados):
-                print(f"✅ Devedor '{nome}' salvo com sucesso.")
-        except ValueError:
-            print("❌ Data de vencimento inválida. Use o formato YYYY-MM-DD.")
-
-    def adicionar_parcela(self, nome_devedor: str, valor: float, vencimento: str):
+            yield lote
+        finally:
+            self._lote_ativo = None
+
+        if lote.alterado:
+            lote.erro = self._gravar_repositorio(lote.repositorio)
+            lote.gravado = lote.erro is None
+            if not lote.gravado:
+                for resultado in lote.resultados:
+                    if resultado.sucesso:
+                        resultado.sucesso = False
+                        resultado.mensagem = f"Não gravado: {resultado.mensagem}"
+        else:
+            lote.gravado = True
+
+    def iniciar_fila_persistencia(self, atraso: float = 0.5, atraso_maximo: float = 3.0,
+                                  max_tentativas: int = 3, ocioso: float = 30.0) -> FilaPersistencia:
+        """
+        Passa a gravar as mutações em segundo plano.
+
+        Cada mutação é aplicada na hora a um estado otimista em memória, que
+        passa a responder às consultas, e o resultado é devolvido sem esperar
+        pela rede. As mutações feitas em até `atraso` segundos umas das outras
+        são reaplicadas sobre os dados atuais do backend e gravadas juntas
+        (ver FilaPersistencia). Se uma mutação deixar de valer na reaplicação
+        (por exemplo, porque outra sessão removeu o devedor) ou a gravação
+        falhar de vez, o motivo vai para `fila.falhas` e o estado otimista é
+        refeito a partir do backend. A thread de gravação termina depois de
+        `ocioso` segundos sem alterações e volta com a próxima.
+        """
+        if self.fila is None:
+            self.fila = FilaPersistencia(self._processar_fila, atraso, atraso_maximo, max_tentativas,
+                                         ao_descartar=self._reconstruir_estado_otimista, ocioso=ocioso)
+        return self.fila
+
+    def esvaziar_fila(self, timeout: Union[float, None] = None) -> bool:
+        """Espera a gravação das mutações pendentes. Retorna False se o timeout expirar."""
+        if self.fila is None:
+            return True
+        return self.fila.esvaziar(timeout)
+
+    def _executar_em_segundo_plano(self, aplicar: Callable[[RepositorioDevedores], "ResultadoOperacao"]) -> "ResultadoOperacao":
+        with self._lock_otimista:
+            if self._repositorio_otimista is None:
+                repositorio = self._repositorio_do_backend()
+                if repositorio is None:
+                    return ResultadoOperacao(False, "Não foi possível consultar os dados.")
+                self._repositorio_otimista = repositorio
+            # A versão de onde vieram os dados que serão alterados: a do backend, lida junto
+            # com eles, ou a do estado otimista que ainda aguarda na fila.
+            if self._otimista is None:
+                versao_anterior = self._repositorio_otimista.versao_origem
+            else:
+                versao_anterior = f"{self._repositorio_otimista.versao_origem}~{self._otimista.versao}"
+            resultado = aplicar(self._repositorio_otimista)
+            if resultado:
+                self._publicar_estado_otimista()
+                self._recebiveis.aplicar(self._repositorio_otimista, self._repositorio_otimista.alterados,
+                                         versao_anterior, self.versao_dados)
+                self.fila.enfileirar(aplicar)
+            elif self._otimista is None:
+                self._repositorio_otimista = None
+            return resultado
+
+    def _publicar_estado_otimista(self):
+        # Uma nova lista a cada alteração: quem leu a anterior continua com ela intacta.
+        dados = self._repositorio_otimista.para_dados()
+        if self._otimista is None:
+            self._otimista = ArmazenamentoMemoria(dados)
+        else:
+            self._otimista.salvar(dados)
+
+    def _processar_fila(self, operacoes: List[Callable[[RepositorioDevedores], "ResultadoOperacao"]]) -> List[str]:
+        """
+        Reaplica as mutações enfileiradas sobre os dados atuais e grava tudo de uma vez.
+
+        A leitura usa o cache do backend, revalidado pela ETag depois do TTL; se
+        ele estiver atrasado, a gravação esbarra na versão nova e é mesclada
+        (ver _gravar). Só quando a gravação falha por conflito o cache é
+        descartado, para que a nova tentativa da fila parta dos dados atuais.
+        """
+        repositorio = self._repositorio_do_backend()
+        if repositorio is None:
+            raise ConnectionError("Não foi possível carregar os dados para gravar as alterações.")
+
+        falhas = []
+        for aplicar in operacoes:
+            resultado = aplicar(repositorio)
+            if not resultado:
+                falhas.append(f"Não gravado: {resultado.mensagem}")
+        if repositorio.alterados:
+            with METRICAS.medir("fila_gravar"):
+                erro = self._gravar_repositorio(repositorio)
+            if erro:
+                with self._lock_backend:
+                    # A versão mudou desde a leitura: outra sessão gravou, e o cache não é confiável.
+                    if self.armazenamento.versao != repositorio.versao_origem:
+                        self.armazenamento.invalidar_cache()
+                raise ConnectionError(erro)
+            registrar("fila_gravada", f"{len(operacoes)} alteração(ões) gravada(s) em segundo plano.",
+                      operacoes=len(operacoes), devedores=len(repositorio.alterados), falhas=len(falhas))
+
+        with self._lock_otimista:
+            # Nada mais na fila além deste lote: o backend já reflete o estado otimista.
+            if self.fila.pendentes <= len(operacoes):
+                self._otimista = None
+                self._repositorio_otimista = None
+        return falhas
+
+    def _reconstruir_estado_otimista(self):
+        """Refaz o estado otimista a partir do backend e das mutações ainda pendentes."""
+        with self._lock_otimista:
+            pendentes = self.fila.itens_pendentes()
+            self._otimista = None
+            self._repositorio_otimista = None
+            if not pendentes:
+                return
+            repositorio = self._repositorio_do_backend()
+            if repositorio is None:
+                return
+            for aplicar in pendentes:
+                aplicar(repositorio)
+            self._repositorio_otimista = repositorio
+            self._publicar_estado_otimista()
+
+    def _repositorio_do_backend(self) -> Union[RepositorioDevedores, None]:
+        """Como consultar_repositorio(), mas sempre lendo do backend, ignorando o estado otimista."""
+        with self._lock_backend:
+            dados = self.armazenamento.carregar()
+            versao = self.armazenamento.versao
+        if dados is None:
+            return None
+        repositorio = RepositorioDevedores.de_dados(dados)
+        repositorio.origem = dados
+        repositorio.versao_origem = versao
+        return repositorio
+
+    def cadastrar_novo_devedor(self, nome: str, n_parcelas: int, vl_par: float, p_vencimento: str) -> "ResultadoOperacao":
+        """Cadastra um novo devedor com parcelas mensais a partir de `p_vencimento` (ver vencimentos_mensais)."""
+        # IDs gerados fora de `aplicar`, para que uma reaplicação (ver _processar_fila) produza as mesmas parcelas.
+        ids = [novo_id_parcela() for _ in range(max(n_parcelas, 0))]
+
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            if nome in repositorio:
+                return ResultadoOperacao(False, f"Devedor '{nome}' já está cadastrado.", "cadastrar_novo_devedor")
+            try:
+                vencimento_base = datetime.strptime(p_vencimento, "%Y-%m-%d").date()
+            except ValueError:
+                return ResultadoOperacao(False, "Data de vencimento inválida. Use o formato YYYY-MM-DD.", "cadastrar_novo_devedor")
+            devedor = Devedor(nome)
+            repositorio.adicionar(devedor)
+            for id_parcela, vencimento in zip(ids, vencimentos_mensais(vencimento_base, n_parcelas)):
+                repositorio.adicionar_parcela(devedor, Parcela(vl_par, vencimento, id=id_parcela))
+            return ResultadoOperacao(True, f"Devedor '{nome}' cadastrado com sucesso.", "cadastrar_novo_devedor")
+
+        return self._executar(aplicar)
+
+    def adicionar_parcela(self, nome_devedor: str, valor: float, vencimento: str) -> "ResultadoOperacao":
         """Adiciona uma única parcela a um devedor existente."""
-        print(f"\n--- Adicionando parcela para '{nome_devedor}'... ---")
-        dados = self.consultar_dados()
-        if dados is None: return
-        devedor_encontrado = self._encontrar_devedor(dados, nome_devedor)
-        if not devedor_encontrado:
-            print(f"❌ Devedor '{nome_devedor}' não encontrado.")
-            return
-        try:
-            datetime.strptime(vencimento, "%Y-%m-%d")
-            nova_parcela = {"valor": valor, "vencimento": vencimento, "paga": False}
-            devedor_encontrado["parcelas"].append(nova_parcela)
-            if self.atualizar_gist(dados):
-                print(f"✅ Parcela salva com sucesso para '{nome_devedor}'.")
-        except ValueError:
-            print("❌ Data de vencimento inválida. Use o formato YYYY-MM-DD.")
-
-    def deletar_devedor(self, nome_devedor: str):
-        """Remove um devedor e todas as suas parcelas da lista."""
-        print(f"\n--- Deletando '{nome_devedor}'... ---")
-        dados = self.consultar_dados()
-        if dados is None: return
-        nova_lista = [d for d in dados if d.get("nome", "").lower() != nome_devedor.lower()]
-        if len(nova_lista) == len(dados):
-            print(f"❌ Devedor '{nome_devedor}' não encontrado.")
-            return
-        if self.atualizar_gist(nova_lista):
-            print(f"✅ Devedor '{nome_devedor}' deletado com sucesso.")
-
-    def deletar_parcela(self, nome_devedor: str, vencimento_parcela: str):
-        """Encontra um devedor e deleta uma de suas parcelas pela data de vencimento."""
-        print(f"\n--- Deletando parcela de '{vencimento_parcela}' para '{nome_devedor}'... ---")
-        dados = self.consultar_dados()
-        if dados is None: return
-        devedor_encontrado = self._encontrar_devedor(dados, nome_devedor)
-        if not devedor_encontrado:
-            print(f"❌ Devedor '{nome_devedor}' não encontrado.")
-            return
-        n_parcelas_original = len(devedor_encontrado["parcelas"])
-        parcelas_atualizadas = [p for p in devedor_encontrado["parcelas"] if p.get("vencimento") != vencimento_parcela]
-        if len(parcelas_atualizadas) == n_parcelas_original:
-            print(f"❌ Nenhuma parcela com vencimento em '{vencimento_parcela}' foi encontrada.")
-            return
-        devedor_encontrado["parcelas"] = parcelas_atualizadas
-        if self.atualizar_gist(dados):
-            print(f"✅ Parcela de '{vencimento_parcela}' deletada com sucesso.")
+        id_parcela = novo_id_parcela()
+
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            devedor = repositorio.encontrar(nome_devedor)
+            if devedor is None:
+                return ResultadoOperacao(False, f"Devedor '{nome_devedor}' não encontrado.", "adicionar_parcela")
+            try:
+                datetime.strptime(vencimento, "%Y-%m-%d")
+            except ValueError:
+                return ResultadoOperacao(False, "Data de vencimento inválida. Use o formato YYYY-MM-DD.", "adicionar_parcela")
+            repositorio.adicionar_parcela(devedor, Parcela(valor, vencimento, id=id_parcela))
+            return ResultadoOperacao(True, f"Parcela adicionada para '{nome_devedor}'.", "adicionar_parcela")
+
+        return self._executar(aplicar)
+
+    def importar(self, plano: "PlanoImportacao", duplicados: str = "ignorar") -> "ResultadoOperacao":
+        """
+        Grava os devedores e parcelas de uma planilha (ver importacao.ler_planilha) em uma única gravação.
+
+        `duplicados` ("ignorar" ou "acrescentar") define o que fazer com devedores
+        que já existem; parcelas iguais a uma já cadastrada nunca são duplicadas.
+        """
+        from importacao import mensagem_importacao
+
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            contagem = plano.aplicar(repositorio, duplicados)
+            if not contagem["parcelas_importadas"] and not contagem["devedores_novos"]:
+                return ResultadoOperacao(False, "Nada a importar: " + mensagem_importacao(contagem), "importar")
+            return ResultadoOperacao(True, mensagem_importacao(contagem), "importar")
+
+        with METRICAS.medir("importar"):
+            resultado = self._executar(aplicar)
+        registrar("importacao", resultado.mensagem, logging.INFO if resultado else logging.WARNING,
+                  devedores=len(plano.devedores), parcelas=plano.n_parcelas, sucesso=resultado.sucesso)
+        return resultado
+
+    def deletar_devedor(self, nome_devedor: str) -> "ResultadoOperacao":
+        """Remove um devedor e todas as suas parcelas."""
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            if repositorio.remover(nome_devedor) is None:
+                return ResultadoOperacao(False, f"Devedor '{nome_devedor}' não encontrado.", "deletar_devedor")
+            return ResultadoOperacao(True, f"Devedor '{nome_devedor}' deletado com sucesso.", "deletar_devedor")
+
+        return self._executar(aplicar)
+
+    def deletar_parcela_por_id(self, id_parcela: str) -> "ResultadoOperacao":
+        """Deleta a parcela com o ID informado."""
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            if repositorio.remover_parcela(id_parcela) is None:
+                return ResultadoOperacao(False, f"Parcela '{id_parcela}' não encontrada.", "deletar_parcela_por_id")
+            return ResultadoOperacao(True, "Parcela deletada com sucesso.", "deletar_parcela_por_id")
+
+        return self._executar(aplicar)
+
+    def atualizar_parcelas(self, alteracoes: Dict[str, Dict]) -> "ResultadoOperacao":
+        """
+        Aplica um conjunto de alterações a parcelas identificadas pelo ID.
+
+        Args:
+            alteracoes (Dict[str, Dict]): Mapeia o ID da parcela para os campos
+                alterados ("valor", "vencimento" e/ou "paga"). O vencimento pode
+                ser uma string YYYY-MM-DD, date ou datetime.
+
+        O custo é proporcional ao número de alterações, não ao tamanho da base.
+        Parcelas que não existem mais são ignoradas e informadas na mensagem.
+        """
+        # Os valores são convertidos antes de qualquer alteração, para que uma
+        # entrada inválida não deixe o repositório alterado pela metade.
+        convertidas = {}
+        for id_parcela, campos in alteracoes.items():
+            try:
+                convertidas[id_parcela] = {
+                    "valor": float(campos["valor"]) if "valor" in campos else None,
+                    "vencimento": _formatar_vencimento(campos["vencimento"]) if "vencimento" in campos else None,
+                    "paga": bool(campos["paga"]) if "paga" in campos else None,
+                }
+            except (TypeError, ValueError):
+                return ResultadoOperacao(False, f"Valores inválidos para a parcela '{id_parcela}'.", "atualizar_parcelas")
+
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            nao_encontradas = []
+            for id_parcela, campos in convertidas.items():
+                if repositorio.atualizar_parcela(id_parcela, **campos) is None:
+                    nao_encontradas.append(id_parcela)
+
+            atualizadas = len(alteracoes) - len(nao_encontradas)
+            if atualizadas == 0:
+                return ResultadoOperacao(False, "Nenhuma das parcelas alteradas foi encontrada.", "atualizar_parcelas")
+            mensagem = f"{atualizadas} parcela(s) atualizada(s)."
+            if nao_encontradas:
+                mensagem += f" {len(nao_encontradas)} parcela(s) não encontrada(s) foram ignoradas."
+            return ResultadoOperacao(True, mensagem, "atualizar_parcelas")
+
+        return self._executar(aplicar)
+
+    def deletar_parcela(self, nome_devedor: str, vencimento_parcela: str) -> "ResultadoOperacao":
+        """Encontra um devedor e deleta suas parcelas com a data de vencimento informada."""
+        def aplicar(repositorio: RepositorioDevedores) -> ResultadoOperacao:
+            devedor = repositorio.encontrar(nome_devedor)
+            if devedor is None:
+                return ResultadoOperacao(False, f"Devedor '{nome_devedor}' não encontrado.", "deletar_parcela")
+            parcelas = devedor.parcelas_com_vencimento(vencimento_parcela)
+            if not parcelas:
+                return ResultadoOperacao(False, f"Nenhuma parcela com vencimento em '{vencimento_parcela}' foi encontrada.", "deletar_parcela")
+            for parcela in parcelas:
+                repositorio.remover_parcela(parcela.id)
+            return ResultadoOperacao(True, f"Parcela de '{vencimento_parcela}' deletada com sucesso.", "deletar_parcela")
+
+        return self._executar(aplicar)
+
+
+def _formatar_vencimento(vencimento: Union[str, date, datetime]) -> str:
+    """Normaliza um vencimento (string, date ou datetime) para YYYY-MM-DD."""
+    if isinstance(vencimento, (date, datetime)):
+        return vencimento.strftime("%Y-%m-%d")
+    return datetime.strptime(str(vencimento)[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+@dataclass
+class ResultadoOperacao:
+    """
+    Resultado de uma mutação do ClientControl.
+
+    Avalia como verdadeiro quando a operação foi bem-sucedida, de modo que
+    `if controle.adicionar_parcela(...):` continua funcionando.
+    """
+    sucesso: bool
+    mensagem: str
+    operacao: str = ""
+
+    def __bool__(self) -> bool:
+        return self.sucesso
+
+
+@dataclass
+class LoteDeOperacoes:
+    """Estado de um lote aberto por ClientControl.lote()."""
+    repositorio: RepositorioDevedores
+    resultados: List[ResultadoOperacao] = field(default_factory=list)
+    gravado: Union[bool, None] = None
+    erro: Union[str, None] = None
+
+    @property
+    def alterado(self) -> bool:
+        """Indica se alguma operação do lote modificou os dados."""
+        return any(resultado.sucesso for resultado in self.resultados)
+
+    def registrar(self, resultado: ResultadoOperacao):
+        self.resultados.append(resultado)
 
 
 def toggle_menu():
@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Union
+import requests
+from requests.adapters import HTTPAdapter
+from metricas import METRICAS, registrar
+
+URL_API_GITHUB = "https://api.github.com"
+
+# Sessão HTTP compartilhada por todos os clientes do processo (e portanto por todas as
+# sessões do Streamlit), para reaproveitar conexões TLS abertas com o GitHub.
+_sessao_compartilhada: Union[requests.Session, None] = None
+_lock_sessao = threading.Lock()
+
+
+def sessao_compartilhada(tamanho_pool: int = 10) -> requests.Session:
+    """Retorna a requests.Session do processo, criando-a com um pool de conexões na primeira chamada."""
+    global _sessao_compartilhada
+    with _lock_sessao:
+        if _sessao_compartilhada is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool)
+            sessao.mount("https://", adaptador)
+            sessao.mount("http://", adaptador)
+            _sessao_compartilhada = sessao
+        return _sessao_compartilhada
+
+
+class EstatisticasHTTP:
+    """Contadores das chamadas feitas por um ClienteGitHub."""
+
+    def __init__(self, max_latencias: int = 500):
+        self.chamadas = 0
+        self.repeticoes = 0
+        self.erros = 0
+        self.latencias: deque = deque(maxlen=max_latencias)
+        self.ultima_latencia: Union[float, None] = None
+        self.limite_restante: Union[int, None] = None
+        self.limite_reinicia_em: Union[float, None] = None
+
+    def registrar(self, latencia: float):
+        self.chamadas += 1
+        self.ultima_latencia = latencia
+        self.latencias.append(latencia)
+
+    @property
+    def latencia_media(self) -> Union[float, None]:
+        return sum(self.latencias) / len(self.latencias) if self.latencias else None
+
+    def como_dict(self) -> Dict:
+        return {
+            "chamadas": self.chamadas,
+            "repeticoes": self.repeticoes,
+            "erros": self.erros,
+            "ultima_latencia": self.ultima_latencia,
+            "latencia_media": self.latencia_media,
+            "limite_restante": self.limite_restante,
+            "limite_reinicia_em": self.limite_reinicia_em,
+        }
+
+
+class ClienteGitHub:
+    """
+    Cliente HTTP para a API do GitHub com timeouts, novas tentativas e respeito ao limite de requisições.
+
+    - Usa a sessão compartilhada (pool de conexões) do processo.
+    - Toda chamada tem timeout de conexão e de leitura.
+    - Respostas 5xx, erros de conexão e limites secundários (403/429 com
+      Retry-After) são repetidos com backoff exponencial.
+    - Os cabeçalhos X-RateLimit-Remaining/Reset são acompanhados; com a cota
+      esgotada, o cliente espera o reinício se ele estiver a até
+      `espera_maxima` segundos, e caso contrário devolve a resposta 403.
+
+    `url_base` permite apontar o cliente para um servidor local de testes.
+    """
+
+    def __init__(self, token: str, url_base: str = URL_API_GITHUB, timeout: tuple = (3.05, 20.0),
+                 max_tentativas: int = 4, fator_backoff: float = 0.5, espera_maxima: float = 60.0,
+                 dormir: Callable[[float], None] = time.sleep):
+        self.url_base = url_base.rstrip("/")
+        # Login verificado em GET /user. Vale enquanto este cliente (a sessão) existir:
+        # um token revogado deixa de passar no próximo login.
+        self._identidade: Union[str, None] = None
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json"
+        }
+        self.timeout = timeout
+        self.max_tentativas = max_tentativas
+        self.fator_backoff = fator_backoff
+        self.espera_maxima = espera_maxima
+        self.estatisticas = EstatisticasHTTP()
+        self._sessao = sessao_compartilhada()
+        self._dormir = dormir
+
+    def _url(self, caminho: str) -> str:
+        return caminho if caminho.startswith(("http://", "https://")) else f"{self.url_base}{caminho}"
+
+    def _atualizar_limite(self, response: requests.Response):
+        restante = response.headers.get("X-RateLimit-Remaining")
+        reinicia_em = response.headers.get("X-RateLimit-Reset")
+        if restante is not None:
+            self.estatisticas.limite_restante = int(restante)
+        if reinicia_em is not None:
+            self.estatisticas.limite_reinicia_em = float(reinicia_em)
+
+    def _espera_para_repetir(self, response: requests.Response, tentativa: int) -> Union[float, None]:
+        """Segundos a esperar antes de repetir a requisição, ou None se ela não deve ser repetida."""
+        backoff = self.fator_backoff * (2 ** tentativa)
+        if response.status_code >= 500:
+            return backoff
+        if response.status_code in (403, 429):
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                return float(retry_after)
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                reinicia_em = float(response.headers.get("X-RateLimit-Reset", 0))
+                return max(reinicia_em - time.time(), 0.0) + 1.0
+        return None
+
+    def requisitar(self, metodo: str, caminho: str, headers: Union[Dict, None] = None, **kwargs) -> requests.Response:
+        """
+        Executa a requisição com as regras de repetição da classe.
+
+        Cada tentativa entra na métrica "http" (por método e status), com o
+        tamanho do corpo enviado (PATCH) ou recebido (GET).
+
+        Args:
+            metodo (str): "GET", "PATCH" etc.
+            caminho (str): Caminho relativo a `url_base` ou URL absoluta.
+            headers (Dict): Cabeçalhos adicionais (por exemplo, If-None-Match).
+
+        Raises:
+            requests.exceptions.RequestException: Se a conexão falhar em todas as tentativas.
+        """
+        cabecalhos = {**self.headers, **(headers or {})}
+        for tentativa in range(self.max_tentativas):
+            ultima = tentativa == self.max_tentativas - 1
+            inicio = time.perf_counter()
+            try:
+                response = self._sessao.request(metodo, self._url(caminho), headers=cabecalhos,
+                                                timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                latencia = time.perf_counter() - inicio
+                self.estatisticas.registrar(latencia)
+                self.estatisticas.erros += 1
+                METRICAS.observar("http", latencia, metodo=metodo, status="erro")
+                registrar("http_falha", f"Falha de conexão em {metodo}: {err}", logging.WARNING,
+                          metodo=metodo, tentativa=tentativa + 1, latencia_ms=round(latencia * 1000, 1))
+                if ultima:
+                    raise
+                self.estatisticas.repeticoes += 1
+                self._dormir(self.fator_backoff * (2 ** tentativa))
+                continue
+
+            latencia = time.perf_counter() - inicio
+            self.estatisticas.registrar(latencia)
+            corpo = response.request.body if metodo != "GET" else response.content
+            METRICAS.observar("http", latencia, len(corpo or b""), metodo=metodo, status=response.status_code)
+            self._atualizar_limite(response)
+            espera = self._espera_para_repetir(response, tentativa)
+            if espera is None or ultima or espera > self.espera_maxima:
+                return response
+            registrar("http_repeticao", f"{metodo} respondeu {response.status_code}; repetindo em {espera:.1f} s",
+                      logging.WARNING, metodo=metodo, status=response.status_code, tentativa=tentativa + 1,
+                      espera_s=espera)
+            response.close() # Devolve a conexão ao pool antes de esperar
+            self.estatisticas.repeticoes += 1
+            self._dormir(espera)
+        return response
+
+    def identidade_em_cache(self) -> Union[str, None]:
+        """Login já verificado por este cliente, sem fazer requisição."""
+        return self._identidade
+
+    def verificar_identidade(self) -> str:
+        """
+        Retorna o login do dono do token, consultando GET /user só na primeira vez.
+
+        Raises:
+            requests.exceptions.HTTPError: Se a API recusar o token.
+            requests.exceptions.RequestException: Se a conexão falhar.
+        """
+        login = self.identidade_em_cache()
+        if login is not None:
+            return login
+        response = self.get("/user")
+        response.raise_for_status()
+        self._identidade = response.json()["login"]
+        return self._identidade
+
+    def get(self, caminho: str, **kwargs) -> requests.Response:
+        return self.requisitar("GET", caminho, **kwargs)
+
+    def patch(self, caminho: str, **kwargs) -> requests.Response:
+        return self.requisitar("PATCH", caminho, **kwargs)
@@ -0,0 +1,182 @@
+"""
+Consultas paginadas de parcelas.
+
+FiltroParcelas descreve o que se quer ver e consultar_pagina devolve apenas
+a página pedida (PaginaParcelas). O IndiceParcelas abaixo atende backends
+em memória: é montado uma vez por versão dos dados e guarda as parcelas em
+colunas, com posições agrupadas por devedor e ordenadas por vencimento,
+valor e nome. Assim uma consulta parte do menor conjunto de candidatos
+(um devedor ou um intervalo de datas), e só as linhas da página viram
+dicionários. O ArmazenamentoSQLite responde às mesmas consultas em SQL.
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Sequence, Union
+from repositorio import normalizar_nome
+
+SITUACAO_TODAS = "todas"
+SITUACAO_PAGAS = "pagas"
+SITUACAO_ABERTAS = "abertas"
+
+ORDEM_VENCIMENTO = "vencimento"
+ORDEM_VALOR = "valor"
+ORDEM_NOME = "nome"
+ORDENS = (ORDEM_VENCIMENTO, ORDEM_VALOR, ORDEM_NOME)
+
+
+@dataclass
+class FiltroParcelas:
+    """
+    Critérios de uma consulta de parcelas. Os critérios informados são combinados com "e".
+
+    Vencimentos são strings YYYY-MM-DD e os limites são inclusivos.
+    `somente_vencidas` restringe a parcelas em aberto com vencimento anterior
+    a `hoje` (por padrão, a data atual).
+    """
+    nome_devedor: Union[str, None] = None
+    situacao: str = SITUACAO_TODAS
+    vencimento_de: Union[str, None] = None
+    vencimento_ate: Union[str, None] = None
+    somente_vencidas: bool = False
+    hoje: Union[str, None] = None
+
+    def efetivo(self) -> "FiltroParcelas":
+        """Filtro equivalente com `somente_vencidas` convertido em situação e limite de data."""
+        if not self.somente_vencidas:
+            return self
+        if self.situacao == SITUACAO_PAGAS:
+            # Nenhuma parcela paga está vencida: um intervalo vazio.
+            return FiltroParcelas(self.nome_devedor, SITUACAO_PAGAS, "9999-12-31", "0000-01-01")
+        hoje = self.hoje or date.today().isoformat()
+        # O vencimento é exclusivo em "hoje"; o dia anterior em texto basta para a comparação de strings.
+        ate = date.fromordinal(date.fromisoformat(hoje).toordinal() - 1).isoformat()
+        if self.vencimento_ate is not None:
+            ate = min(ate, self.vencimento_ate)
+        return FiltroParcelas(self.nome_devedor, SITUACAO_ABERTAS, self.vencimento_de, ate)
+
+
+@dataclass
+class PaginaParcelas:
+    """Uma página do resultado e o total de parcelas que atendem ao filtro."""
+    linhas: List[Dict]
+    total: int
+    pagina: int
+    tamanho: int
+    filtro: FiltroParcelas = field(default_factory=FiltroParcelas)
+
+    @property
+    def n_paginas(self) -> int:
+        return max(1, -(-self.total // self.tamanho))
+
+
+def alteracoes_do_editor(linhas_editadas: Dict, ids_exibidos: Sequence[str]) -> Dict[str, Dict]:
+    """
+    Converte o delta do st.data_editor ({posição da linha: {coluna: novo valor}}) em alterações por ID de parcela.
+
+    O resultado vai direto para ClientControl.atualizar_parcelas.
+    """
+    return {ids_exibidos[int(posicao)]: campos for posicao, campos in linhas_editadas.items()}
+
+
+def _limitar_pagina(pagina: int, total: int, tamanho: int) -> int:
+    return min(max(1, pagina), max(1, -(-total // tamanho)))
+
+
+class IndiceParcelas:
+    """Índices em memória sobre uma versão da base (ver o docstring do módulo)."""
+
+    def __init__(self, dados: List[Dict]):
+        self.ids: List[str] = []
+        self.nomes: List[str] = []
+        self.valores: List[float] = []
+        self.vencimentos: List[str] = []
+        self.pagas: List[bool] = []
+        self.por_devedor: Dict[str, List[int]] = {}
+        for devedor in dados:
+            posicoes = self.por_devedor.setdefault(normalizar_nome(devedor["nome"]), [])
+            for parcela in devedor.get("parcelas", []):
+                posicoes.append(len(self.ids))
+                self.ids.append(parcela.get("id"))
+                self.nomes.append(devedor["nome"])
+                self.valores.append(float(parcela.get("valor") or 0))
+                self.vencimentos.append(parcela.get("vencimento") or "")
+                self.pagas.append(bool(parcela.get("paga")))
+
+        todas = range(len(self.ids))
+        self.ordem_vencimento = sorted(todas, key=self.vencimentos.__getitem__)
+        self._vencimentos_ordenados = [self.vencimentos[i] for i in self.ordem_vencimento]
+        # As demais ordens só são montadas na primeira consulta que as usar.
+        self._ordens: Dict[str, List[int]] = {ORDEM_VENCIMENTO: self.ordem_vencimento}
+        self._postos: Dict[str, List[int]] = {}
+
+    def _ordem(self, ordem: str) -> List[int]:
+        if ordem not in self._ordens:
+            chave = {ORDEM_VALOR: self.valores.__getitem__,
+                     ORDEM_NOME: lambda i: (self.nomes[i].lower(), self.vencimentos[i])}[ordem]
+            self._ordens[ordem] = sorted(range(len(self.ids)), key=chave)
+        return self._ordens[ordem]
+
+    def _posto(self, ordem: str) -> List[int]:
+        """Posição de cada parcela na ordem pedida, para ordenar subconjuntos sem comparar valores."""
+        if ordem not in self._postos:
+            posto = [0] * len(self.ids)
+            for colocacao, i in enumerate(self._ordem(ordem)):
+                posto[i] = colocacao
+            self._postos[ordem] = posto
+        return self._postos[ordem]
+
+    def linha(self, i: int) -> Dict:
+        return {"id": self.ids[i], "nome": self.nomes[i], "valor": self.valores[i],
+                "vencimento": self.vencimentos[i], "paga": self.pagas[i]}
+
+    def do_devedor(self, nome_devedor: Union[str, None]) -> List[Dict]:
+        """Parcelas de um devedor (ou todas), na ordem da base."""
+        if nome_devedor is None:
+            return [self.linha(i) for i in range(len(self.ids))]
+        return [self.linha(i) for i in self.por_devedor.get(normalizar_nome(nome_devedor), [])]
+
+    def _predicado(self, filtro: FiltroParcelas, verificar_datas: bool) -> Callable[[int], bool]:
+        pagas, vencimentos = self.pagas, self.vencimentos
+        testes = []
+        if filtro.situacao == SITUACAO_PAGAS:
+            testes.append(pagas.__getitem__)
+        elif filtro.situacao == SITUACAO_ABERTAS:
+            testes.append(lambda i: not pagas[i])
+        if verificar_datas and filtro.vencimento_de is not None:
+            testes.append(lambda i: vencimentos[i] >= filtro.vencimento_de)
+        if verificar_datas and filtro.vencimento_ate is not None:
+            testes.append(lambda i: vencimentos[i] <= filtro.vencimento_ate)
+        return lambda i: all(teste(i) for teste in testes)
+
+    def consultar(self, filtro: Union[FiltroParcelas, None] = None, ordem: str = ORDEM_VENCIMENTO,
+                  decrescente: bool = False, pagina: int = 1, tamanho: int = 50) -> PaginaParcelas:
+        filtro = filtro or FiltroParcelas()
+        efetivo = filtro.efetivo()
+        tem_datas = efetivo.vencimento_de is not None or efetivo.vencimento_ate is not None
+
+        if efetivo.nome_devedor is not None:
+            candidatos = self.por_devedor.get(normalizar_nome(efetivo.nome_devedor), [])
+            predicado = self._predicado(efetivo, verificar_datas=True)
+            selecionadas = sorted((i for i in candidatos if predicado(i)), key=self._posto(ordem).__getitem__)
+        elif tem_datas:
+            inicio = 0 if efetivo.vencimento_de is None else bisect_left(self._vencimentos_ordenados, efetivo.vencimento_de)
+            fim = (len(self._vencimentos_ordenados) if efetivo.vencimento_ate is None
+                   else bisect_right(self._vencimentos_ordenados, efetivo.vencimento_ate))
+            predicado = self._predicado(efetivo, verificar_datas=False)
+            selecionadas = [i for i in self.ordem_vencimento[inicio:fim] if predicado(i)]
+            if ordem != ORDEM_VENCIMENTO:
+                selecionadas.sort(key=self._posto(ordem).__getitem__)
+        elif efetivo.situacao == SITUACAO_TODAS:
+            # Sem filtro: a própria ordem pré-calculada, sem percorrer as parcelas.
+            selecionadas = self._ordem(ordem)
+        else:
+            predicado = self._predicado(efetivo, verificar_datas=False)
+            selecionadas = [i for i in self._ordem(ordem) if predicado(i)]
+
+        total = len(selecionadas)
+        pagina = _limitar_pagina(pagina, total, tamanho)
+        inicio = (pagina - 1) * tamanho
+        posicoes = range(inicio, min(inicio + tamanho, total))
+        linhas = [self.linha(selecionadas[total - 1 - k] if decrescente else selecionadas[k]) for k in posicoes]
+        return PaginaParcelas(linhas, total, pagina, tamanho, filtro)
@@ -0,0 +1,86 @@
+"""
+Gerador de bases sintéticas no formato de dados.json, para benchmarks.
+
+Uso:
+    python dados_sinteticos.py --devedores 1000 --parcelas 12 --saida dados.json
+    python dados_sinteticos.py --devedores 5000 --parcelas 24 --proporcao-pagas 0.6 --formato compacto --saida grande.json
+"""
+import argparse
+import calendar
+import random
+from datetime import date
+from typing import Dict, List, Union
+from repositorio import vencimentos_mensais
+from serializacao import FORMATO_LEGADO, FORMATOS, serializar
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Isabela", "João",
+         "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Paulo", "Renata", "Sérgio", "Tatiana", "Vitor"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho", "Ferreira",
+              "Rodrigues", "Almeida", "Costa", "Gomes", "Martins", "Araújo", "Barbosa", "Ribeiro"]
+VALORES = [50.0, 75.0, 99.9, 100.0, 120.0, 150.0, 199.9, 250.0, 300.0, 500.0]
+
+
+def _primeiro_vencimento(inicio: date, meses: int, dia: int) -> date:
+    """Dia `dia` (ou o último do mês, se ele for mais curto) do mês `meses` meses depois de `inicio`."""
+    mes = date.fromisoformat(vencimentos_mensais(inicio.replace(day=1), meses + 1)[-1])
+    return mes.replace(day=min(dia, calendar.monthrange(mes.year, mes.month)[1]))
+
+
+def gerar_dados(n_devedores: int, n_parcelas: int, proporcao_pagas: float = 0.4,
+                inicio: Union[date, str] = "2024-01-01", espalhamento_meses: int = 24,
+                semente: Union[int, None] = 0, com_ids: bool = True) -> List[Dict]:
+    """
+    Gera `n_devedores` devedores com `n_parcelas` parcelas mensais cada.
+
+    Cada devedor começa em um dia e um mês sorteados entre `inicio` e
+    `inicio` + `espalhamento_meses`, com um valor fixo por parcela, e os
+    vencimentos seguem vencimentos_mensais, como no cadastro pelo app
+    (inclusive nos dias 29 a 31). As parcelas mais antigas tendem a estar
+    pagas: cada devedor paga as primeiras k parcelas, com k sorteado em
+    torno de `proporcao_pagas` * `n_parcelas`.
+
+    Args:
+        semente (int | None): Semente do sorteio, para bases reproduzíveis.
+        com_ids (bool): Se False, as parcelas saem sem "id", como no formato legado.
+    """
+    sorteio = random.Random(semente)
+    inicio = date.fromisoformat(inicio) if isinstance(inicio, str) else inicio
+    dados = []
+    for i in range(n_devedores):
+        nome = f"{sorteio.choice(NOMES)} {sorteio.choice(SOBRENOMES)} {i:05d}"
+        dia = sorteio.randint(1, 31)
+        primeiro = _primeiro_vencimento(inicio, sorteio.randint(0, espalhamento_meses), dia)
+        valor = sorteio.choice(VALORES)
+        pagas = min(n_parcelas, max(0, round(sorteio.gauss(proporcao_pagas, 0.15) * n_parcelas)))
+        parcelas = []
+        for j, vencimento in enumerate(vencimentos_mensais(primeiro, n_parcelas)):
+            parcela = {"valor": valor, "vencimento": vencimento, "paga": j < pagas}
+            if com_ids:
+                parcela = {"id": f"{sorteio.getrandbits(48):012x}", **parcela}
+            parcelas.append(parcela)
+        dados.append({"nome": nome, "parcelas": parcelas})
+    return dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma base sintética de devedores.")
+    parser.add_argument("--devedores", type=int, default=1000)
+    parser.add_argument("--parcelas", type=int, default=12, help="Parcelas por devedor.")
+    parser.add_argument("--proporcao-pagas", type=float, default=0.4)
+    parser.add_argument("--inicio", default="2024-01-01", help="Data inicial (YYYY-MM-DD).")
+    parser.add_argument("--espalhamento-meses", type=int, default=24)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--sem-ids", action="store_true", help="Gera parcelas sem \"id\" (formato legado).")
+    parser.add_argument("--formato", choices=FORMATOS, default=FORMATO_LEGADO)
+    parser.add_argument("--saida", required=True)
+    args = parser.parse_args()
+
+    dados = gerar_dados(args.devedores, args.parcelas, args.proporcao_pagas, args.inicio,
+                        args.espalhamento_meses, args.semente, not args.sem_ids)
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        arquivo.write(serializar(dados, args.formato))
+    print(f"✅ {args.devedores} devedores e {args.devedores * args.parcelas} parcelas gravados em '{args.saida}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Diário de operações: registro, em ordem, das mudanças feitas sobre um instantâneo da base.
+
+Cada entrada é um objeto JSON em uma linha (JSON Lines) com:
+    id     identificador da entrada
+    em     data e hora UTC da gravação (ISO 8601)
+    autor  login de quem gravou, quando conhecido
+    op     uma das OPERACOES, com os campos próprios dela
+
+Ler a base é ler o instantâneo e reaplicar o diário (ver reaplicar); gravar
+é acrescentar as entradas que levam da versão lida à nova (ver diferencas).
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Set, Union
+from repositorio import Devedor, Parcela, RepositorioDevedores, normalizar_nome
+
+ADICIONAR_DEVEDOR = "adicionar_devedor"
+REMOVER_DEVEDOR = "remover_devedor"
+SUBSTITUIR_DEVEDOR = "substituir_devedor"
+ADICIONAR_PARCELA = "adicionar_parcela"
+ATUALIZAR_PARCELA = "atualizar_parcela"
+REMOVER_PARCELA = "remover_parcela"
+OPERACOES = (ADICIONAR_DEVEDOR, REMOVER_DEVEDOR, SUBSTITUIR_DEVEDOR,
+             ADICIONAR_PARCELA, ATUALIZAR_PARCELA, REMOVER_PARCELA)
+
+CAMPOS_PARCELA = ("valor", "vencimento", "paga")
+
+
+def ler_diario(texto: str) -> List[Dict]:
+    """Entradas de um diário em JSON Lines (linhas em branco são ignoradas)."""
+    return [json.loads(linha) for linha in texto.splitlines() if linha.strip()]
+
+
+def escrever_entradas(entradas: Iterable[Dict]) -> str:
+    """Texto a acrescentar ao diário, uma entrada por linha."""
+    return "".join(json.dumps(entrada, separators=(",", ":"), ensure_ascii=False) + "\n" for entrada in entradas)
+
+
+def _entrada(op: str, autor: Union[str, None], em: str, **campos) -> Dict:
+    entrada = {"id": uuid.uuid4().hex[:12], "em": em, "op": op, **campos}
+    if autor:
+        entrada["autor"] = autor
+    return entrada
+
+
+def _diferencas_devedor(base: Dict, novo: Dict, autor: Union[str, None], em: str) -> List[Dict]:
+    """Entradas que levam um devedor de `base` a `novo` (mesma chave)."""
+    parcelas_base = {p["id"]: p for p in base.get("parcelas", [])}
+    parcelas_novas = {p["id"]: p for p in novo.get("parcelas", [])}
+    mantidas = [i for i in parcelas_base if i in parcelas_novas]
+    acrescentadas = [i for i in parcelas_novas if i not in parcelas_base]
+
+    # A reaplicação acrescenta parcelas no fim; se o nome ou a ordem mudaram
+    # de outra forma, o devedor inteiro é regravado.
+    if base["nome"] != novo["nome"] or list(parcelas_novas) != mantidas + acrescentadas:
+        return [_entrada(SUBSTITUIR_DEVEDOR, autor, em, nome=novo["nome"], parcelas=novo.get("parcelas", []))]
+
+    entradas = [_entrada(REMOVER_PARCELA, autor, em, id_parcela=i) for i in parcelas_base if i not in parcelas_novas]
+    for id_parcela in mantidas:
+        antes, depois = parcelas_base[id_parcela], parcelas_novas[id_parcela]
+        campos = {campo: depois.get(campo) for campo in CAMPOS_PARCELA if antes.get(campo) != depois.get(campo)}
+        if campos:
+            entradas.append(_entrada(ATUALIZAR_PARCELA, autor, em, id_parcela=id_parcela, campos=campos))
+    entradas.extend(_entrada(ADICIONAR_PARCELA, autor, em, devedor=novo["nome"], parcela=parcelas_novas[i])
+                    for i in acrescentadas)
+    return entradas
+
+
+def diferencas(base: List[Dict], novos: List[Dict], alterados: Union[Set[str], None] = None,
+               autor: Union[str, None] = None) -> List[Dict]:
+    """
+    Entradas de diário que transformam `base` em `novos`.
+
+    Args:
+        alterados (Set[str] | None): Chaves normalizadas dos devedores que
+            mudaram; os demais não são comparados. None compara todos.
+        autor (str | None): Login registrado nas entradas.
+    """
+    em = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    base_por_chave = {normalizar_nome(d["nome"]): d for d in base}
+    novos_por_chave = {normalizar_nome(d["nome"]): d for d in novos}
+    chaves = alterados if alterados is not None else set(base_por_chave) | set(novos_por_chave)
+
+    entradas = []
+    # Percorre na ordem da base e depois na dos novos, para o diário seguir a ordem dos dados.
+    for chave in [c for c in base_por_chave if c in chaves] + [c for c in novos_por_chave if c in chaves and c not in base_por_chave]:
+        antes, depois = base_por_chave.get(chave), novos_por_chave.get(chave)
+        if antes == depois:
+            continue
+        if depois is None:
+            entradas.append(_entrada(REMOVER_DEVEDOR, autor, em, nome=antes["nome"]))
+        elif antes is None:
+            entradas.append(_entrada(ADICIONAR_DEVEDOR, autor, em, nome=depois["nome"], parcelas=depois.get("parcelas", [])))
+        else:
+            entradas.extend(_diferencas_devedor(antes, depois, autor, em))
+    return entradas
+
+
+def _novo_devedor(repositorio: RepositorioDevedores, nome: str, parcelas: List[Dict]):
+    repositorio.remover(nome)
+    devedor = Devedor(nome)
+    repositorio.adicionar(devedor)
+    for parcela in parcelas:
+        repositorio.adicionar_parcela(devedor, Parcela.de_dict(parcela))
+
+
+def aplicar_entrada(repositorio: RepositorioDevedores, entrada: Dict):
+    """
+    Reaplica uma entrada sobre o repositório.
+
+    Entradas que não se aplicam mais (devedor ou parcela inexistente) são
+    ignoradas, e operações desconhecidas também, para que um diário gravado
+    por uma versão mais nova do app ainda possa ser lido.
+    """
+    op = entrada.get("op")
+    if op in (ADICIONAR_DEVEDOR, SUBSTITUIR_DEVEDOR):
+        _novo_devedor(repositorio, entrada["nome"], entrada.get("parcelas", []))
+    elif op == REMOVER_DEVEDOR:
+        repositorio.remover(entrada["nome"])
+    elif op == ADICIONAR_PARCELA:
+        devedor = repositorio.encontrar(entrada["devedor"])
+        if devedor is not None and repositorio.localizar_parcela(entrada["parcela"].get("id")) is None:
+            repositorio.adicionar_parcela(devedor, Parcela.de_dict(entrada["parcela"]))
+    elif op == ATUALIZAR_PARCELA:
+        campos = entrada.get("campos", {})
+        repositorio.atualizar_parcela(entrada["id_parcela"], **{c: campos[c] for c in CAMPOS_PARCELA if c in campos})
+    elif op == REMOVER_PARCELA:
+        repositorio.remover_parcela(entrada["id_parcela"])
+
+
+def reaplicar(repositorio: RepositorioDevedores, entradas: Iterable[Dict]) -> RepositorioDevedores:
+    """Aplica as entradas, em ordem, sobre o repositório (alterando-o) e o retorna."""
+    for entrada in entradas:
+        aplicar_entrada(repositorio, entrada)
+    return repositorio
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List, Union
+from metricas import registrar
+
+
+class FilaPersistencia:
+    """
+    Gravação em segundo plano, com agrupamento de alterações próximas.
+
+    Os itens enfileirados são entregues em lote à função `processar`, chamada
+    em uma thread própria. Depois do primeiro item, a thread espera `atraso`
+    segundos sem novos itens (no máximo `atraso_maximo`) antes de processar,
+    para que edições em sequência virem uma única gravação.
+
+    `processar(itens)` deve devolver uma lista de mensagens de falha
+    definitivas (itens que não devem ser repetidos) e levantar uma exceção se
+    a gravação inteira falhar; nesse caso o lote volta para o início da fila e
+    é repetido até `max_tentativas` vezes antes de ser descartado.
+    `ao_descartar` é chamado quando itens são descartados ou falham.
+
+    A thread só existe enquanto há o que gravar: ela é criada pelo primeiro
+    enfileirar() e termina depois de `ocioso` segundos sem itens. Assim, uma
+    sessão abandonada não mantém a thread (nem, por meio de `processar`, o
+    ClientControl e os dados em cache) viva até o fim do processo.
+    """
+
+    def __init__(self, processar: Callable[[List[Any]], List[str]], atraso: float = 0.5,
+                 atraso_maximo: float = 3.0, max_tentativas: int = 3,
+                 ao_descartar: Union[Callable[[], None], None] = None, ocioso: float = 30.0):
+        self._processar = processar
+        self.atraso = atraso
+        self.atraso_maximo = atraso_maximo
+        self.max_tentativas = max_tentativas
+        self.ocioso = ocioso
+        self._ao_descartar = ao_descartar
+
+        self._condicao = threading.Condition()
+        self._fila: deque = deque()
+        self._em_andamento: List[Any] = []
+        self._ultimo_item_em = 0.0
+        self._tentativas = 0
+        self._ativa = True
+        self.falhas: List[str] = []
+        self.gravacoes = 0
+        self._thread: Union[threading.Thread, None] = None
+
+    @property
+    def pendentes(self) -> int:
+        """Itens ainda não gravados (na fila ou em gravação)."""
+        with self._condicao:
+            return len(self._fila) + len(self._em_andamento)
+
+    def itens_pendentes(self) -> List[Any]:
+        """Cópia dos itens em gravação seguidos dos que aguardam na fila, em ordem."""
+        with self._condicao:
+            return list(self._em_andamento) + list(self._fila)
+
+    def enfileirar(self, item: Any):
+        with self._condicao:
+            if not self._ativa:
+                raise RuntimeError("A fila de persistência foi encerrada.")
+            self._fila.append(item)
+            self._ultimo_item_em = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name="fila-persistencia", daemon=True)
+                self._thread.start()
+            self._condicao.notify_all()
+
+    def limpar_falhas(self):
+        with self._condicao:
+            self.falhas.clear()
+
+    def esvaziar(self, timeout: Union[float, None] = None) -> bool:
+        """Bloqueia até que não haja itens pendentes. Retorna False se o timeout expirar."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            while self._fila or self._em_andamento:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                # Acorda a thread para gravar já, sem esperar o atraso de agrupamento.
+                self._ultimo_item_em = 0.0
+                self._condicao.notify_all()
+                self._condicao.wait(restante)
+            return True
+
+    def encerrar(self, timeout: Union[float, None] = 10.0):
+        """Grava o que estiver pendente e encerra a thread."""
+        self.esvaziar(timeout)
+        with self._condicao:
+            self._ativa = False
+            thread = self._thread
+            self._condicao.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _aguardar_lote(self) -> Union[List[Any], None]:
+        with self._condicao:
+            limite_ocioso = time.monotonic() + self.ocioso
+            while not self._fila:
+                restante = limite_ocioso - time.monotonic()
+                if not self._ativa or restante <= 0:
+                    # Sem itens: a thread termina e o próximo enfileirar() cria outra.
+                    self._thread = None
+                    return None
+                self._condicao.wait(restante)
+            inicio = time.monotonic()
+            while True:
+                agora = time.monotonic()
+                espera = min(self._ultimo_item_em + self.atraso, inicio + self.atraso_maximo) - agora
+                if espera <= 0:
+                    break
+                self._condicao.wait(espera)
+            self._em_andamento = list(self._fila)
+            self._fila.clear()
+            return list(self._em_andamento)
+
+    def _executar(self):
+        while True:
+            itens = self._aguardar_lote()
+            if itens is None:
+                return
+            descartados = False
+            try:
+                falhas = self._processar(itens)
+                self._tentativas = 0
+                with self._condicao:
+                    self.gravacoes += 1
+                    self.falhas.extend(falhas)
+                descartados = bool(falhas)
+            except Exception as err:
+                self._tentativas += 1
+                registrar("fila_erro", f"Falha ao gravar {len(itens)} alteração(ões): {err}", logging.WARNING,
+                          itens=len(itens), tentativa=self._tentativas, max_tentativas=self.max_tentativas)
+                if self._tentativas < self.max_tentativas:
+                    with self._condicao:
+                        # Devolve o lote ao início da fila e tenta de novo após um intervalo.
+                        self._fila.extendleft(reversed(itens))
+                        self._em_andamento = []
+                        self._ultimo_item_em = time.monotonic() + self.atraso * (2 ** self._tentativas)
+                    continue
+                self._tentativas = 0
+                with self._condicao:
+                    self.falhas.append(f"{len(itens)} alteração(ões) descartada(s): {err}")
+                descartados = True
+            with self._condicao:
+                self._em_andamento = []
+                self._condicao.notify_all()
+            if descartados and self._ao_descartar is not None:
+                self._ao_descartar()
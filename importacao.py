@@ -0,0 +1,446 @@
+"""
+Importação e exportação em lote de devedores e parcelas, em CSV ou XLSX.
+
+Dois leiautes de planilha são aceitos, reconhecidos pelo cabeçalho:
+- parcelas: uma linha por parcela, com as colunas nome, valor, vencimento e,
+  opcionalmente, paga e id (o mesmo leiaute da exportação);
+- cronograma: uma linha por devedor, com nome, n_parcelas, valor_parcela,
+  primeiro_vencimento e, opcionalmente, parcelas_pagas (as primeiras). As
+  parcelas são mensais, no mesmo dia do mês (ver vencimentos_mensais).
+
+O arquivo é lido em blocos de `tamanho_bloco` linhas e cada bloco é validado
+de forma vetorizada (datas em YYYY-MM-DD ou DD/MM/AAAA, valores como 1234.56
+ou 1.234,56, situação como sim/não), então a memória usada na leitura não
+depende do tamanho do arquivo. O resultado é um PlanoImportacao, que
+ClientControl.importar grava em uma única mutação, e portanto uma única
+gravação no backend. Ler .xlsx requer o openpyxl.
+
+Uso:
+    python importacao.py importar carteira.csv --sqlite clientcontrol.db
+    python importacao.py importar carteira.xlsx --gist-id <ID> --duplicados acrescentar
+    python importacao.py exportar parcelas.csv --sqlite clientcontrol.db
+"""
+import argparse
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import IO, Dict, Iterator, List, Set, Tuple, Union
+import numpy as np
+import pandas as pd
+from repositorio import Devedor, Parcela, RepositorioDevedores, normalizar_nome, novo_id_parcela, vencimentos_mensais
+
+LEIAUTE_PARCELAS = "parcelas"
+LEIAUTE_CRONOGRAMA = "cronograma"
+COLUNAS_PARCELAS = ["nome", "valor", "vencimento", "paga", "id"]
+COLUNAS_CRONOGRAMA = ["nome", "n_parcelas", "valor_parcela", "primeiro_vencimento", "parcelas_pagas"]
+OBRIGATORIAS = {LEIAUTE_PARCELAS: COLUNAS_PARCELAS[:3], LEIAUTE_CRONOGRAMA: COLUNAS_CRONOGRAMA[:4]}
+
+# Devedores da planilha que já existem na base: ignorados por inteiro, ou
+# recebem as parcelas novas (as iguais a uma já cadastrada são ignoradas).
+DUPLICADOS_IGNORAR = "ignorar"
+DUPLICADOS_ACRESCENTAR = "acrescentar"
+POLITICAS_DUPLICADOS = (DUPLICADOS_IGNORAR, DUPLICADOS_ACRESCENTAR)
+
+MAX_PARCELAS_POR_DEVEDOR = 600
+MAX_ERROS_GUARDADOS = 200
+VERDADEIROS = {"sim", "s", "true", "verdadeiro", "1", "1.0", "x", "paga", "pago", "yes", "y"}
+FALSOS = {"", "nao", "não", "n", "false", "falso", "0", "0.0", "aberta", "aberto", "no"}
+
+
+@dataclass
+class ErroImportacao:
+    """Uma linha rejeitada; `linha` é a linha do arquivo (o cabeçalho é a linha 1)."""
+    linha: int
+    mensagem: str
+
+
+@dataclass
+class PlanoImportacao:
+    """
+    Devedores e parcelas válidos lidos de uma planilha, prontos para ClientControl.importar.
+
+    As parcelas já têm IDs, para que reaplicar o plano (por exemplo, na fila
+    de persistência) produza sempre as mesmas parcelas. Só os primeiros
+    MAX_ERROS_GUARDADOS erros são guardados; `linhas_invalidas` conta todos.
+    """
+    leiaute: str
+    devedores: Dict[str, Dict] = field(default_factory=dict)
+    linhas_lidas: int = 0
+    linhas_invalidas: int = 0
+    repetidas_no_arquivo: int = 0
+    erros: List[ErroImportacao] = field(default_factory=list)
+    _assinaturas: Dict[str, Set[Tuple]] = field(default_factory=dict, repr=False)
+    _ids: Set[str] = field(default_factory=set, repr=False)
+
+    @property
+    def n_parcelas(self) -> int:
+        return sum(len(devedor["parcelas"]) for devedor in self.devedores.values())
+
+    def _registrar_erros(self, linhas: np.ndarray, mensagem: str):
+        for linha in linhas[:max(0, MAX_ERROS_GUARDADOS - len(self.erros))]:
+            self.erros.append(ErroImportacao(int(linha), mensagem))
+
+    def _adicionar_parcela(self, nome: str, valor: float, vencimento: str, paga: bool, id_parcela: str):
+        """
+        Inclui uma parcela no plano, descartando repetições dentro do arquivo.
+
+        Linhas com ID são repetidas só se o ID já apareceu, já que um devedor
+        pode ter várias parcelas no mesmo dia e com o mesmo valor. Linhas sem
+        ID são comparadas pelo vencimento e valor com as outras sem ID.
+        """
+        chave = normalizar_nome(nome)
+        devedor = self.devedores.get(chave)
+        if devedor is None:
+            devedor = self.devedores[chave] = {"nome": nome, "parcelas": []}
+            self._assinaturas[chave] = set()
+        if id_parcela:
+            if id_parcela in self._ids:
+                self.repetidas_no_arquivo += 1
+                return
+            self._ids.add(id_parcela)
+        else:
+            assinatura = (vencimento, valor)
+            if assinatura in self._assinaturas[chave]:
+                self.repetidas_no_arquivo += 1
+                return
+            self._assinaturas[chave].add(assinatura)
+        devedor["parcelas"].append({"id": id_parcela or novo_id_parcela(), "id_no_arquivo": bool(id_parcela),
+                                    "valor": valor, "vencimento": vencimento, "paga": paga})
+
+    def aplicar(self, repositorio: RepositorioDevedores, duplicados: str = DUPLICADOS_IGNORAR) -> Dict[str, int]:
+        """
+        Inclui o plano no repositório, sem duplicar o que já existe. Retorna as contagens.
+
+        Uma parcela com ID no arquivo é considerada repetida se o ID já existir
+        na base; uma sem ID, se o devedor já tiver uma parcela com o mesmo
+        vencimento e valor.
+        """
+        contagem = {"devedores_novos": 0, "devedores_ignorados": 0, "parcelas_importadas": 0, "parcelas_repetidas": 0}
+        for chave, entrada in self.devedores.items():
+            devedor = repositorio.encontrar(chave)
+            if devedor is None:
+                devedor = Devedor(entrada["nome"])
+                repositorio.adicionar(devedor)
+                contagem["devedores_novos"] += 1
+                existentes = set()
+            elif duplicados == DUPLICADOS_IGNORAR:
+                contagem["devedores_ignorados"] += 1
+                continue
+            else:
+                existentes = {(p.vencimento, round(float(p.valor), 2)) for p in devedor.parcelas.values()}
+            for parcela in entrada["parcelas"]:
+                if parcela["id_no_arquivo"]:
+                    repetida = repositorio.localizar_parcela(parcela["id"]) is not None
+                else:
+                    repetida = (parcela["vencimento"], parcela["valor"]) in existentes
+                if repetida:
+                    contagem["parcelas_repetidas"] += 1
+                    continue
+                repositorio.adicionar_parcela(devedor, Parcela(parcela["valor"], parcela["vencimento"],
+                                                               parcela["paga"], parcela["id"]))
+                contagem["parcelas_importadas"] += 1
+        return contagem
+
+
+def mensagem_importacao(contagem: Dict[str, int]) -> str:
+    """Resumo legível das contagens de PlanoImportacao.aplicar."""
+    partes = [f"{contagem['devedores_novos']} devedor(es) novo(s) e "
+              f"{contagem['parcelas_importadas']} parcela(s) importada(s)."]
+    if contagem["devedores_ignorados"]:
+        partes.append(f"{contagem['devedores_ignorados']} devedor(es) já cadastrado(s) ignorado(s).")
+    if contagem["parcelas_repetidas"]:
+        partes.append(f"{contagem['parcelas_repetidas']} parcela(s) já existente(s) ignorada(s).")
+    return " ".join(partes)
+
+
+# --- Leitura em blocos ---------------------------------------------------
+
+def _formato(nome_arquivo: str) -> str:
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    if extensao in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if extensao in (".csv", ".txt", ""):
+        return "csv"
+    raise ValueError(f"❌ ERRO: Formato de arquivo não suportado: '{extensao}'. Use .csv ou .xlsx.")
+
+
+def _separador(arquivo: Union[str, IO]) -> str:
+    """";" ou ",", conforme o que aparecer mais no cabeçalho (planilhas em português costumam usar ";")."""
+    if isinstance(arquivo, str):
+        with open(arquivo, encoding="utf-8-sig") as texto:
+            cabecalho = texto.readline()
+    else:
+        posicao = arquivo.tell()
+        cabecalho = arquivo.readline()
+        arquivo.seek(posicao)
+        if isinstance(cabecalho, bytes):
+            cabecalho = cabecalho.decode("utf-8-sig", errors="replace")
+    return ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+
+
+def _blocos_csv(arquivo: Union[str, IO], tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(arquivo, sep=_separador(arquivo), dtype=str, keep_default_na=False,
+                           encoding="utf-8-sig", chunksize=tamanho_bloco, skipinitialspace=True)
+
+
+def _texto_celula(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _blocos_xlsx(arquivo: Union[str, IO], tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("❌ ERRO: Para ler arquivos .xlsx, instale o openpyxl (pip install openpyxl).")
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = livro.active.iter_rows(values_only=True)
+        cabecalho = [_texto_celula(celula) for celula in next(linhas, ())]
+        largura = len(cabecalho)
+        while True:
+            bloco = [[_texto_celula(celula) for celula in linha[:largura]] + [""] * (largura - len(linha))
+                     for linha in islice(linhas, tamanho_bloco)]
+            if not bloco:
+                return
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        livro.close()
+
+
+def _valores(serie: pd.Series) -> pd.Series:
+    """Converte textos como "1234.56", "1.234,56" ou "R$ 10,00" em float; inválidos viram NaN."""
+    texto = serie.str.strip().str.replace(r"^R\$\s*", "", regex=True).str.replace(" ", "", regex=False)
+    decimal_virgula = texto.str.contains(",", regex=False)
+    texto = texto.where(~decimal_virgula, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(texto, errors="coerce").round(2)
+
+
+def _datas(serie: pd.Series) -> pd.Series:
+    """Converte datas YYYY-MM-DD ou DD/MM/AAAA em texto YYYY-MM-DD; inválidas viram NaN."""
+    texto = serie.str.strip()
+    datas = pd.to_datetime(texto, format="%Y-%m-%d", errors="coerce")
+    datas = datas.fillna(pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce"))
+    return datas.dt.strftime("%Y-%m-%d")
+
+
+def _booleanos(serie: pd.Series) -> pd.Series:
+    """sim/não, true/false, 1/0, x/vazio etc. em True/False; o resto vira NaN."""
+    texto = serie.str.strip().str.lower()
+    return texto.map(lambda valor: True if valor in VERDADEIROS else False if valor in FALSOS else None)
+
+
+def _rejeitar(plano: PlanoImportacao, numeros_linha: np.ndarray, problemas: List[Tuple[pd.Series, str]]) -> np.ndarray:
+    """Registra os erros de cada verificação e devolve a máscara das linhas válidas."""
+    invalidas = np.zeros(len(numeros_linha), dtype=bool)
+    for mascara, mensagem in problemas:
+        mascara = mascara.to_numpy(dtype=bool)
+        plano._registrar_erros(numeros_linha[mascara & ~invalidas], mensagem)
+        invalidas |= mascara
+    plano.linhas_invalidas += int(invalidas.sum())
+    return ~invalidas
+
+
+def _ler_bloco_parcelas(plano: PlanoImportacao, bloco: pd.DataFrame, numeros_linha: np.ndarray):
+    nomes = bloco["nome"].str.strip()
+    valores = _valores(bloco["valor"])
+    vencimentos = _datas(bloco["vencimento"])
+    pagas = _booleanos(bloco["paga"]) if "paga" in bloco else pd.Series(False, index=bloco.index)
+    ids = bloco["id"].str.strip() if "id" in bloco else pd.Series("", index=bloco.index)
+    validas = _rejeitar(plano, numeros_linha, [
+        (nomes == "", "Nome vazio."),
+        (valores.isna() | (valores <= 0), "Valor inválido."),
+        (vencimentos.isna(), "Vencimento inválido (use YYYY-MM-DD ou DD/MM/AAAA)."),
+        (pagas.isna(), "Situação inválida na coluna 'paga' (use sim ou não)."),
+    ])
+    for nome, valor, vencimento, paga, id_parcela in zip(nomes[validas], valores[validas], vencimentos[validas],
+                                                         pagas[validas], ids[validas]):
+        plano._adicionar_parcela(nome, float(valor), vencimento, bool(paga), id_parcela)
+
+
+def _ler_bloco_cronograma(plano: PlanoImportacao, bloco: pd.DataFrame, numeros_linha: np.ndarray):
+    nomes = bloco["nome"].str.strip()
+    n_parcelas = pd.to_numeric(bloco["n_parcelas"].str.strip(), errors="coerce")
+    valores = _valores(bloco["valor_parcela"])
+    primeiros = _datas(bloco["primeiro_vencimento"])
+    pagas = (pd.to_numeric(bloco["parcelas_pagas"].str.strip().replace("", "0"), errors="coerce")
+             if "parcelas_pagas" in bloco else pd.Series(0, index=bloco.index))
+    validas = _rejeitar(plano, numeros_linha, [
+        (nomes == "", "Nome vazio."),
+        (n_parcelas.isna() | (n_parcelas % 1 != 0) | (n_parcelas < 1) | (n_parcelas > MAX_PARCELAS_POR_DEVEDOR),
+         f"Número de parcelas inválido (de 1 a {MAX_PARCELAS_POR_DEVEDOR})."),
+        (valores.isna() | (valores <= 0), "Valor da parcela inválido."),
+        (primeiros.isna(), "Primeiro vencimento inválido (use YYYY-MM-DD ou DD/MM/AAAA)."),
+        (pagas.isna() | (pagas % 1 != 0) | (pagas < 0) | (pagas > n_parcelas), "Parcelas pagas inválido."),
+    ])
+    for numero, nome, n, valor, primeiro, n_pagas in zip(numeros_linha[validas], nomes[validas], n_parcelas[validas],
+                                                         valores[validas], primeiros[validas], pagas[validas]):
+        if normalizar_nome(nome) in plano.devedores:
+            plano.repetidas_no_arquivo += 1
+            plano._registrar_erros(np.array([numero]), f"Devedor '{nome}' repetido no arquivo; linha ignorada.")
+            continue
+        for i, vencimento in enumerate(vencimentos_mensais(primeiro, int(n))):
+            plano._adicionar_parcela(nome, float(valor), vencimento, i < n_pagas, "")
+
+
+def ler_planilha(arquivo: Union[str, IO], nome_arquivo: Union[str, None] = None,
+                 tamanho_bloco: int = 5000) -> PlanoImportacao:
+    """
+    Lê e valida uma planilha CSV ou XLSX em blocos (ver o docstring do módulo).
+
+    Args:
+        arquivo: Caminho ou arquivo aberto em modo binário (por exemplo, o do st.file_uploader).
+        nome_arquivo: Nome usado para reconhecer o formato pela extensão; por padrão, o caminho.
+
+    Raises:
+        ValueError: Se o formato não for suportado ou faltarem colunas obrigatórias.
+        ImportError: Se o arquivo for .xlsx e o openpyxl não estiver instalado.
+    """
+    nome_arquivo = nome_arquivo or (arquivo if isinstance(arquivo, str) else getattr(arquivo, "name", ""))
+    blocos = (_blocos_xlsx if _formato(nome_arquivo) == "xlsx" else _blocos_csv)(arquivo, tamanho_bloco)
+    plano = None
+    proxima_linha = 2  # A linha 1 é o cabeçalho
+    for bloco in blocos:
+        bloco.columns = [str(coluna).strip().lower().replace(" ", "_") for coluna in bloco.columns]
+        if plano is None:
+            leiaute = LEIAUTE_CRONOGRAMA if "n_parcelas" in bloco.columns else LEIAUTE_PARCELAS
+            ausentes = [coluna for coluna in OBRIGATORIAS[leiaute] if coluna not in bloco.columns]
+            if ausentes:
+                raise ValueError(f"❌ ERRO: Colunas obrigatórias ausentes: {', '.join(ausentes)}.")
+            plano = PlanoImportacao(leiaute)
+        numeros_linha = np.arange(proxima_linha, proxima_linha + len(bloco))
+        proxima_linha += len(bloco)
+        # Linhas totalmente vazias (comuns no fim de planilhas) são descartadas sem erro.
+        preenchidas = ~(bloco.apply(lambda coluna: coluna.str.strip()) == "").all(axis=1).to_numpy()
+        bloco, numeros_linha = bloco[preenchidas], numeros_linha[preenchidas]
+        plano.linhas_lidas += len(bloco)
+        if plano.leiaute == LEIAUTE_CRONOGRAMA:
+            _ler_bloco_cronograma(plano, bloco, numeros_linha)
+        else:
+            _ler_bloco_parcelas(plano, bloco, numeros_linha)
+    if plano is None:
+        raise ValueError("❌ ERRO: A planilha está vazia.")
+    plano.erros.sort(key=lambda erro: erro.linha)
+    return plano
+
+
+# --- Exportação ----------------------------------------------------------
+
+def linhas_exportacao(dados: List[Dict]) -> Iterator[Tuple]:
+    """Uma tupla (nome, valor, vencimento, paga, id) por parcela, no leiaute de importação de parcelas."""
+    for devedor in dados:
+        for parcela in devedor.get("parcelas", []):
+            yield (devedor["nome"], parcela.get("valor"), parcela.get("vencimento"),
+                   "sim" if parcela.get("paga") else "não", parcela.get("id") or "")
+
+
+def blocos_csv(dados: List[Dict], tamanho_bloco: int = 5000, separador: str = ",") -> Iterator[str]:
+    """Texto CSV das parcelas, em blocos de `tamanho_bloco` linhas (o primeiro traz o cabeçalho)."""
+    linhas = linhas_exportacao(dados)
+    cabecalho = True
+    while True:
+        bloco = list(islice(linhas, tamanho_bloco))
+        if not bloco and not cabecalho:
+            return
+        saida = io.StringIO()
+        escritor = csv.writer(saida, delimiter=separador, lineterminator="\n")
+        if cabecalho:
+            escritor.writerow(COLUNAS_PARCELAS)
+            cabecalho = False
+        escritor.writerows(bloco)
+        yield saida.getvalue()
+
+
+def exportar_csv(dados: List[Dict], destino: Union[str, IO], tamanho_bloco: int = 5000, separador: str = ",") -> int:
+    """Grava as parcelas em CSV (UTF-8 com BOM, que o Excel reconhece). Retorna o número de parcelas."""
+    arquivo = open(destino, "w", encoding="utf-8-sig", newline="") if isinstance(destino, str) else destino
+    try:
+        for bloco in blocos_csv(dados, tamanho_bloco, separador):
+            arquivo.write(bloco)
+    finally:
+        if isinstance(destino, str):
+            arquivo.close()
+    return sum(len(devedor.get("parcelas", [])) for devedor in dados)
+
+
+def exportar_xlsx(dados: List[Dict], destino: Union[str, IO]) -> int:
+    """
+    Grava as parcelas em XLSX, linha a linha (modo write_only do openpyxl). Retorna o número de parcelas.
+
+    Raises:
+        ImportError: Se o openpyxl não estiver instalado.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("❌ ERRO: Para gerar arquivos .xlsx, instale o openpyxl (pip install openpyxl).")
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("parcelas")
+    planilha.append(COLUNAS_PARCELAS)
+    total = 0
+    for nome, valor, vencimento, paga, id_parcela in linhas_exportacao(dados):
+        try:
+            vencimento = date.fromisoformat(vencimento)
+        except (TypeError, ValueError):
+            pass
+        planilha.append([nome, valor, vencimento, paga, id_parcela])
+        total += 1
+    livro.save(destino)
+    return total
+
+
+def main():
+    from dotenv import load_dotenv
+    from armazenamento import ArmazenamentoSQLite
+    from client_control import ClientControl
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Importa ou exporta devedores e parcelas em CSV/XLSX.")
+    parser.add_argument("acao", choices=["importar", "exportar"])
+    parser.add_argument("arquivo", help="Planilha a importar, ou arquivo a gerar (.csv ou .xlsx).")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--sqlite", help="Banco SQLite local.")
+    destino.add_argument("--gist-id", help="ID do Gist.")
+    parser.add_argument("--token", default=os.getenv("GITHUB_TOKEN"), help="Token do GitHub (padrão: GITHUB_TOKEN).")
+    parser.add_argument("--duplicados", choices=POLITICAS_DUPLICADOS, default=DUPLICADOS_IGNORAR,
+                        help="O que fazer com devedores que já existem na base.")
+    parser.add_argument("--tamanho-bloco", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        controle = ClientControl(armazenamento=ArmazenamentoSQLite(args.sqlite))
+    else:
+        controle = ClientControl(token=args.token, gist_id=args.gist_id)
+
+    if args.acao == "exportar":
+        dados = controle.consultar_dados(copiar=False)
+        if dados is None:
+            raise SystemExit("❌ Não foi possível ler os dados.")
+        if _formato(args.arquivo) == "xlsx":
+            total = exportar_xlsx(dados, args.arquivo)
+        else:
+            total = exportar_csv(dados, args.arquivo, args.tamanho_bloco)
+        print(f"✅ {total} parcelas exportadas para '{args.arquivo}'.")
+        return
+
+    plano = ler_planilha(args.arquivo, tamanho_bloco=args.tamanho_bloco)
+    for erro in plano.erros:
+        print(f"⚠️  Linha {erro.linha}: {erro.mensagem}")
+    if plano.linhas_invalidas > len(plano.erros):
+        print(f"⚠️  ... e mais {plano.linhas_invalidas - len(plano.erros)} linha(s) inválida(s).")
+    resultado = controle.importar(plano, args.duplicados)
+    if not resultado:
+        raise SystemExit(f"❌ {resultado.mensagem}")
+    print(f"✅ {resultado.mensagem}")
+
+
+if __name__ == "__main__":
+    main()
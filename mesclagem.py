@@ -0,0 +1,81 @@
+from typing import Dict, List, Set, Union
+from repositorio import normalizar_nome
+
+
+class ConflitoDeMesclagem(Exception):
+    """Duas sessões alteraram de formas diferentes o mesmo devedor ou a mesma parcela."""
+
+
+def _por_chave(dados: List[Dict]) -> Dict[str, Dict]:
+    return {normalizar_nome(devedor.get("nome", "")): devedor for devedor in dados}
+
+
+def _escolher(base, nosso, deles, descricao: str):
+    """Mesclagem de três vias de um único item (None significa ausente)."""
+    if nosso == base:
+        return deles
+    if deles == base or nosso == deles:
+        return nosso
+    raise ConflitoDeMesclagem(descricao)
+
+
+def _mesclar_devedor(chave: str, base: Union[Dict, None], nosso: Union[Dict, None],
+                     deles: Union[Dict, None]) -> Union[Dict, None]:
+    """Mescla um devedor alterado pelas duas sessões, parcela a parcela."""
+    if nosso == base or deles == base or nosso == deles:
+        return _escolher(base, nosso, deles, chave)
+    if base is None or nosso is None or deles is None:
+        # Cadastrado pelas duas sessões, ou removido por uma e alterado pela outra.
+        raise ConflitoDeMesclagem(f"devedor '{chave}'")
+
+    nome = _escolher(base["nome"], nosso["nome"], deles["nome"], f"nome do devedor '{chave}'")
+    parcelas_base = {p["id"]: p for p in base.get("parcelas", [])}
+    parcelas_nossas = {p["id"]: p for p in nosso.get("parcelas", [])}
+    parcelas_deles = {p["id"]: p for p in deles.get("parcelas", [])}
+
+    parcelas = []
+    # Mantém a ordem da outra sessão e acrescenta, no fim, as parcelas criadas por nós.
+    for id_parcela in list(parcelas_deles) + [i for i in parcelas_nossas if i not in parcelas_deles]:
+        parcela = _escolher(parcelas_base.get(id_parcela), parcelas_nossas.get(id_parcela),
+                            parcelas_deles.get(id_parcela), f"parcela '{id_parcela}' de '{nome}'")
+        if parcela is not None:
+            parcelas.append(parcela)
+    # Parcelas removidas pela outra sessão e não tocadas por nós continuam removidas;
+    # as removidas por nós e não tocadas por ela saem pelo _escolher acima.
+    return {"nome": nome, "parcelas": parcelas}
+
+
+def mesclar(base: List[Dict], nossos: List[Dict], deles: List[Dict],
+            alterados: Union[Set[str], None] = None) -> List[Dict]:
+    """
+    Mesclagem de três vias entre a versão lida (base), a nossa e a gravada por outra sessão.
+
+    Devedores são identificados pelo nome normalizado e parcelas pelo "id".
+    Alterações em devedores ou parcelas diferentes são combinadas; alterações
+    diferentes no mesmo item levantam ConflitoDeMesclagem.
+
+    Args:
+        alterados (Set[str] | None): Chaves dos devedores que nós alteramos.
+            Os demais são tomados da versão deles sem comparação. None compara
+            todos os devedores.
+
+    Raises:
+        ConflitoDeMesclagem: Se as alterações se sobrepuserem.
+    """
+    base_por_chave = _por_chave(base)
+    nossos_por_chave = _por_chave(nossos)
+    deles_por_chave = _por_chave(deles)
+    if alterados is None:
+        alterados = {chave for chave in set(base_por_chave) | set(nossos_por_chave)
+                     if base_por_chave.get(chave) != nossos_por_chave.get(chave)}
+
+    mesclados = dict(deles_por_chave)
+    for chave in alterados:
+        devedor = _mesclar_devedor(chave, base_por_chave.get(chave), nossos_por_chave.get(chave),
+                                   deles_por_chave.get(chave))
+        if devedor is None:
+            mesclados.pop(chave, None)
+        else:
+            mesclados[chave] = devedor
+    # Ordem: a da outra sessão, seguida dos devedores que só nós cadastramos.
+    return list(mesclados.values())
@@ -0,0 +1,204 @@
+"""
+Logs estruturados e métricas de tempo do ClientControl.
+
+Logs: os módulos registram eventos no logger "clientcontrol" com
+registrar(evento, mensagem, **campos). configurar_logs() direciona esse
+logger para a saída de erro em JSON Lines (um objeto por linha, com o
+nome do evento e os campos), que ferramentas de log conseguem ler.
+
+Métricas: METRICAS acumula, para cada operação instrumentada (chamadas
+HTTP, serialização de JSON, montagem de DataFrames, renderização de
+páginas), a contagem, as latências recentes (para p50/p95) e os bytes
+trafegados, além de acertos e faltas dos caches. O resumo pode ser
+exportado em JSON ou no formato de texto do Prometheus.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple, Union
+
+logger = logging.getLogger("clientcontrol")
+
+# Atributos padrão de um LogRecord; o que sobrar veio de `extra` e vai para o JSON.
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def registrar(evento: str, mensagem: str, nivel: int = logging.INFO, **campos):
+    """Registra um evento no logger "clientcontrol", com campos estruturados."""
+    logger.log(nivel, mensagem, extra={"evento": evento, **campos})
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma linha."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        saida = {
+            "em": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        saida.update({chave: valor for chave, valor in vars(record).items() if chave not in _ATRIBUTOS_PADRAO})
+        if record.exc_info:
+            saida["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(saida, ensure_ascii=False, default=str)
+
+
+def configurar_logs(nivel: Union[int, str] = logging.INFO, formato_json: bool = True):
+    """Envia os logs do ClientControl para a saída de erro (uma vez por processo)."""
+    if any(getattr(handler, "_clientcontrol", False) for handler in logger.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(FormatadorJSON() if formato_json else logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    handler._clientcontrol = True
+    logger.addHandler(handler)
+    logger.setLevel(nivel)
+    logger.propagate = False
+
+
+class _Serie:
+    """Observações de uma métrica com um conjunto de rótulos."""
+
+    def __init__(self, max_amostras: int):
+        self.contagem = 0
+        self.soma = 0.0
+        self.bytes = 0
+        self.amostras: deque = deque(maxlen=max_amostras)
+
+    def percentil(self, p: float) -> Union[float, None]:
+        if not self.amostras:
+            return None
+        # Percentil pelo posto mais próximo: o menor valor com pelo menos p% das amostras até ele.
+        ordenadas = sorted(self.amostras)
+        return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+class ColetorMetricas:
+    """
+    Acumula latências, bytes e acertos de cache, com segurança entre threads.
+
+    Os percentis são calculados sobre as últimas `max_amostras` observações
+    de cada série; contagem, soma e bytes cobrem todo o período desde o
+    último zerar().
+    """
+
+    def __init__(self, max_amostras: int = 1000):
+        self.max_amostras = max_amostras
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, Tuple], _Serie] = {}
+        self._caches: Dict[str, List[int]] = {}
+        self.desde = time.time()
+
+    def observar(self, nome: str, segundos: float, bytes: Union[int, None] = None, **rotulos):
+        chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = _Serie(self.max_amostras)
+            serie.contagem += 1
+            serie.soma += segundos
+            serie.amostras.append(segundos)
+            if bytes:
+                serie.bytes += bytes
+
+    @contextmanager
+    def medir(self, nome: str, **rotulos) -> Iterator[Dict]:
+        """
+        Mede o tempo do bloco. O dicionário entregue aceita "bytes" e rótulos extras definidos dentro do bloco.
+
+        Exemplo:
+            with METRICAS.medir("json_serializar", formato="compacto") as medida:
+                texto = json.dumps(dados)
+                medida["bytes"] = len(texto)
+        """
+        medida: Dict = {}
+        inicio = time.perf_counter()
+        try:
+            yield medida
+        finally:
+            duracao = time.perf_counter() - inicio
+            bytes_medidos = medida.pop("bytes", None)
+            self.observar(nome, duracao, bytes_medidos, **{**rotulos, **medida})
+
+    def contar_cache(self, cache: str, acerto: bool):
+        with self._lock:
+            contadores = self._caches.setdefault(cache, [0, 0])
+            contadores[0 if acerto else 1] += 1
+
+    def zerar(self):
+        with self._lock:
+            self._series.clear()
+            self._caches.clear()
+            self.desde = time.time()
+
+    def resumo(self) -> List[Dict]:
+        """Uma linha por série: nome, rótulos, contagem, p50/p95/média em ms e bytes."""
+        with self._lock:
+            series = list(self._series.items())
+            linhas = []
+            for (nome, rotulos), serie in sorted(series):
+                p50, p95 = serie.percentil(50), serie.percentil(95)
+                linhas.append({
+                    "nome": nome,
+                    "rotulos": dict(rotulos),
+                    "contagem": serie.contagem,
+                    "p50_ms": None if p50 is None else round(p50 * 1000, 3),
+                    "p95_ms": None if p95 is None else round(p95 * 1000, 3),
+                    "media_ms": round(serie.soma / serie.contagem * 1000, 3),
+                    "total_s": round(serie.soma, 6),
+                    "bytes": serie.bytes,
+                })
+            return linhas
+
+    def caches(self) -> List[Dict]:
+        """Acertos, faltas e taxa de acerto de cada cache."""
+        with self._lock:
+            return [{"cache": cache, "acertos": acertos, "faltas": faltas,
+                     "taxa_acerto": round(acertos / (acertos + faltas), 4) if acertos + faltas else None}
+                    for cache, (acertos, faltas) in sorted(self._caches.items())]
+
+    def como_json(self) -> str:
+        return json.dumps({"desde": datetime.fromtimestamp(self.desde, timezone.utc).isoformat(timespec="seconds"),
+                           "series": self.resumo(), "caches": self.caches()}, ensure_ascii=False, indent=2)
+
+    def como_prometheus(self, prefixo: str = "clientcontrol") -> str:
+        """Exposição no formato de texto do Prometheus (séries como summary, caches como counters)."""
+        def rotulos_texto(rotulos: Dict, **extra) -> str:
+            todos = {**rotulos, **extra}
+            if not todos:
+                return ""
+            pares = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                             for k, v in todos.items())
+            return "{" + pares + "}"
+
+        linhas = []
+        por_nome: Dict[str, List[Dict]] = {}
+        for serie in self.resumo():
+            por_nome.setdefault(serie["nome"], []).append(serie)
+        for nome, series in por_nome.items():
+            metrica = f"{prefixo}_{nome}_segundos"
+            linhas.append(f"# TYPE {metrica} summary")
+            for serie in series:
+                for quantil, chave in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+                    linhas.append(f"{metrica}{rotulos_texto(serie['rotulos'], quantile=quantil)} {round(serie[chave] / 1000, 9)}")
+                linhas.append(f"{metrica}_sum{rotulos_texto(serie['rotulos'])} {serie['total_s']}")
+                linhas.append(f"{metrica}_count{rotulos_texto(serie['rotulos'])} {serie['contagem']}")
+            linhas.append(f"# TYPE {prefixo}_{nome}_bytes_total counter")
+            for serie in series:
+                linhas.append(f"{prefixo}_{nome}_bytes_total{rotulos_texto(serie['rotulos'])} {serie['bytes']}")
+        caches = self.caches()
+        if caches:
+            linhas.append(f"# TYPE {prefixo}_cache_acertos_total counter")
+            linhas.extend(f"{prefixo}_cache_acertos_total{rotulos_texto({'cache': c['cache']})} {c['acertos']}" for c in caches)
+            linhas.append(f"# TYPE {prefixo}_cache_faltas_total counter")
+            linhas.extend(f"{prefixo}_cache_faltas_total{rotulos_texto({'cache': c['cache']})} {c['faltas']}" for c in caches)
+        return "\n".join(linhas) + "\n"
+
+
+# Coletor do processo, compartilhado por todas as sessões do Streamlit.
+METRICAS = ColetorMetricas()
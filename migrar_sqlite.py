@@ -0,0 +1,45 @@
+"""
+Importa o conteúdo de dados.json (em qualquer formato de serializacao) para um banco SQLite local.
+
+Uso:
+    python migrar_sqlite.py --arquivo dados.json --destino clientcontrol.db
+    python migrar_sqlite.py --gist-id <ID> --destino clientcontrol.db
+
+Para ler do Gist, o token é lido de --token ou da variável GITHUB_TOKEN
+(também aceita em um arquivo .env). Depois da migração, rode o app com
+CLIENTCONTROL_SQLITE=clientcontrol.db para usar o banco local.
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+from armazenamento import ArmazenamentoGist, migrar_para_sqlite
+from serializacao import desserializar
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Migra os dados do ClientControl para SQLite.")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--arquivo", help="Arquivo dados.json local.")
+    origem.add_argument("--gist-id", help="ID do Gist de onde ler dados.json.")
+    parser.add_argument("--token", default=os.getenv("GITHUB_TOKEN"), help="Token do GitHub (padrão: GITHUB_TOKEN).")
+    parser.add_argument("--destino", required=True, help="Caminho do banco SQLite a criar ou substituir.")
+    args = parser.parse_args()
+
+    if args.arquivo:
+        with open(args.arquivo, encoding="utf-8") as arquivo:
+            dados = desserializar(arquivo.read())
+    else:
+        gist = ArmazenamentoGist(args.token, args.gist_id)
+        gist.autenticar()
+        dados = gist.carregar()
+        if dados is None:
+            raise SystemExit("❌ Não foi possível ler os dados do Gist.")
+
+    migrar_para_sqlite(dados, args.destino)
+    n_parcelas = sum(len(devedor.get("parcelas", [])) for devedor in dados)
+    print(f"✅ {len(dados)} devedores e {n_parcelas} parcelas migrados para '{args.destino}'.")
+
+
+if __name__ == "__main__":
+    main()
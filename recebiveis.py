@@ -0,0 +1,290 @@
+"""
+Calendário de recebíveis e índice de atraso, mantidos de forma incremental.
+
+O IndiceRecebiveis guarda, para a base inteira:
+- os totais pago e em aberto de cada mês de vencimento;
+- o saldo (pago e em aberto) de cada devedor;
+- as parcelas em aberto ordenadas por vencimento, de modo que "próximos N
+  vencimentos" é uma busca binária seguida de N itens;
+- as faixas de atraso (0-30, 31-60, 61-90 e 90+ dias) e o valor vencido de
+  cada devedor, calculados uma vez por dia e depois ajustados a cada mudança.
+
+As atualizações são feitas por devedor: o ClientControl aplica ao índice os
+devedores alterados por cada mutação (aplicar), e quando o backend passa a
+outra versão (gravação de outra sessão, fim da fila de persistência) o índice
+é conciliado com os dados lidos (sincronizar), refazendo só os devedores
+cujas parcelas mudaram. As consultas não percorrem a base.
+"""
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Dict, List, Tuple, Union
+from repositorio import RepositorioDevedores, normalizar_nome
+
+FAIXAS_ATRASO = ("0-30", "31-60", "61-90", "90+")
+
+
+def _faixa(dias_atraso: int) -> str:
+    """Faixa de atraso de uma parcela vencida há `dias_atraso` dias (1 ou mais)."""
+    if dias_atraso <= 30:
+        return FAIXAS_ATRASO[0]
+    if dias_atraso <= 60:
+        return FAIXAS_ATRASO[1]
+    if dias_atraso <= 90:
+        return FAIXAS_ATRASO[2]
+    return FAIXAS_ATRASO[3]
+
+
+def _data(vencimento: str) -> Union[date, None]:
+    try:
+        return date.fromisoformat(vencimento)
+    except (TypeError, ValueError):
+        return None
+
+
+class IndiceRecebiveis:
+    """
+    Resumos de recebíveis atualizados por devedor (ver o docstring do módulo).
+
+    `versao` é a versão dos dados que o índice reflete, ou None se não for
+    conhecida; nesse caso a próxima sincronizar() concilia o conteúdo.
+    Todos os métodos são seguros entre threads e devolvem cópias.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.versao: Union[str, None] = None
+        # Parcelas de cada devedor como foram indexadas, para desfazer a contribuição dele.
+        self._devedores: Dict[str, Tuple[str, List[Dict]]] = {}
+        # (ano, mês) -> [total pago, total em aberto, parcelas pagas, parcelas em aberto]
+        self._meses: Dict[Tuple[int, int], List] = {}
+        # chave -> [nome, total pago, total em aberto, vencimentos em aberto (ordenados)]
+        self._saldos: Dict[str, List] = {}
+        # Parcelas em aberto com vencimento válido: (vencimento, chave, id, valor), ordenadas.
+        self._abertas: List[Tuple[str, str, str, float]] = []
+        # Atraso calculado para um dia: {"hoje", "faixas": {faixa: [qtd, total]},
+        # "devedores": {chave: [qtd, total]}, "prioridade": lista ordenada ou None}.
+        self._atraso: Union[Dict, None] = None
+
+    # --- Atualização -----------------------------------------------------
+
+    def sincronizar(self, dados: List[Dict], versao: Union[str, None]) -> bool:
+        """
+        Concilia o índice com a base lida do backend. Retorna True se algum devedor mudou.
+
+        Com a mesma versão já indexada, nada é feito. Caso contrário, cada
+        devedor é comparado com o que foi indexado e só os diferentes (ou
+        novos, ou removidos) são refeitos. Se muitos mudaram (por exemplo, na
+        primeira carga), o índice é remontado de uma vez, ordenando no final.
+        """
+        with self._lock:
+            if versao is not None and versao == self.versao:
+                return False
+            mudados = []
+            presentes = set()
+            for devedor in dados:
+                chave = normalizar_nome(devedor["nome"])
+                presentes.add(chave)
+                indexado = self._devedores.get(chave)
+                parcelas = devedor.get("parcelas", [])
+                if indexado is None or indexado[0] != devedor["nome"] or indexado[1] != parcelas:
+                    mudados.append((chave, devedor["nome"], parcelas))
+            removidos = set(self._devedores) - presentes
+            if len(mudados) + len(removidos) > max(32, len(presentes) // 4):
+                self._remontar(dados)
+            else:
+                for chave in removidos:
+                    self._retirar(chave)
+                for chave, nome, parcelas in mudados:
+                    self._substituir(chave, nome, parcelas)
+            self.versao = versao
+            return bool(mudados or removidos)
+
+    def aplicar(self, repositorio: RepositorioDevedores, chaves, versao_base: Union[str, None],
+                versao_nova: Union[str, None]) -> bool:
+        """
+        Refaz os devedores `chaves` a partir do repositório que acabou de ser alterado.
+
+        Só vale se o índice estiver em `versao_base` (a versão de onde o
+        repositório foi carregado); do contrário nada é feito e a próxima
+        sincronizar() concilia. Retorna True se as alterações foram aplicadas.
+        """
+        with self._lock:
+            if self.versao is None or self.versao != versao_base:
+                return False
+            for chave in chaves:
+                devedor = repositorio.encontrar(chave)
+                if devedor is None:
+                    self._retirar(chave)
+                else:
+                    dados = devedor.para_dict()
+                    self._substituir(chave, dados["nome"], dados["parcelas"])
+            self.versao = versao_nova
+            return True
+
+    def _remontar(self, dados: List[Dict]):
+        """Refaz todas as estruturas a partir da base, com uma única ordenação no final."""
+        self._devedores, self._meses, self._saldos, self._abertas = {}, {}, {}, []
+        self._atraso = None
+        # Como em sincronizar, um nome repetido fica com a última entrada.
+        por_chave = {normalizar_nome(devedor["nome"]): devedor for devedor in dados}
+        for chave, devedor in por_chave.items():
+            parcelas = list(devedor.get("parcelas", []))
+            self._devedores[chave] = (devedor["nome"], parcelas)
+            saldo = self._saldos[chave] = [devedor["nome"], 0.0, 0.0, []]
+            for parcela in parcelas:
+                self._contar(chave, saldo, parcela, 1, ordenar=False)
+            saldo[3].sort()
+        self._abertas.sort()
+
+    def _substituir(self, chave: str, nome: str, parcelas: List[Dict]):
+        self._retirar(chave)
+        parcelas = list(parcelas)
+        self._devedores[chave] = (nome, parcelas)
+        saldo = self._saldos[chave] = [nome, 0.0, 0.0, []]
+        for parcela in parcelas:
+            self._contar(chave, saldo, parcela, 1)
+
+    def _retirar(self, chave: str):
+        indexado = self._devedores.pop(chave, None)
+        if indexado is None:
+            return
+        saldo = self._saldos[chave]
+        for parcela in indexado[1]:
+            self._contar(chave, saldo, parcela, -1)
+        del self._saldos[chave]
+
+    def _contar(self, chave: str, saldo: List, parcela: Dict, sinal: int, ordenar: bool = True):
+        """
+        Soma (sinal 1) ou subtrai (sinal -1) a contribuição de uma parcela em todas as estruturas.
+
+        Com `ordenar=False` (só em _remontar) as parcelas em aberto são apenas
+        acrescentadas, e quem chama ordena as listas no final.
+        """
+        valor = float(parcela.get("valor") or 0)
+        vencimento = parcela.get("vencimento") or ""
+        paga = bool(parcela.get("paga"))
+        data = _data(vencimento)
+
+        saldo[1 if paga else 2] += sinal * valor
+        if data is not None:
+            mes = self._meses.setdefault((data.year, data.month), [0.0, 0.0, 0, 0])
+            mes[0 if paga else 1] += sinal * valor
+            mes[2 if paga else 3] += sinal
+            if mes[2] == 0 and mes[3] == 0:
+                del self._meses[(data.year, data.month)]
+        if paga or data is None:
+            return
+
+        item = (vencimento, chave, parcela.get("id") or "", valor)
+        if not ordenar:
+            self._abertas.append(item)
+            saldo[3].append(vencimento)
+        elif sinal > 0:
+            insort(self._abertas, item)
+            insort(saldo[3], vencimento)
+        else:
+            del self._abertas[bisect_left(self._abertas, item)]
+            del saldo[3][bisect_left(saldo[3], vencimento)]
+
+        atraso = self._atraso
+        if atraso is not None and vencimento < atraso["hoje"]:
+            dias = (date.fromisoformat(atraso["hoje"]) - data).days
+            for contador in (atraso["faixas"][_faixa(dias)], atraso["devedores"].setdefault(chave, [0, 0.0])):
+                contador[0] += sinal
+                contador[1] = contador[1] + sinal * valor if contador[0] else 0.0
+            if not atraso["devedores"][chave][0]:
+                del atraso["devedores"][chave]
+            atraso["prioridade"] = None
+
+    def _atraso_em(self, hoje: Union[str, None]) -> Dict:
+        """Faixas de atraso para `hoje`, recalculadas só quando o dia muda."""
+        hoje = hoje or date.today().isoformat()
+        if self._atraso is None or self._atraso["hoje"] != hoje:
+            dia = date.fromisoformat(hoje)
+            faixas = {faixa: [0, 0.0] for faixa in FAIXAS_ATRASO}
+            devedores: Dict[str, List] = {}
+            # Só o trecho vencido da lista ordenada é percorrido.
+            for vencimento, chave, _, valor in self._abertas[:bisect_left(self._abertas, (hoje,))]:
+                for contador in (faixas[_faixa((dia - date.fromisoformat(vencimento)).days)],
+                                 devedores.setdefault(chave, [0, 0.0])):
+                    contador[0] += 1
+                    contador[1] += valor
+            self._atraso = {"hoje": hoje, "faixas": faixas, "devedores": devedores, "prioridade": None}
+        return self._atraso
+
+    # --- Consultas -------------------------------------------------------
+
+    def anos(self) -> List[int]:
+        """Anos com parcelas, do mais recente para o mais antigo."""
+        with self._lock:
+            return sorted({ano for ano, _ in self._meses}, reverse=True)
+
+    def totais(self, ano: Union[int, None] = None, mes: Union[int, None] = None) -> Dict[str, float]:
+        """Totais pago, em aberto e geral, opcionalmente de um ano e/ou mês (1-12)."""
+        with self._lock:
+            pago = aberto = 0.0
+            for (ano_mes, mes_mes), totais in self._meses.items():
+                if (ano is None or ano_mes == ano) and (mes is None or mes_mes == mes):
+                    pago += totais[0]
+                    aberto += totais[1]
+        pago, aberto = round(pago, 2), round(aberto, 2)
+        return {"pago": pago, "aberto": aberto, "geral": round(pago + aberto, 2)}
+
+    def totais_por_mes(self, ano: Union[int, None] = None) -> List[Dict]:
+        """Soma dos valores por ano, mês e situação: [{"ano", "mes", "paga", "total"}], opcionalmente de um ano."""
+        with self._lock:
+            linhas = []
+            for (ano_mes, mes), totais in sorted(self._meses.items()):
+                if ano is not None and ano_mes != ano:
+                    continue
+                if totais[3]:
+                    linhas.append({"ano": ano_mes, "mes": mes, "paga": False, "total": round(totais[1], 2)})
+                if totais[2]:
+                    linhas.append({"ano": ano_mes, "mes": mes, "paga": True, "total": round(totais[0], 2)})
+            return linhas
+
+    def saldos(self) -> List[Dict]:
+        """Saldo de cada devedor: [{"nome", "pago", "aberto", "parcelas_abertas"}], por nome."""
+        with self._lock:
+            return sorted(({"nome": nome, "pago": round(pago, 2), "aberto": round(aberto, 2),
+                            "parcelas_abertas": len(vencimentos)}
+                           for nome, pago, aberto, vencimentos in self._saldos.values()),
+                          key=lambda saldo: saldo["nome"].lower())
+
+    def proximos_vencimentos(self, n: int = 10, hoje: Union[str, None] = None) -> List[Dict]:
+        """As `n` próximas parcelas em aberto com vencimento a partir de `hoje` (YYYY-MM-DD; padrão: hoje)."""
+        hoje = hoje or date.today().isoformat()
+        with self._lock:
+            inicio = bisect_left(self._abertas, (hoje,))
+            return [{"id": id_parcela, "nome": self._saldos[chave][0], "valor": valor, "vencimento": vencimento}
+                    for vencimento, chave, id_parcela, valor in self._abertas[inicio:inicio + n]]
+
+    def faixas_atraso(self, hoje: Union[str, None] = None) -> List[Dict]:
+        """Parcelas vencidas por faixa de dias de atraso: [{"faixa", "parcelas", "total"}]."""
+        with self._lock:
+            faixas = self._atraso_em(hoje)["faixas"]
+            return [{"faixa": faixa, "parcelas": faixas[faixa][0], "total": round(faixas[faixa][1], 2)}
+                    for faixa in FAIXAS_ATRASO]
+
+    def prioridade_cobranca(self, n: Union[int, None] = None, hoje: Union[str, None] = None) -> List[Dict]:
+        """
+        Devedores com parcelas vencidas, do maior valor vencido para o menor.
+
+        Cada linha traz nome, vencido, parcelas_vencidas, aberto (todo o
+        saldo em aberto), dias_atraso (da parcela vencida mais antiga) e faixa.
+        """
+        with self._lock:
+            atraso = self._atraso_em(hoje)
+            if atraso["prioridade"] is None:
+                dia = date.fromisoformat(atraso["hoje"])
+                linhas = []
+                for chave, (quantidade, vencido) in atraso["devedores"].items():
+                    nome, _, aberto, vencimentos = self._saldos[chave]
+                    dias = (dia - date.fromisoformat(vencimentos[0])).days
+                    linhas.append({"nome": nome, "vencido": round(vencido, 2), "parcelas_vencidas": quantidade,
+                                   "aberto": round(aberto, 2), "dias_atraso": dias, "faixa": _faixa(dias)})
+                linhas.sort(key=lambda linha: (-linha["vencido"], -linha["dias_atraso"], linha["nome"].lower()))
+                atraso["prioridade"] = linhas
+            linhas = atraso["prioridade"]
+            return [dict(linha) for linha in (linhas if n is None else linhas[:n])]
@@ -0,0 +1,227 @@
+import calendar
+import hashlib
+import uuid
+from datetime import date
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+
+def normalizar_nome(nome: str) -> str:
+    """Chave usada para indexar devedores: sem espaços nas pontas e em minúsculas."""
+    return nome.strip().lower()
+
+
+def novo_id_parcela() -> str:
+    """Gera um identificador curto e único para uma parcela."""
+    return uuid.uuid4().hex[:12]
+
+
+def vencimentos_mensais(primeiro_vencimento: Union[str, date], n_parcelas: int) -> List[str]:
+    """
+    Vencimentos (YYYY-MM-DD) de `n_parcelas` parcelas mensais, a partir do primeiro.
+
+    Cada parcela vence no mesmo dia do mês que a primeira; em meses mais
+    curtos, no último dia (31/01 -> 28/02 -> 31/03).
+
+    Raises:
+        ValueError: Se o primeiro vencimento não for uma data YYYY-MM-DD.
+    """
+    primeiro = date.fromisoformat(primeiro_vencimento) if isinstance(primeiro_vencimento, str) else primeiro_vencimento
+    vencimentos = []
+    for i in range(n_parcelas):
+        ano, mes = divmod(primeiro.month - 1 + i, 12)
+        ano, mes = primeiro.year + ano, mes + 1
+        vencimentos.append(date(ano, mes, min(primeiro.day, calendar.monthrange(ano, mes)[1])).isoformat())
+    return vencimentos
+
+
+def id_parcela_legada(chave_devedor: str, posicao: int, vencimento: str, ocorrencia: int = 0) -> str:
+    """
+    ID determinístico para parcelas gravadas antes da existência de IDs.
+
+    Depende apenas do devedor, da posição e do vencimento, então leituras
+    repetidas do mesmo conteúdo produzem os mesmos IDs até a próxima gravação,
+    que os persiste. `ocorrencia` separa parcelas que dariam o mesmo ID (por
+    exemplo, de duas entradas com o mesmo nome); a primeira usa 0.
+    """
+    texto = f"{chave_devedor}|{posicao}|{vencimento}" + (f"|{ocorrencia}" if ocorrencia else "")
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:12]
+
+
+class Parcela:
+    """Uma parcela de um devedor. Usa __slots__ para reduzir o custo por instância."""
+    __slots__ = ("id", "valor", "vencimento", "paga")
+
+    def __init__(self, valor: float, vencimento: str, paga: bool = False, id: Union[str, None] = None):
+        self.id = id or novo_id_parcela()
+        self.valor = valor
+        self.vencimento = vencimento
+        self.paga = paga
+
+    @classmethod
+    def de_dict(cls, dados: Dict) -> "Parcela":
+        return cls(dados.get("valor", 0), dados.get("vencimento", ""), bool(dados.get("paga", False)), dados.get("id"))
+
+    def para_dict(self) -> Dict:
+        return {"id": self.id, "valor": self.valor, "vencimento": self.vencimento, "paga": self.paga}
+
+    def __repr__(self) -> str:
+        return f"Parcela(id={self.id!r}, valor={self.valor!r}, vencimento={self.vencimento!r}, paga={self.paga!r})"
+
+
+class Devedor:
+    """Um devedor e suas parcelas, indexadas pelo ID da parcela (em ordem de inserção)."""
+    __slots__ = ("nome", "parcelas")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.parcelas: Dict[str, Parcela] = {}
+
+    @property
+    def chave(self) -> str:
+        return normalizar_nome(self.nome)
+
+    def parcelas_com_vencimento(self, vencimento: str) -> List[Parcela]:
+        """Retorna as parcelas deste devedor que vencem na data informada."""
+        return [p for p in self.parcelas.values() if p.vencimento == vencimento]
+
+    def para_dict(self) -> Dict:
+        return {"nome": self.nome, "parcelas": [p.para_dict() for p in self.parcelas.values()]}
+
+    def __repr__(self) -> str:
+        return f"Devedor(nome={self.nome!r}, parcelas={len(self.parcelas)})"
+
+
+class RepositorioDevedores:
+    """
+    Base de devedores em memória com índices para as operações do ClientControl.
+
+    Mantém um dicionário de devedores pelo nome normalizado e um índice global
+    de parcelas (ID da parcela -> chave do devedor), de modo que localizar um
+    devedor ou uma parcela custa O(1) em vez de uma varredura da lista.
+    As alterações devem passar pelos métodos do repositório para manter os
+    índices consistentes e o conjunto `alterados` (chaves dos devedores
+    incluídos, removidos ou modificados desde a carga) atualizado.
+    """
+
+    def __init__(self):
+        self._devedores: Dict[str, Devedor] = {}
+        self._dono_parcela: Dict[str, str] = {}
+        self.alterados: Set[str] = set()
+        # Conteúdo e versão de onde o repositório foi carregado; servem de base
+        # para a mesclagem quando outra sessão grava antes (ver ClientControl).
+        self.origem: Union[List[Dict], None] = None
+        self.versao_origem: Union[str, None] = None
+
+    @classmethod
+    def de_dados(cls, dados: List[Dict]) -> "RepositorioDevedores":
+        """
+        Constrói o repositório a partir do formato de lista usado no Gist.
+
+        Entradas com o mesmo nome normalizado são unidas no primeiro devedor.
+        Parcelas sem "id", ou com um "id" já usado por uma parcela anterior,
+        recebem um ID determinístico (ver id_parcela_legada), de modo que o
+        mesmo conteúdo produz sempre os mesmos IDs.
+        """
+        repositorio = cls()
+        for entrada in dados:
+            nome = entrada.get("nome", "")
+            devedor = repositorio.encontrar(nome)
+            if devedor is None:
+                devedor = Devedor(nome)
+                repositorio.adicionar(devedor)
+            for posicao, dados_parcela in enumerate(entrada.get("parcelas", [])):
+                parcela = Parcela.de_dict(dados_parcela)
+                if not dados_parcela.get("id") or parcela.id in repositorio._dono_parcela:
+                    parcela.id = repositorio._id_legado_livre(devedor.chave, posicao, parcela.vencimento)
+                repositorio.adicionar_parcela(devedor, parcela)
+        repositorio.alterados.clear()
+        return repositorio
+
+    def _id_legado_livre(self, chave_devedor: str, posicao: int, vencimento: str) -> str:
+        """Primeiro ID de id_parcela_legada, pela ocorrência, ainda não usado no repositório."""
+        ocorrencia = 0
+        id_parcela = id_parcela_legada(chave_devedor, posicao, vencimento)
+        while id_parcela in self._dono_parcela:
+            ocorrencia += 1
+            id_parcela = id_parcela_legada(chave_devedor, posicao, vencimento, ocorrencia)
+        return id_parcela
+
+    def para_dados(self) -> List[Dict]:
+        """Converte o repositório de volta para o formato de lista usado no Gist."""
+        return [devedor.para_dict() for devedor in self._devedores.values()]
+
+    def __len__(self) -> int:
+        return len(self._devedores)
+
+    def __iter__(self) -> Iterator[Devedor]:
+        return iter(self._devedores.values())
+
+    def __contains__(self, nome: str) -> bool:
+        return normalizar_nome(nome) in self._devedores
+
+    def encontrar(self, nome: str) -> Union[Devedor, None]:
+        """Retorna o devedor com o nome informado (sem diferenciar maiúsculas), ou None."""
+        return self._devedores.get(normalizar_nome(nome))
+
+    def adicionar(self, devedor: Devedor):
+        """Inclui um novo devedor. Parcelas já presentes nele são indexadas."""
+        if devedor.chave in self._devedores:
+            raise ValueError(f"Devedor '{devedor.nome}' já está cadastrado.")
+        self._devedores[devedor.chave] = devedor
+        for id_parcela in devedor.parcelas:
+            self._dono_parcela[id_parcela] = devedor.chave
+        self.alterados.add(devedor.chave)
+
+    def remover(self, nome: str) -> Union[Devedor, None]:
+        """Remove o devedor e suas parcelas. Retorna o devedor removido, ou None."""
+        devedor = self._devedores.pop(normalizar_nome(nome), None)
+        if devedor is not None:
+            for id_parcela in devedor.parcelas:
+                self._dono_parcela.pop(id_parcela, None)
+            self.alterados.add(devedor.chave)
+        return devedor
+
+    def adicionar_parcela(self, devedor: Devedor, parcela: Parcela):
+        """
+        Anexa uma parcela a um devedor já presente no repositório.
+
+        Raises:
+            ValueError: Se já houver uma parcela com o mesmo ID.
+        """
+        if parcela.id in self._dono_parcela:
+            raise ValueError(f"Parcela '{parcela.id}' já está cadastrada.")
+        devedor.parcelas[parcela.id] = parcela
+        self._dono_parcela[parcela.id] = devedor.chave
+        self.alterados.add(devedor.chave)
+
+    def remover_parcela(self, id_parcela: str) -> Union[Parcela, None]:
+        """Remove a parcela com o ID informado. Retorna a parcela removida, ou None."""
+        chave = self._dono_parcela.pop(id_parcela, None)
+        if chave is None:
+            return None
+        self.alterados.add(chave)
+        return self._devedores[chave].parcelas.pop(id_parcela, None)
+
+    def atualizar_parcela(self, id_parcela: str, valor: Union[float, None] = None,
+                          vencimento: Union[str, None] = None, paga: Union[bool, None] = None) -> Union[Parcela, None]:
+        """Altera os campos informados de uma parcela. Retorna a parcela, ou None se não existir."""
+        localizada = self.localizar_parcela(id_parcela)
+        if localizada is None:
+            return None
+        devedor, parcela = localizada
+        if valor is not None:
+            parcela.valor = valor
+        if vencimento is not None:
+            parcela.vencimento = vencimento
+        if paga is not None:
+            parcela.paga = paga
+        self.alterados.add(devedor.chave)
+        return parcela
+
+    def localizar_parcela(self, id_parcela: str) -> Union[Tuple[Devedor, Parcela], None]:
+        """Retorna (devedor, parcela) para o ID informado, ou None."""
+        chave = self._dono_parcela.get(id_parcela)
+        if chave is None:
+            return None
+        devedor = self._devedores[chave]
+        return devedor, devedor.parcelas[id_parcela]
@@ -0,0 +1,145 @@
+"""
+Formatos de gravação da lista de devedores nos arquivos do Gist.
+
+- FORMATO_LEGADO: a lista de devedores em JSON indentado, como sempre foi gravada.
+- FORMATO_COMPACTO: JSON minificado e colunar, uma entrada por devedor com
+  listas paralelas de IDs, valores e vencimentos (em dias a partir de uma
+  data de referência) e as parcelas pagas como um mapa de bits em hexadecimal.
+- FORMATO_COMPACTO_GZIP: o formato compacto comprimido com gzip e guardado
+  em base64 dentro de um envelope JSON.
+
+Os formatos novos começam com um cabeçalho {"formato": ..., "versao": ...};
+desserializar() reconhece os três, então um Gist antigo continua legível e
+passa para o formato configurado na próxima gravação.
+"""
+import base64
+import gzip
+import json
+from datetime import date
+from typing import Dict, List, Union
+from metricas import METRICAS
+
+FORMATO_LEGADO = "legado"
+FORMATO_COMPACTO = "compacto"
+FORMATO_COMPACTO_GZIP = "compacto+gzip"
+FORMATOS = (FORMATO_LEGADO, FORMATO_COMPACTO, FORMATO_COMPACTO_GZIP)
+
+IDENTIFICADOR = "clientcontrol/colunar"
+VERSAO_ESQUEMA = 1
+
+
+class FormatoDesconhecido(ValueError):
+    """O conteúdo não está em nenhum formato conhecido, ou é de uma versão mais nova do esquema."""
+
+
+def _dia(vencimento) -> Union[int, None]:
+    """Ordinal da data YYYY-MM-DD, ou None se o vencimento não estiver exatamente nesse formato."""
+    try:
+        data = date.fromisoformat(vencimento)
+    except (TypeError, ValueError):
+        return None
+    return data.toordinal() if data.isoformat() == vencimento else None
+
+
+def _valor_compacto(valor):
+    # 150.0 vira 150; a leitura devolve float de novo.
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _colunar(dados: List[Dict]) -> Dict:
+    dias_validos = [dia for dia in (_dia(parcela.get("vencimento"))
+                                    for devedor in dados for parcela in devedor.get("parcelas", []))
+                    if dia is not None]
+    epoca = min(dias_validos) if dias_validos else date(2000, 1, 1).toordinal()
+
+    devedores = []
+    for devedor in dados:
+        parcelas = devedor.get("parcelas", [])
+        pagas = 0
+        dias = []
+        for posicao, parcela in enumerate(parcelas):
+            if parcela.get("paga"):
+                pagas |= 1 << posicao
+            dia = _dia(parcela.get("vencimento"))
+            # Vencimentos que não são datas ficam como texto, para não se perderem.
+            dias.append(dia - epoca if dia is not None else parcela.get("vencimento", ""))
+        devedores.append({
+            "nome": devedor.get("nome", ""),
+            "ids": [parcela.get("id") for parcela in parcelas],
+            "valores": [_valor_compacto(parcela.get("valor", 0)) for parcela in parcelas],
+            "dias": dias,
+            "pagas": format(pagas, "x"),
+        })
+    return {"formato": IDENTIFICADOR, "versao": VERSAO_ESQUEMA,
+            "epoca": date.fromordinal(epoca).isoformat(), "devedores": devedores}
+
+
+def _de_colunar(documento: Dict) -> List[Dict]:
+    if documento.get("versao", 0) > VERSAO_ESQUEMA:
+        raise FormatoDesconhecido(f"Esquema versão {documento.get('versao')} é mais novo que o suportado ({VERSAO_ESQUEMA}).")
+    epoca = date.fromisoformat(documento["epoca"]).toordinal()
+    dados = []
+    for devedor in documento["devedores"]:
+        pagas = int(devedor.get("pagas") or "0", 16)
+        parcelas = []
+        for posicao, (id_parcela, valor, dia) in enumerate(zip(devedor["ids"], devedor["valores"], devedor["dias"])):
+            parcela = {
+                "valor": float(valor) if isinstance(valor, int) else valor,
+                "vencimento": date.fromordinal(epoca + dia).isoformat() if isinstance(dia, int) else dia,
+                "paga": bool(pagas >> posicao & 1),
+            }
+            if id_parcela:
+                parcela = {"id": id_parcela, **parcela}
+            parcelas.append(parcela)
+        dados.append({"nome": devedor["nome"], "parcelas": parcelas})
+    return dados
+
+
+def serializar(dados: List[Dict], formato: str = FORMATO_COMPACTO) -> str:
+    """Converte a lista de devedores no texto a gravar, no formato pedido."""
+    with METRICAS.medir("json_serializar", formato=formato) as medida:
+        texto = _serializar(dados, formato)
+        medida["bytes"] = len(texto)
+    return texto
+
+
+def _serializar(dados: List[Dict], formato: str) -> str:
+    if formato == FORMATO_LEGADO:
+        return json.dumps(dados, indent=2)
+    compacto = json.dumps(_colunar(dados), separators=(",", ":"), ensure_ascii=False)
+    if formato == FORMATO_COMPACTO:
+        return compacto
+    if formato == FORMATO_COMPACTO_GZIP:
+        comprimido = base64.b64encode(gzip.compress(compacto.encode("utf-8"), mtime=0)).decode("ascii")
+        return json.dumps({"formato": IDENTIFICADOR, "versao": VERSAO_ESQUEMA,
+                           "codificacao": "gzip+base64", "conteudo": comprimido}, separators=(",", ":"))
+    raise ValueError(f"❌ ERRO: Formato de serialização desconhecido: '{formato}'.")
+
+
+def desserializar(texto: str) -> List[Dict]:
+    """
+    Lê a lista de devedores de qualquer um dos formatos conhecidos.
+
+    Raises:
+        FormatoDesconhecido: Se o conteúdo não for reconhecido.
+        json.JSONDecodeError: Se o texto não for JSON.
+    """
+    with METRICAS.medir("json_desserializar", origem="arquivo") as medida:
+        medida["bytes"] = len(texto)
+        return _desserializar(texto)
+
+
+def _desserializar(texto: str) -> List[Dict]:
+    documento = json.loads(texto)
+    if isinstance(documento, list):
+        return documento
+    if not isinstance(documento, dict) or documento.get("formato") != IDENTIFICADOR:
+        raise FormatoDesconhecido("Conteúdo do arquivo em formato desconhecido.")
+    if documento.get("codificacao") == "gzip+base64":
+        texto_compacto = gzip.decompress(base64.b64decode(documento["conteudo"])).decode("utf-8")
+        return _desserializar(texto_compacto)
+    if "codificacao" in documento:
+        raise FormatoDesconhecido(f"Codificação desconhecida: '{documento['codificacao']}'.")
+    return _de_colunar(documento)
@@ -1,20 +1,44 @@
-import pandas as pd
+import io
+import os
+import time
 import streamlit as st
-from streamlit_option_menu import option_menu
-import requests
-import json
-from typing import Union, List, Dict
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from armazenamento import ArmazenamentoSQLite
 from client_control import ClientControl, toggle_menu
+from consultas import (ORDEM_NOME, ORDEM_VALOR, ORDEM_VENCIMENTO, SITUACAO_ABERTAS, SITUACAO_PAGAS, SITUACAO_TODAS,
+                       FiltroParcelas, alteracoes_do_editor)
+from metricas import METRICAS, configurar_logs
+# pandas (e agregacoes e importacao, que dependem dele) e o option_menu são importados só nas
+# páginas que os usam, para que a tela de login apareça sem esperar por eles.
+
+SITUACOES = {"Todas": SITUACAO_TODAS, "Em aberto": SITUACAO_ABERTAS, "Pagas": SITUACAO_PAGAS}
+ORDENACOES = {"Vencimento": ORDEM_VENCIMENTO, "Valor": ORDEM_VALOR, "Nome": ORDEM_NOME}
+TAMANHOS_PAGINA = [25, 50, 100, 250]
+QUANTIDADES_COBRANCA = [10, 25, 50, 100]
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Páginas do menu e seus ícones. A página "Performance" (métricas de tempo e
+# exportação para Prometheus/JSON) só aparece com CLIENTCONTROL_ADMIN=1.
+PAGINAS = {"Home": "house-door-fill", "Consultar": "search", "Cadastrar": "pencil-square",
+           "Dashboard": "bar-chart-line-fill", "Cobrança": "telephone-outbound-fill", "Sobre": "info-circle-fill"}
+if os.getenv("CLIENTCONTROL_ADMIN") == "1":
+    PAGINAS["Performance"] = "speedometer2"
 
 GIST_ID_FIXO = "68bb78ccf423bb9f3b3af43bc569e3ba"
+# Se definido, usa este banco SQLite local em vez do Gist (sem login nem rede).
+CAMINHO_SQLITE = os.getenv("CLIENTCONTROL_SQLITE")
 st.set_page_config(page_title="ClientControl", layout="wide")
+# Logs do ClientControl em JSON Lines na saída de erro (nível em CLIENTCONTROL_LOG_NIVEL).
+configurar_logs(os.getenv("CLIENTCONTROL_LOG_NIVEL", "INFO").upper())
 
 st.title("📱 Bem-vindo ao Assistente de Cobrança Lulu 💸")
 
 # Autenticação
 if 'controle' not in st.session_state:
     st.session_state.controle = None
+    if CAMINHO_SQLITE:
+        st.session_state.controle = ClientControl(armazenamento=ArmazenamentoSQLite(CAMINHO_SQLITE))
+        st.session_state.controle.iniciar_fila_persistencia()
 
 if st.session_state.controle is None:
     st.info("Insira seu Token do GitHub para iniciar.")
@@ -29,6 +53,10 @@ if st.session_state.controle is None:
             else:
                 try:
                     controle = ClientControl(token=token_input, gist_id=GIST_ID_FIXO)
+                    # Carrega os dados enquanto o token é verificado em paralelo.
+                    controle.iniciar_sessao()
+                    # Grava as alterações em segundo plano, sem travar a interface esperando o GitHub.
+                    controle.iniciar_fila_persistencia()
                     st.session_state.controle = controle
                     st.rerun()
                 except Exception as e:
@@ -42,24 +70,44 @@ else:
     # Inicializa os estados da sessão para o menu
     if "menu_visivel" not in st.session_state:
         st.session_state.menu_visivel = False  # Menu começa oculto
-    if "ultima_pagina" not in st.session_state:
+    if st.session_state.get("ultima_pagina") not in PAGINAS:
         st.session_state.ultima_pagina = "Home"
 
-    # Botão Hambúrguer no topo
-    col1_button, _ = st.columns([0.05, 0.95])
+    # Botão Hambúrguer no topo, com a situação da gravação em segundo plano ao lado
+    col1_button, col_status = st.columns([0.05, 0.95])
     with col1_button:
         st.button("☰", on_click=toggle_menu, help="Abrir/Fechar Menu")
 
+    @st.fragment(run_every=2)
+    def status_gravacao():
+        fila = controle.fila
+        if fila is None:
+            return
+        if fila.pendentes:
+            st.caption(f"⏳ Salvando {fila.pendentes} alteração(ões)...")
+        elif fila.gravacoes:
+            st.caption("✅ Todas as alterações foram salvas.")
+        if fila.falhas:
+            for falha in fila.falhas:
+                st.error(f"❌ {falha}")
+            if st.button("Dispensar avisos", key="limpar_falhas_fila"):
+                fila.limpar_falhas()
+                st.rerun()
+
+    with col_status:
+        status_gravacao()
+
     # Lógica de exibição do Menu e Conteúdo
     if st.session_state.menu_visivel:
         col_menu, col_conteudo = st.columns([0.2, 0.8])
         
         with col_menu:
+            from streamlit_option_menu import option_menu
             pagina_selecionada = option_menu(
                 menu_title=None,
-                options=["Home", "Consultar", "Cadastrar", "Dashboard", "Sobre"],
-                icons=["house-door-fill", "search", "pencil-square", "bar-chart-line-fill", "info-circle-fill"],
-                default_index=["Home", "Consultar", "Cadastrar", "Dashboard", "Sobre"].index(st.session_state.ultima_pagina),
+                options=list(PAGINAS),
+                icons=list(PAGINAS.values()),
+                default_index=list(PAGINAS).index(st.session_state.ultima_pagina),
                 styles={
                     "container": {"padding": "0!important", "background-color": "#0E1117"},
                     "icon": {"color": "#0d6efd", "font-size": "20px"}, 
@@ -81,6 +129,7 @@ else:
     st.session_state.ultima_pagina = pagina_selecionada
     
     # --- RENDERIZAÇÃO DO CONTEÚDO DA PÁGINA ---
+    inicio_renderizacao = time.perf_counter()
     with col_conteudo:
         if pagina_selecionada == "Home":
             st.subheader("🏠 Home")
@@ -90,67 +139,97 @@ else:
         elif pagina_selecionada == "Consultar":
                     st.subheader("🔍 Consultar e Gerenciar Parcelas")
                     st.markdown("---")
-                    dados = controle.consultar_dados()
+                    nomes_devedores = controle.listar_devedores()
 
-                    if not dados:
+                    if not nomes_devedores:
                         st.info("Nenhum dado disponível. Cadastre um novo devedor para começar.")
                     else:
-                        df_geral = pd.json_normalize(dados, record_path='parcelas', meta=['nome'], errors='ignore')
-                        df_geral['valor'] = df_geral['valor'].astype(float)
-                        df_geral['vencimento'] = pd.to_datetime(df_geral['vencimento']).dt.date
-
-                        # PASSO 1: CRIAR O WIDGET DE FILTRO
-                        st.write("#### Filtrar Devedor")
-                        nomes_devedores = sorted(df_geral['nome'].unique())
-                        opcoes_filtro = ["Todos"] + nomes_devedores
-                        
-                        devedor_filtrado = st.selectbox(
-                            "Selecione um devedor para ver apenas suas parcelas:",
-                            options=opcoes_filtro
-                        )
+                        # PASSO 1: FILTROS (aplicados antes de montar a tabela)
+                        st.write("#### Filtrar Parcelas")
+                        col_devedor, col_situacao, col_de, col_ate = st.columns([0.3, 0.2, 0.25, 0.25])
+                        with col_devedor:
+                            devedor_filtrado = st.selectbox("Devedor", options=["Todos"] + nomes_devedores)
+                        with col_situacao:
+                            situacao_filtrada = st.selectbox("Situação", options=list(SITUACOES))
+                        with col_de:
+                            vencimento_de = st.date_input("Vencimento a partir de", value=None, format="DD/MM/YYYY")
+                        with col_ate:
+                            vencimento_ate = st.date_input("Vencimento até", value=None, format="DD/MM/YYYY")
+
+                        col_vencidas, col_ordem, col_direcao, col_tamanho = st.columns([0.3, 0.2, 0.25, 0.25])
+                        with col_vencidas:
+                            somente_vencidas = st.checkbox("Somente vencidas (em aberto)")
+                        with col_ordem:
+                            ordem_escolhida = st.selectbox("Ordenar por", options=list(ORDENACOES))
+                        with col_direcao:
+                            decrescente = st.checkbox("Ordem decrescente")
+                        with col_tamanho:
+                            tamanho_pagina = st.selectbox("Parcelas por página", options=TAMANHOS_PAGINA, index=1)
                         st.markdown("---")
 
-                        # PASSO 2: APLICAR O FILTRO NO DATAFRAME
-                        # Este é o DataFrame que será mostrado e usado para comparação
-                        df_para_mostrar = df_geral.copy()
-                        if devedor_filtrado != "Todos":
-                            df_para_mostrar = df_geral[df_geral['nome'] == devedor_filtrado]
-
-                        
+                        filtro = FiltroParcelas(
+                            nome_devedor=None if devedor_filtrado == "Todos" else devedor_filtrado,
+                            situacao=SITUACOES[situacao_filtrada],
+                            vencimento_de=vencimento_de.isoformat() if vencimento_de else None,
+                            vencimento_ate=vencimento_ate.isoformat() if vencimento_ate else None,
+                            somente_vencidas=somente_vencidas,
+                        )
+                        # Cada combinação de filtros tem a sua paginação e o seu editor; trocar um filtro volta à página 1.
+                        assinatura = f"{filtro}|{ordem_escolhida}|{decrescente}|{tamanho_pagina}"
+                        chave_pagina = f"pagina_consultar_{assinatura}"
+
+                        # PASSO 2: CONSULTAR SÓ A PÁGINA VISÍVEL (o backend usa seus índices)
+                        import pandas as pd
+                        resultado_pagina = controle.consultar_pagina(
+                            filtro, ORDENACOES[ordem_escolhida], decrescente,
+                            pagina=st.session_state.get(chave_pagina, 1), tamanho=tamanho_pagina)
+                        with METRICAS.medir("dataframe_montar", origem="consultar"):
+                            df_para_mostrar = pd.DataFrame(resultado_pagina.linhas, columns=["id", "valor", "vencimento", "paga", "nome"])
+                            df_para_mostrar['valor'] = df_para_mostrar['valor'].astype(float)
+                            df_para_mostrar['vencimento'] = pd.to_datetime(df_para_mostrar['vencimento']).dt.date
+
+                        chave_editor = f"data_editor_consultar_{assinatura}|{resultado_pagina.pagina}"
                         st.write("#### Parcelas")
-                        df_editado = st.data_editor(
-                            df_para_mostrar.copy(), # Usamos o dataframe já filtrado
+                        if resultado_pagina.total == 0:
+                            st.info("Nenhuma parcela atende aos filtros.")
+                        st.data_editor(
+                            df_para_mostrar,
                             use_container_width=True,
                             disabled=["nome"],
                             column_config={
+                                "id": None, # Oculta o ID, usado apenas para identificar a parcela ao salvar
                                 "nome": st.column_config.TextColumn("Nome"),
                                 "valor": st.column_config.NumberColumn("Valor (R$)", min_value=0.01, step=1.0, format="R$ %.2f"),
                                 "paga": st.column_config.CheckboxColumn("Paga"),
                                 "vencimento": st.column_config.DateColumn("Vencimento", format="DD/MM/YYYY")
                             },
-                            key="data_editor_consultar"
+                            key=chave_editor
                         )
 
+                        col_pagina, col_total = st.columns([0.2, 0.8])
+                        with col_pagina:
+                            if st.session_state.get(chave_pagina, 1) != resultado_pagina.pagina:
+                                st.session_state[chave_pagina] = resultado_pagina.pagina
+                            st.number_input("Página", min_value=1, max_value=resultado_pagina.n_paginas, step=1, key=chave_pagina)
+                        with col_total:
+                            st.caption(f"Página {resultado_pagina.pagina} de {resultado_pagina.n_paginas} "
+                                       f"({resultado_pagina.total} parcela(s) no filtro)")
+
                         if st.button("💾 Salvar Alterações na Tabela"):
-                            # A lógica de salvamento agora compara o dataframe filtrado com sua versão editada
-                            dados_atualizados = controle.consultar_dados()
-                            for index in df_para_mostrar.index: # Itera sobre o DF filtrado
-                                row_original = df_para_mostrar.loc[index]
-                                row_editada = df_editado.loc[index]
-                                if not row_original.equals(row_editada):
-                                    for devedor in dados_atualizados:
-                                        if devedor['nome'] == row_original['nome']:
-                                            for parcela in devedor['parcelas']:
-                                                if parcela['vencimento'] == row_original['vencimento'].strftime('%Y-%m-%d'):
-                                                    parcela['valor'] = float(row_editada['valor'])
-                                                    parcela['paga'] = bool(row_editada['paga'])
-                                                    vencimento_editado_dt = pd.to_datetime(row_editada['vencimento']).date()
-                                                    parcela['vencimento'] = vencimento_editado_dt.strftime('%Y-%m-%d')
-                                                    break
-                                            break
-                            if controle.atualizar_gist(dados_atualizados):
-                                st.success("✅ Alterações salvas com sucesso!")
-                                st.rerun()
+                            # Usa apenas o delta do editor ({posição da linha: {coluna: novo valor}})
+                            # e identifica cada parcela pelo seu ID.
+                            linhas_editadas = st.session_state[chave_editor].get("edited_rows", {})
+                            alteracoes = alteracoes_do_editor(linhas_editadas, df_para_mostrar['id'].to_numpy())
+                            if not alteracoes:
+                                st.info("Nenhuma alteração para salvar.")
+                            else:
+                                resultado = controle.atualizar_parcelas(alteracoes)
+                                if resultado:
+                                    st.success(f"✅ {resultado.mensagem}")
+                                    del st.session_state[chave_editor]
+                                    st.rerun()
+                                else:
+                                    st.error(f"❌ {resultado.mensagem}")
                         
                         st.markdown("---")
 
@@ -167,10 +246,12 @@ else:
 
                                 if st.button("Adicionar Parcela"):
                                     if devedor_selecionado_add and novo_valor:
-                                        # A classe ClientControl não precisa ser alterada, ela já lida com isso
-                                        if controle.adicionar_parcela(devedor_selecionado_add, novo_valor, novo_vencimento.strftime("%Y-%m-%d")):
+                                        resultado = controle.adicionar_parcela(devedor_selecionado_add, novo_valor, novo_vencimento.strftime("%Y-%m-%d"))
+                                        if resultado:
                                             st.success(f"Parcela adicionada com sucesso para {devedor_selecionado_add}!")
                                             st.rerun()
+                                        else:
+                                            st.error(f"❌ {resultado.mensagem}")
                                     else:
                                         st.warning("Por favor, preencha todos os campos.")
 
@@ -180,117 +261,225 @@ else:
                                 devedor_selecionado_del = st.selectbox("Selecione o Devedor", options=nomes_devedores, key="del_devedor")
 
                                 if devedor_selecionado_del:
-                                    parcelas_do_devedor = []
-                                    for devedor in dados:
-                                        if devedor['nome'] == devedor_selecionado_del:
-                                            parcelas_do_devedor = devedor['parcelas']
-                                            break
+                                    parcelas_do_devedor = controle.consultar_parcelas(devedor_selecionado_del)
                                     
-                                    opcoes_parcelas = [f"R$ {p['valor']:.2f} - Venc: {datetime.strptime(p['vencimento'], '%Y-%m-%d').strftime('%d/%m/%Y')}" for p in parcelas_do_devedor]
+                                    rotulos_parcelas = {p['id']: f"R$ {p['valor']:.2f} - Venc: {datetime.strptime(p['vencimento'], '%Y-%m-%d').strftime('%d/%m/%Y')}" for p in parcelas_do_devedor}
                                     
-                                    if not opcoes_parcelas:
+                                    if not rotulos_parcelas:
                                         st.info("Este devedor não possui parcelas.")
                                     else:
-                                        parcela_selecionada_str = st.selectbox("Selecione a Parcela para Deletar", options=opcoes_parcelas)
+                                        id_parcela_selecionada = st.selectbox(
+                                            "Selecione a Parcela para Deletar",
+                                            options=list(rotulos_parcelas),
+                                            format_func=rotulos_parcelas.get
+                                        )
                                         
                                         if st.button("Confirmar Exclusão", type="primary"):
-                                            vencimento_para_deletar_str = parcela_selecionada_str.split('Venc: ')[1]
-                                            vencimento_para_deletar_dt = datetime.strptime(vencimento_para_deletar_str, '%d/%m/%Y')
-                                            vencimento_final_str = vencimento_para_deletar_dt.strftime('%Y-%m-%d')
-                                            
-                                            if controle.deletar_parcela(devedor_selecionado_del, vencimento_final_str):
+                                            resultado = controle.deletar_parcela_por_id(id_parcela_selecionada)
+                                            if resultado:
                                                 st.success("Parcela deletada com sucesso!")
                                                 st.rerun()
+                                            else:
+                                                st.error(f"❌ {resultado.mensagem}")
 
         elif pagina_selecionada == "Cadastrar":
             st.subheader("📝 Cadastrar Novo Devedor")
             st.markdown("---")
-            with st.form("cadastro_form"):
-                nome = st.text_input("Nome do Devedor")
-                n_parcelas = st.number_input("Número de Parcelas", min_value=1, value=1)
-                valor_parcela = st.number_input("Valor por Parcela (R$)", min_value=0.01, format="%.2f")
-                vencimento_inicial = st.date_input("Data de Vencimento Inicial")
-                enviar = st.form_submit_button("Cadastrar")
-
-                if enviar:
-                    if nome and valor_parcela:
-                        controle.cadastrar_novo_devedor(
-                            nome=nome,
-                            n_parcelas=n_parcelas,
-                            vl_par=valor_parcela,
-                            p_vencimento=vencimento_inicial.strftime("%Y-%m-%d")
+            import importacao
+            aba_devedor, aba_importar, aba_exportar = st.tabs(["Um devedor", "Importar planilha", "Exportar"])
+            with aba_devedor:
+                with st.form("cadastro_form"):
+                    nome = st.text_input("Nome do Devedor")
+                    n_parcelas = st.number_input("Número de Parcelas", min_value=1, value=1)
+                    valor_parcela = st.number_input("Valor por Parcela (R$)", min_value=0.01, format="%.2f")
+                    vencimento_inicial = st.date_input("Data de Vencimento Inicial")
+                    st.caption("As parcelas vencem todo mês no mesmo dia (ou no último dia, em meses mais curtos).")
+                    enviar = st.form_submit_button("Cadastrar")
+
+                    if enviar:
+                        if nome and valor_parcela:
+                            resultado = controle.cadastrar_novo_devedor(
+                                nome=nome,
+                                n_parcelas=n_parcelas,
+                                vl_par=valor_parcela,
+                                p_vencimento=vencimento_inicial.strftime("%Y-%m-%d")
+                            )
+                            if resultado:
+                                st.success(f"✅ Devedor '{nome}' cadastrado com sucesso!")
+                                st.balloons()
+                            else:
+                                st.error(f"❌ {resultado.mensagem}")
+                        else:
+                            st.warning("Preencha o Nome e o Valor da Parcela.")
+
+            with aba_importar:
+                st.markdown(
+                    "Planilha **CSV** ou **XLSX** em um destes leiautes:\n"
+                    "- uma linha por parcela: `nome`, `valor`, `vencimento` e, opcionalmente, `paga` e `id` "
+                    "(o mesmo do arquivo exportado);\n"
+                    "- uma linha por devedor: `nome`, `n_parcelas`, `valor_parcela`, `primeiro_vencimento` "
+                    "e, opcionalmente, `parcelas_pagas`.\n\n"
+                    "Datas em AAAA-MM-DD ou DD/MM/AAAA; valores como 1234.56 ou 1.234,56."
+                )
+                arquivo = st.file_uploader("Planilha", type=["csv", "xlsx"])
+                if arquivo is not None:
+                    # A leitura é guardada por arquivo, para não repetir a validação a cada interação.
+                    identificacao = (arquivo.file_id, arquivo.name, arquivo.size)
+                    if st.session_state.get("importacao_arquivo") != identificacao:
+                        try:
+                            plano = importacao.ler_planilha(arquivo, arquivo.name)
+                        except (ValueError, ImportError) as err:
+                            plano = None
+                            st.error(str(err))
+                        except Exception as err:
+                            plano = None
+                            st.error(f"❌ Não foi possível ler a planilha: {err}")
+                        st.session_state.importacao_arquivo = identificacao
+                        st.session_state.importacao_plano = plano
+                    plano = st.session_state.get("importacao_plano")
+                    if plano is not None:
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("Linhas lidas", f"{plano.linhas_lidas:,}".replace(",", "."))
+                        col2.metric("Devedores", f"{len(plano.devedores):,}".replace(",", "."))
+                        col3.metric("Parcelas", f"{plano.n_parcelas:,}".replace(",", "."))
+                        col4.metric("Linhas com erro", f"{plano.linhas_invalidas:,}".replace(",", "."))
+                        if plano.repetidas_no_arquivo:
+                            st.info(f"{plano.repetidas_no_arquivo} linha(s) repetida(s) no arquivo serão ignoradas.")
+                        if plano.erros:
+                            st.warning("Estas linhas serão ignoradas:")
+                            st.dataframe([{"Linha": erro.linha, "Problema": erro.mensagem} for erro in plano.erros],
+                                         hide_index=True, use_container_width=True)
+                            if plano.linhas_invalidas > len(plano.erros):
+                                st.caption(f"... e mais {plano.linhas_invalidas - len(plano.erros)} linha(s) com erro.")
+                        duplicados = st.radio(
+                            "Devedores já cadastrados",
+                            options=list(importacao.POLITICAS_DUPLICADOS),
+                            format_func={importacao.DUPLICADOS_IGNORAR: "Ignorar",
+                                         importacao.DUPLICADOS_ACRESCENTAR: "Acrescentar as parcelas novas"}.get,
+                            horizontal=True,
                         )
-                        st.success(f"✅ Devedor '{nome}' cadastrado com sucesso!")
-                        st.balloons()
+                        if st.button("Importar", type="primary", disabled=not plano.n_parcelas):
+                            with st.spinner("Importando..."):
+                                resultado = controle.importar(plano, duplicados)
+                            if resultado:
+                                st.success(f"✅ {resultado.mensagem}")
+                            else:
+                                st.error(f"❌ {resultado.mensagem}")
+
+            with aba_exportar:
+                st.markdown("Todas as parcelas, uma por linha, no mesmo leiaute aceito pela importação.")
+                formato_exportacao = st.radio("Formato", options=["CSV", "XLSX"], horizontal=True)
+                if st.button("Gerar arquivo"):
+                    dados = controle.consultar_dados(copiar=False)
+                    if dados is None:
+                        st.error("❌ Não foi possível ler os dados.")
                     else:
-                        st.warning("Preencha o Nome e o Valor da Parcela.")
+                        with st.spinner("Gerando arquivo..."):
+                            if formato_exportacao == "XLSX":
+                                try:
+                                    saida = io.BytesIO()
+                                    importacao.exportar_xlsx(dados, saida)
+                                    st.session_state.exportacao = ("parcelas.xlsx", saida.getvalue(), TIPO_XLSX)
+                                except ImportError as err:
+                                    st.error(str(err))
+                            else:
+                                texto = "".join(importacao.blocos_csv(dados))
+                                st.session_state.exportacao = ("parcelas.csv", texto.encode("utf-8-sig"), "text/csv")
+                if st.session_state.get("exportacao"):
+                    nome_arquivo, conteudo, tipo = st.session_state.exportacao
+                    st.download_button(f"Baixar {nome_arquivo}", conteudo, file_name=nome_arquivo, mime=tipo)
 
         elif pagina_selecionada == "Dashboard":
             st.subheader("📊 Dashboard de Cobranças")
             st.markdown("---")
-            dados = controle.consultar_dados()
-            if not dados:
+            import agregacoes
+            # Totais já agregados por mês no índice de recebíveis, sem percorrer as parcelas.
+            indice = controle.recebiveis()
+            if indice is None:
                 st.info("Nenhum dado para exibir.")
+            elif not indice.anos():
+                st.info("Nenhum dado de parcela para exibir.")
             else:
-                df = pd.json_normalize(dados, record_path="parcelas", meta=["nome"], errors="ignore")
-                if df.empty:
-                    st.info("Nenhum dado de parcela para exibir.")
-                else:
-                    df["valor"] = pd.to_numeric(df["valor"], errors='coerce').fillna(0)
-                    df["paga"] = df["paga"].astype(bool)
-                    df["vencimento"] = pd.to_datetime(df["vencimento"])
-                    df['ano'] = df['vencimento'].dt.year
-                    df['mes_num'] = df['vencimento'].dt.month
-                    df['status'] = df['paga'].map({True: 'Valor Pago', False: 'Valor a Receber'})
-
-                    st.markdown("### Filtros")
-                    anos_disponiveis = sorted(df['ano'].unique(), reverse=True)
-                    meses_nomes = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", 
-                                "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-                    opcoes_ano = ["Todos"] + anos_disponiveis
-                    opcoes_mes = ["Todos"] + meses_nomes
-
-                    ano_selecionado = st.selectbox("Ano", options=opcoes_ano)
-                    mes_selecionado = st.selectbox("Mês", options=opcoes_mes)
-
-                    df_filtrado = df.copy()
-                    if ano_selecionado != "Todos":
-                        df_filtrado = df_filtrado[df_filtrado['ano'] == ano_selecionado]
-                    if mes_selecionado != "Todos":
-                        mes_numero = opcoes_mes.index(mes_selecionado) + 1 # Meses são 1-12
-                        df_filtrado = df_filtrado[df_filtrado['mes_num'] == mes_numero]
+                st.markdown("### Filtros")
+                opcoes_ano = ["Todos"] + indice.anos()
+                opcoes_mes = ["Todos"] + agregacoes.MESES_NOMES
 
-                    st.markdown("---")
+                ano_selecionado = st.selectbox("Ano", options=opcoes_ano)
+                mes_selecionado = st.selectbox("Mês", options=opcoes_mes)
+
+                ano = None if ano_selecionado == "Todos" else ano_selecionado
+                mes = None if mes_selecionado == "Todos" else opcoes_mes.index(mes_selecionado) # Meses são 1-12
+                totais_mensais = [linha for linha in indice.totais_por_mes(ano) if mes is None or linha["mes"] == mes]
 
-                    if df_filtrado.empty:
-                        st.warning("Nenhum dado encontrado para os filtros aplicados.")
+                st.markdown("---")
+
+                if not totais_mensais:
+                    st.warning("Nenhum dado encontrado para os filtros aplicados.")
+                else:
+                    totais = indice.totais(ano, mes)
+                    
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("💰 Total Recebido", f"R$ {totais['pago']:,.2f}")
+                    col2.metric("📬 Total a Receber", f"R$ {totais['aberto']:,.2f}")
+                    col3.metric("📋 Total Geral", f"R$ {totais['geral']:,.2f}")
+
+                    st.markdown("### Detalhamento Mensal")
+                    tabela_resumo = agregacoes.resumo_mensal_de_totais(totais_mensais)
+                    if not tabela_resumo.empty:
+                        styled_table = tabela_resumo.style.format("R$ {:,.2f}")
+                        st.dataframe(styled_table, use_container_width=True)
                     else:
-                        total_pago = df_filtrado[df_filtrado["paga"]]["valor"].sum()
-                        total_aberto = df_filtrado[~df_filtrado["paga"]]["valor"].sum()
-                        valor_total = total_pago + total_aberto
-                        
-                        col1, col2, col3 = st.columns(3)
-                        col1.metric("💰 Total Recebido", f"R$ {total_pago:,.2f}")
-                        col2.metric("📬 Total a Receber", f"R$ {total_aberto:,.2f}")
-                        col3.metric("📋 Total Geral", f"R$ {valor_total:,.2f}")
-
-                        st.markdown("### Detalhamento Mensal")
-                        df_filtrado['mes_nome'] = df_filtrado['mes_num'].apply(lambda x: meses_nomes[x - 1])
-                        tabela_resumo = pd.pivot_table(
-                            df_filtrado,
-                            values='valor',
-                            index='status',
-                            columns='mes_nome',
-                            aggfunc='sum',
-                            fill_value=0
-                        )
-                        ordem_meses = [mes for mes in meses_nomes if mes in tabela_resumo.columns]
-                        if ordem_meses:
-                            tabela_resumo = tabela_resumo[ordem_meses]
-                            styled_table = tabela_resumo.style.format("R$ {:,.2f}")
-                            st.dataframe(styled_table, use_container_width=True)
-                        else:
-                            st.info("Nenhum dado de valor para exibir na tabela de resumo mensal.")
+                        st.info("Nenhum dado de valor para exibir na tabela de resumo mensal.")
+
+        elif pagina_selecionada == "Cobrança":
+            st.subheader("📞 Prioridade de Cobrança")
+            st.markdown("---")
+            indice = controle.recebiveis()
+            if indice is None:
+                st.info("Nenhum dado para exibir.")
+            else:
+                import pandas as pd
+                hoje = date.today().isoformat()
+
+                st.markdown("### Parcelas vencidas por atraso")
+                colunas_faixas = st.columns(4)
+                for coluna, faixa in zip(colunas_faixas, indice.faixas_atraso(hoje)):
+                    coluna.metric(f"⏰ {faixa['faixa']} dias", f"R$ {faixa['total']:,.2f}")
+                    coluna.caption(f"{faixa['parcelas']} parcela(s)")
+
+                quantidade = st.selectbox("Quantidade", options=QUANTIDADES_COBRANCA)
+                col_prioridade, col_proximos = st.columns(2)
+                with col_prioridade:
+                    st.markdown("### Quem cobrar primeiro")
+                    prioridade = indice.prioridade_cobranca(quantidade, hoje)
+                    if not prioridade:
+                        st.success("Nenhuma parcela vencida. 🎉")
+                    else:
+                        st.dataframe(pd.DataFrame(prioridade), hide_index=True, use_container_width=True,
+                                     column_order=["nome", "vencido", "parcelas_vencidas", "dias_atraso", "faixa", "aberto"],
+                                     column_config={
+                                         "nome": st.column_config.TextColumn("Nome"),
+                                         "vencido": st.column_config.NumberColumn("Vencido (R$)", format="R$ %.2f"),
+                                         "parcelas_vencidas": st.column_config.NumberColumn("Parcelas vencidas"),
+                                         "dias_atraso": st.column_config.NumberColumn("Dias de atraso"),
+                                         "faixa": st.column_config.TextColumn("Faixa"),
+                                         "aberto": st.column_config.NumberColumn("Em aberto (R$)", format="R$ %.2f"),
+                                     })
+                with col_proximos:
+                    st.markdown("### Próximos vencimentos")
+                    proximos = indice.proximos_vencimentos(quantidade, hoje)
+                    if not proximos:
+                        st.info("Nenhuma parcela a vencer.")
+                    else:
+                        df_proximos = pd.DataFrame(proximos)
+                        df_proximos["vencimento"] = pd.to_datetime(df_proximos["vencimento"]).dt.date
+                        st.dataframe(df_proximos, hide_index=True, use_container_width=True,
+                                     column_order=["vencimento", "nome", "valor"],
+                                     column_config={
+                                         "vencimento": st.column_config.DateColumn("Vencimento", format="DD/MM/YYYY"),
+                                         "nome": st.column_config.TextColumn("Nome"),
+                                         "valor": st.column_config.NumberColumn("Valor (R$)", format="R$ %.2f"),
+                                     })
 
         elif pagina_selecionada == "Sobre":
             st.subheader("ℹ️ Sobre o Projeto")
@@ -303,7 +492,62 @@ else:
             - Parcelamento automático
             - Armazenamento seguro via GitHub Gist
             - Dashboard para visualização financeira
+            - Prioridade de cobrança, faixas de atraso e próximos vencimentos
             - Menu lateral retrátil para melhor experiência de uso
 
             Desenvolvido com ❤️ por [Diego](https://github.com/diego).
             """)
+
+        elif pagina_selecionada == "Performance":
+            st.subheader("⏱️ Performance")
+            st.markdown("---")
+            import pandas as pd
+            st.caption("Métricas deste processo (todas as sessões), desde "
+                       f"{datetime.fromtimestamp(METRICAS.desde).strftime('%d/%m/%Y %H:%M:%S')}.")
+
+            st.markdown("### Operações")
+            series = METRICAS.resumo()
+            if not series:
+                st.info("Nenhuma métrica coletada ainda.")
+            else:
+                st.dataframe(pd.DataFrame([{
+                    "Métrica": serie["nome"],
+                    "Rótulos": ", ".join(f"{chave}={valor}" for chave, valor in serie["rotulos"].items()),
+                    "Chamadas": serie["contagem"],
+                    "p50 (ms)": serie["p50_ms"],
+                    "p95 (ms)": serie["p95_ms"],
+                    "Média (ms)": serie["media_ms"],
+                    "Bytes": serie["bytes"],
+                } for serie in series]), hide_index=True, use_container_width=True)
+
+            st.markdown("### Caches")
+            caches = METRICAS.caches()
+            if not caches:
+                st.info("Nenhum acesso a cache registrado ainda.")
+            else:
+                st.dataframe(pd.DataFrame([{
+                    "Cache": cache["cache"],
+                    "Acertos": cache["acertos"],
+                    "Faltas": cache["faltas"],
+                    "Taxa de acerto": f"{cache['taxa_acerto']:.1%}" if cache["taxa_acerto"] is not None else "-",
+                } for cache in caches]), hide_index=True, use_container_width=True)
+
+            estatisticas_backend = controle.armazenamento.estatisticas()
+            if estatisticas_backend:
+                st.markdown("### API do GitHub (esta sessão)")
+                st.json(estatisticas_backend)
+
+            st.markdown("### Exportar")
+            col_prometheus, col_json, col_zerar = st.columns(3)
+            with col_prometheus:
+                st.download_button("Prometheus (texto)", METRICAS.como_prometheus(),
+                                   file_name="clientcontrol_metricas.prom", mime="text/plain")
+            with col_json:
+                st.download_button("JSON", METRICAS.como_json(),
+                                   file_name="clientcontrol_metricas.json", mime="application/json")
+            with col_zerar:
+                if st.button("Zerar métricas"):
+                    METRICAS.zerar()
+                    st.rerun()
+
+    METRICAS.observar("pagina_renderizar", time.perf_counter() - inicio_renderizacao, pagina=pagina_selecionada)
@@ -0,0 +1,166 @@
+"""
+Servidor local que imita a parte da API de Gists usada pelo app, para benchmarks e testes manuais.
+
+Atende GET /user, GET e PATCH /gists/<id> (com ETag, If-None-Match e
+history[0].version) e os raw_url dos arquivos. Como a API real, corta o
+"content" de arquivos maiores que `limite_truncamento` e marca "truncated".
+Cada resposta pode ser atrasada por `latencia` segundos para simular a rede,
+e `falhas` programa respostas de erro (status e cabeçalhos, como 502 ou um
+403 de limite de taxa com Retry-After) para as próximas requisições.
+
+Exemplo:
+    with ServidorGistLocal({"dados.json": "[]"}, latencia=0.05) as servidor:
+        cliente = ClienteGitHub("token", url_base=servidor.url_base)
+        gist = ArmazenamentoGist("token", servidor.gist_id, cliente=cliente)
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple, Union
+
+
+class ServidorGistLocal:
+    def __init__(self, arquivos: Union[Dict[str, str], None] = None, gist_id: str = "local",
+                 latencia: float = 0.0, limite_truncamento: int = 1_000_000, login: str = "local"):
+        self.arquivos: Dict[str, str] = dict(arquivos or {"dados.json": "[]"})
+        self.gist_id = gist_id
+        self.latencia = latencia
+        self.limite_truncamento = limite_truncamento
+        self.login = login
+        self.versao = 0
+        # Conteúdos já servidos, por hash, para que um raw_url antigo continue válido.
+        self._conteudos: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.requisicoes: Dict[str, int] = {}
+        self.bytes_recebidos = 0
+        self.bytes_enviados = 0
+        # Respostas (status, cabeçalhos) devolvidas, em ordem, às próximas requisições no lugar da normal.
+        self.falhas: List[Tuple[int, Dict[str, str]]] = []
+        self._servidor: Union[ThreadingHTTPServer, None] = None
+
+    @property
+    def url_base(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def iniciar(self) -> "ServidorGistLocal":
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._manipulador())
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, name="stub-gist", daemon=True).start()
+        return self
+
+    def encerrar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self) -> "ServidorGistLocal":
+        return self.iniciar()
+
+    def __exit__(self, *excecao):
+        self.encerrar()
+
+    def zerar_contadores(self):
+        with self._lock:
+            self.requisicoes = {}
+            self.bytes_recebidos = 0
+            self.bytes_enviados = 0
+
+    def _etag(self) -> str:
+        return '"%s"' % hashlib.md5(json.dumps(self.arquivos, sort_keys=True).encode()).hexdigest()
+
+    def _corpo_gist(self) -> Dict:
+        arquivos = {}
+        for nome, conteudo in self.arquivos.items():
+            hash_conteudo = hashlib.md5(conteudo.encode()).hexdigest()
+            self._conteudos[hash_conteudo] = conteudo
+            truncado = len(conteudo.encode()) > self.limite_truncamento
+            arquivos[nome] = {
+                "filename": nome,
+                "size": len(conteudo.encode()),
+                "raw_url": f"{self.url_base}/raw/{hash_conteudo}/{nome}",
+                "truncated": truncado,
+                "content": conteudo[:self.limite_truncamento] if truncado else conteudo,
+            }
+        return {"id": self.gist_id, "files": arquivos, "history": [{"version": f"v{self.versao}"}]}
+
+    def _manipulador(self):
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, status: int, corpo: Union[bytes, None] = None, cabecalhos: Union[Dict, None] = None):
+                corpo = corpo or b""
+                self.send_response(status)
+                for nome, valor in (cabecalhos or {}).items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+                with servidor._lock:
+                    servidor.bytes_enviados += len(corpo)
+
+            def _contar(self, chave: str):
+                with servidor._lock:
+                    servidor.requisicoes[chave] = servidor.requisicoes.get(chave, 0) + 1
+
+            def _responder_falha(self) -> bool:
+                """Responde com a próxima falha programada, se houver. Retorna True se respondeu."""
+                with servidor._lock:
+                    if not servidor.falhas:
+                        return False
+                    status, cabecalhos = servidor.falhas.pop(0)
+                self._contar(f"falha {status}")
+                self._responder(status, json.dumps({"message": "falha simulada"}).encode(), cabecalhos)
+                return True
+
+            def do_GET(self):
+                time.sleep(servidor.latencia)
+                if self._responder_falha():
+                    return
+                if self.path == "/user":
+                    self._contar("GET /user")
+                    return self._responder(200, json.dumps({"login": servidor.login}).encode())
+                if self.path.startswith("/raw/"):
+                    self._contar("GET raw")
+                    conteudo = servidor._conteudos.get(self.path.split("/")[2])
+                    if conteudo is None:
+                        return self._responder(404)
+                    return self._responder(200, conteudo.encode())
+                if self.path == f"/gists/{servidor.gist_id}":
+                    self._contar("GET gist")
+                    with servidor._lock:
+                        etag = servidor._etag()
+                        if self.headers.get("If-None-Match") == etag:
+                            corpo, status = None, 304
+                        else:
+                            corpo, status = json.dumps(servidor._corpo_gist()).encode(), 200
+                    return self._responder(status, corpo, {"ETag": etag, "Content-Type": "application/json"})
+                self._responder(404)
+
+            def do_PATCH(self):
+                time.sleep(servidor.latencia)
+                if self.path != f"/gists/{servidor.gist_id}":
+                    return self._responder(404)
+                tamanho = int(self.headers.get("Content-Length", 0))
+                corpo_pedido = self.rfile.read(tamanho)
+                if self._responder_falha():
+                    return
+                self._contar("PATCH gist")
+                pedido = json.loads(corpo_pedido)
+                with servidor._lock:
+                    servidor.bytes_recebidos += tamanho
+                    for nome, arquivo in pedido.get("files", {}).items():
+                        if arquivo is None:
+                            servidor.arquivos.pop(nome, None)
+                        else:
+                            servidor.arquivos[nome] = arquivo["content"]
+                    servidor.versao += 1
+                    corpo = json.dumps(servidor._corpo_gist()).encode()
+                self._responder(200, corpo, {"Content-Type": "application/json"})
+
+        return Manipulador
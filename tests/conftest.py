@@ -0,0 +1,13 @@
+import json
+
+import pytest
+
+from stub_gist import ServidorGistLocal
+
+
+@pytest.fixture
+def servidor():
+    """Servidor local de Gist com um devedor, encerrado ao fim do teste."""
+    dados = [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]}]
+    with ServidorGistLocal({"dados.json": json.dumps(dados)}) as servidor:
+        yield servidor
@@ -0,0 +1,73 @@
+import json
+import time
+
+import pytest
+
+from armazenamento import ArmazenamentoGist
+from client_control import ClientControl
+from cliente_github import ClienteGitHub
+from stub_gist import ServidorGistLocal
+
+DADOS = [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]}]
+
+
+def _controle(servidor, **kwargs) -> ClientControl:
+    gist = ArmazenamentoGist("token", servidor.gist_id, cliente=ClienteGitHub("token", url_base=servidor.url_base))
+    return ClientControl(armazenamento=gist, **kwargs)
+
+
+def test_construtor_nao_espera_a_autenticacao():
+    with ServidorGistLocal({"dados.json": json.dumps(DADOS)}, latencia=0.3) as servidor:
+        inicio = time.perf_counter()
+        controle = _controle(servidor)
+        assert time.perf_counter() - inicio < 0.2
+
+        controle.autenticar()
+        assert servidor.requisicoes["GET /user"] == 1
+
+
+def test_iniciar_sessao_le_os_dados_durante_a_autenticacao():
+    with ServidorGistLocal({"dados.json": json.dumps(DADOS)}, latencia=0.4) as servidor:
+        inicio = time.perf_counter()
+        dados = _controle(servidor).iniciar_sessao()
+        decorrido = time.perf_counter() - inicio
+
+    assert dados == DADOS
+    assert servidor.requisicoes == {"GET /user": 1, "GET gist": 1}
+    # Em sequência seriam duas latências (0,8 s).
+    assert decorrido < 0.75
+
+
+def test_token_invalido_falha_no_login_e_nas_gravacoes(servidor):
+    servidor.falhas = [(401, {})]
+    controle = _controle(servidor)
+
+    with pytest.raises(ConnectionError):
+        controle.autenticar()
+    with pytest.raises(ConnectionError):
+        controle.iniciar_sessao()
+    resultado = controle.atualizar_parcelas({"a1": {"paga": True}})
+
+    assert not resultado
+    assert "AUTENTICAÇÃO" in resultado.mensagem
+    assert "PATCH gist" not in servidor.requisicoes
+
+
+def test_autenticacao_em_primeiro_plano_falha_no_construtor(servidor):
+    servidor.falhas = [(401, {})]
+
+    with pytest.raises(ConnectionError):
+        _controle(servidor, autenticar_em_segundo_plano=False)
+
+
+def test_identidade_verificada_vale_so_para_o_cliente(servidor):
+    primeiro = ClienteGitHub("token", url_base=servidor.url_base)
+    assert primeiro.verificar_identidade() == servidor.login
+    assert primeiro.verificar_identidade() == servidor.login
+    assert servidor.requisicoes["GET /user"] == 1
+
+    # Um novo login confere o token de novo: um token revogado não passa.
+    servidor.falhas = [(401, {})]
+    gist = ArmazenamentoGist("token", servidor.gist_id, cliente=ClienteGitHub("token", url_base=servidor.url_base))
+    with pytest.raises(ConnectionError):
+        gist.autenticar()
@@ -0,0 +1,73 @@
+import json
+
+from armazenamento import ArmazenamentoGist
+from client_control import ClientControl
+from cliente_github import ClienteGitHub
+
+
+def _gist(servidor, ttl_cache: float) -> ArmazenamentoGist:
+    return ArmazenamentoGist("token", servidor.gist_id, ttl_cache,
+                             cliente=ClienteGitHub("token", url_base=servidor.url_base))
+
+
+def test_dentro_do_ttl_nao_acessa_a_rede(servidor):
+    gist = _gist(servidor, ttl_cache=60.0)
+
+    primeira = gist.carregar()
+    segunda = gist.carregar()
+
+    assert segunda is primeira
+    assert servidor.requisicoes["GET gist"] == 1
+    assert gist.versao == "v0"
+
+
+def test_depois_do_ttl_revalida_com_etag(servidor):
+    gist = _gist(servidor, ttl_cache=0.0)
+    primeira = gist.carregar()
+    servidor.zerar_contadores()
+
+    segunda = gist.carregar()
+
+    # 304 sem corpo: o cache é reaproveitado.
+    assert segunda is primeira
+    assert servidor.requisicoes["GET gist"] == 1
+    assert servidor.bytes_enviados == 0
+
+
+def test_revalidacao_traz_o_conteudo_novo(servidor):
+    gist = _gist(servidor, ttl_cache=0.0)
+    gist.carregar()
+    servidor.arquivos["dados.json"] = json.dumps([{"nome": "Bia", "parcelas": []}])
+    servidor.versao += 1
+
+    dados = gist.carregar()
+
+    assert [devedor["nome"] for devedor in dados] == ["Bia"]
+    assert gist.versao == "v1"
+
+
+def test_invalidar_cache_forca_leitura_completa(servidor):
+    gist = _gist(servidor, ttl_cache=60.0)
+    primeira = gist.carregar()
+    servidor.zerar_contadores()
+
+    gist.invalidar_cache()
+    assert gist.versao is None
+    segunda = gist.carregar()
+
+    assert segunda is not primeira
+    assert segunda == primeira
+    assert servidor.requisicoes["GET gist"] == 1
+    assert servidor.bytes_enviados > 0
+
+
+def test_consultar_dados_devolve_copia_por_padrao(servidor):
+    controle = ClientControl(armazenamento=_gist(servidor, ttl_cache=60.0))
+
+    dados = controle.consultar_dados()
+    dados[0]["parcelas"][0]["paga"] = True
+    dados.append({"nome": "Intrusa", "parcelas": []})
+
+    assert controle.consultar_dados() == [
+        {"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]}]
+    assert controle.consultar_dados(copiar=False) is controle.consultar_dados(copiar=False)
@@ -0,0 +1,96 @@
+import socket
+import time
+
+import pytest
+import requests
+
+from cliente_github import ClienteGitHub
+
+
+def _cliente(url_base: str, esperas: list, **kwargs) -> ClienteGitHub:
+    return ClienteGitHub("token", url_base=url_base, dormir=esperas.append, **kwargs)
+
+
+def test_erro_do_servidor_e_repetido_com_backoff(servidor):
+    servidor.falhas = [(502, {}), (503, {})]
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas, fator_backoff=0.5)
+
+    response = cliente.get(f"/gists/{servidor.gist_id}")
+
+    assert response.status_code == 200
+    assert esperas == [0.5, 1.0]
+    assert cliente.estatisticas.repeticoes == 2
+
+
+def test_erro_persistente_desiste_apos_max_tentativas(servidor):
+    servidor.falhas = [(500, {})] * 5
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas, max_tentativas=3)
+
+    assert cliente.get(f"/gists/{servidor.gist_id}").status_code == 500
+    assert len(esperas) == 2
+    assert servidor.falhas == [(500, {})] * 2
+
+
+def test_erro_do_cliente_nao_e_repetido(servidor):
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas)
+
+    assert cliente.get("/gists/inexistente").status_code == 404
+    assert esperas == []
+
+
+def test_limite_de_taxa_respeita_retry_after(servidor):
+    servidor.falhas = [(429, {"Retry-After": "2"})]
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas)
+
+    assert cliente.get(f"/gists/{servidor.gist_id}").status_code == 200
+    assert esperas == [2.0]
+
+
+def test_limite_de_taxa_esgotado_espera_o_reinicio(servidor):
+    reinicio = int(time.time()) + 5
+    servidor.falhas = [(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reinicio)})]
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas)
+
+    assert cliente.get(f"/gists/{servidor.gist_id}").status_code == 200
+    assert len(esperas) == 1 and 4.0 <= esperas[0] <= 7.0
+    assert cliente.estatisticas.limite_reinicia_em == reinicio
+
+
+def test_espera_maior_que_o_maximo_devolve_a_resposta(servidor):
+    servidor.falhas = [(403, {"Retry-After": "120"})]
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas, espera_maxima=60.0)
+
+    assert cliente.get(f"/gists/{servidor.gist_id}").status_code == 403
+    assert esperas == []
+
+
+def test_patch_com_falha_e_repetido(servidor):
+    servidor.falhas = [(502, {})]
+    esperas = []
+    cliente = _cliente(servidor.url_base, esperas)
+
+    response = cliente.patch(f"/gists/{servidor.gist_id}", json={"files": {"dados.json": {"content": "[]"}}})
+
+    assert response.status_code == 200
+    assert servidor.arquivos["dados.json"] == "[]"
+    assert servidor.requisicoes["PATCH gist"] == 1
+
+
+def test_falha_de_conexao_e_repetida_e_depois_propagada():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        porta = sock.getsockname()[1]
+    esperas = []
+    cliente = _cliente(f"http://127.0.0.1:{porta}", esperas, max_tentativas=3)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cliente.get("/user")
+    assert len(esperas) == 2
+    assert cliente.estatisticas.erros == 3
+
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from armazenamento import ArmazenamentoGist, ArmazenamentoSQLite
+from client_control import ClientControl
+from cliente_github import ClienteGitHub
+from stub_gist import ServidorGistLocal
+
+DADOS = [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False},
+                                      {"id": "a2", "valor": 100.0, "vencimento": "2025-02-10", "paga": False}]},
+         {"nome": "Bia", "parcelas": [{"id": "b1", "valor": 50.0, "vencimento": "2025-01-20", "paga": False}]}]
+
+
+@pytest.fixture(params=["gist", "sqlite"])
+def sessoes(request, tmp_path):
+    """Duas sessões (ClientControl) sobre a mesma base, uma em cada backend."""
+    if request.param == "sqlite":
+        caminho = str(tmp_path / "clientcontrol.db")
+        ArmazenamentoSQLite(caminho).salvar(DADOS)
+        yield tuple(ClientControl(armazenamento=ArmazenamentoSQLite(caminho)) for _ in range(2))
+        return
+    with ServidorGistLocal({"dados.json": json.dumps(DADOS)}) as servidor:
+        yield tuple(ClientControl(armazenamento=ArmazenamentoGist(
+            "token", servidor.gist_id, 60.0, cliente=ClienteGitHub("token", url_base=servidor.url_base)))
+            for _ in range(2))
+
+
+def _parcelas(controle: ClientControl) -> dict:
+    controle.invalidar_cache()
+    return {p["id"]: p for devedor in controle.consultar_dados() for p in devedor["parcelas"]}
+
+
+def test_alteracoes_disjuntas_sao_mescladas_e_gravadas(sessoes):
+    nossa, outra = sessoes
+    repositorio = nossa.consultar_repositorio()
+    assert outra.atualizar_parcelas({"b1": {"paga": True}})
+
+    repositorio.atualizar_parcela("a1", paga=True)
+    assert nossa.atualizar_gist(repositorio)
+
+    parcelas = _parcelas(outra)
+    assert parcelas["a1"]["paga"] and parcelas["b1"]["paga"]
+
+
+def test_parcelas_diferentes_do_mesmo_devedor_sao_mescladas(sessoes):
+    nossa, outra = sessoes
+    repositorio = nossa.consultar_repositorio()
+    assert outra.atualizar_parcelas({"a2": {"valor": 120.0}})
+
+    repositorio.atualizar_parcela("a1", paga=True)
+    assert nossa.atualizar_gist(repositorio)
+
+    parcelas = _parcelas(outra)
+    assert parcelas["a1"]["paga"] and parcelas["a2"]["valor"] == 120.0
+
+
+def test_mutacao_com_leitura_desatualizada_e_repetida_sobre_a_versao_atual(sessoes):
+    nossa, outra = sessoes
+    nossa.consultar_dados()
+    assert outra.deletar_parcela_por_id("b1")
+
+    # No Gist a leitura ainda está no TTL, então a gravação esbarra na versão nova e é mesclada.
+    assert nossa.adicionar_parcela("Ana", 10.0, "2025-03-10")
+
+    parcelas = _parcelas(outra)
+    assert "b1" not in parcelas
+    assert len(parcelas) == 3
+
+
+def test_alteracoes_sobrepostas_nao_sao_gravadas(sessoes):
+    nossa, outra = sessoes
+    repositorio = nossa.consultar_repositorio()
+    assert outra.atualizar_parcelas({"a1": {"valor": 90.0}})
+
+    repositorio.atualizar_parcela("a1", valor=80.0)
+    assert not nossa.atualizar_gist(repositorio)
+
+    assert _parcelas(outra)["a1"]["valor"] == 90.0
+
+
+def test_lista_com_versao_desatualizada_e_recusada(sessoes):
+    nossa, outra = sessoes
+    dados = nossa.consultar_dados()
+    assert outra.deletar_devedor("Bia")
+
+    dados[0]["parcelas"][0]["paga"] = True
+    assert not nossa.atualizar_gist(dados)
+
+    assert [devedor["nome"] for devedor in outra.consultar_dados()] == ["Ana"]
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+import consultas
+from armazenamento import ArmazenamentoMemoria, migrar_para_sqlite
+from consultas import FiltroParcelas, IndiceParcelas
+from repositorio import novo_id_parcela
+
+
+@pytest.fixture(scope="module")
+def dados():
+    sorteio = random.Random(3)
+    # Valores e vencimentos repetidos de propósito, para conferir o desempate das ordenações.
+    return [{"nome": f"Devedor {i:04d}" if i % 7 else f"devedor B{i}",
+             "parcelas": [{"id": novo_id_parcela(), "valor": float(sorteio.choice([50, 75, 100, 100])),
+                           "vencimento": f"202{sorteio.randint(3, 6)}-{sorteio.randint(1, 12):02d}-"
+                                         f"{sorteio.choice([5, 10, 10, 20])}",
+                           "paga": sorteio.random() < 0.4} for _ in range(8)]}
+            for i in range(400)]
+
+
+@pytest.fixture(scope="module")
+def sqlite(dados, tmp_path_factory):
+    return migrar_para_sqlite(dados, str(tmp_path_factory.mktemp("consultas") / "parcelas.db"))
+
+
+def test_memoria_e_sqlite_devolvem_as_mesmas_paginas(dados, sqlite):
+    memoria = ArmazenamentoMemoria(dados)
+    sorteio = random.Random(7)
+    for _ in range(300):
+        filtro = FiltroParcelas(
+            nome_devedor=sorteio.choice([None, None, "Devedor 0013", "DEVEDOR b14", "inexistente"]),
+            situacao=sorteio.choice([consultas.SITUACAO_TODAS, consultas.SITUACAO_PAGAS, consultas.SITUACAO_ABERTAS]),
+            vencimento_de=sorteio.choice([None, "2024-03-10"]),
+            vencimento_ate=sorteio.choice([None, "2025-06-01"]),
+            somente_vencidas=sorteio.random() < 0.3,
+            hoje="2025-01-10",
+        )
+        argumentos = (filtro, sorteio.choice(consultas.ORDENS), sorteio.random() < 0.5,
+                      sorteio.randint(1, 40), sorteio.choice([10, 25, 50]))
+        esperada = memoria.consultar_pagina(*argumentos)
+        obtida = sqlite.consultar_pagina(*argumentos)
+        assert (obtida.total, obtida.pagina) == (esperada.total, esperada.pagina), argumentos
+        assert [linha["id"] for linha in obtida.linhas] == [linha["id"] for linha in esperada.linhas], argumentos
+
+
+def test_indice_confere_com_filtragem_direta(dados):
+    filtro = FiltroParcelas(vencimento_de="2024-01-01", somente_vencidas=True, hoje="2025-01-10")
+    esperadas = [parcela["id"] for devedor in dados for parcela in devedor["parcelas"]
+                 if not parcela["paga"] and "2024-01-01" <= parcela["vencimento"] < "2025-01-10"]
+
+    pagina = IndiceParcelas(dados).consultar(filtro, tamanho=len(esperadas) or 1)
+
+    assert pagina.total == len(esperadas)
+    assert sorted(linha["id"] for linha in pagina.linhas) == sorted(esperadas)
+    assert [linha["vencimento"] for linha in pagina.linhas] == sorted(linha["vencimento"] for linha in pagina.linhas)
+
+
+def test_pagina_alem_da_ultima_devolve_a_ultima(dados):
+    pagina = IndiceParcelas(dados).consultar(FiltroParcelas(nome_devedor="Devedor 0013"), pagina=99, tamanho=5)
+
+    assert pagina.total == 8
+    assert pagina.pagina == pagina.n_paginas == 2
+    assert len(pagina.linhas) == 3
+
+
+def test_alteracoes_do_editor():
+    ids = ["p1", "p2", "p3"]
+    assert consultas.alteracoes_do_editor({0: {"paga": True}, 2: {"valor": 5.0}}, ids) == \
+        {"p1": {"paga": True}, "p3": {"valor": 5.0}}
+
+
+def test_ordem_por_nome_com_acentos_e_igual_nos_dois_backends(tmp_path):
+    nomes = ["Ágata", "ábaco", "ana", "Zeca", "élcio", "Émerson", "bruno", "Ümit", "Ana Beatriz", "Íris"]
+    dados = [{"nome": nome, "parcelas": [{"id": f"p{i}", "valor": 10.0, "vencimento": "2025-01-10", "paga": False}]}
+             for i, nome in enumerate(nomes)]
+    sqlite = migrar_para_sqlite(dados, str(tmp_path / "acentos.db"))
+
+    for decrescente in (False, True):
+        esperada = ArmazenamentoMemoria(dados).consultar_pagina(ordem=consultas.ORDEM_NOME, decrescente=decrescente)
+        obtida = sqlite.consultar_pagina(ordem=consultas.ORDEM_NOME, decrescente=decrescente)
+        assert [linha["nome"] for linha in obtida.linhas] == [linha["nome"] for linha in esperada.linhas]
+
+
+def test_indice_e_refeito_so_quando_os_dados_mudam(dados):
+    memoria = ArmazenamentoMemoria(dados)
+    assert memoria._cache_indice is None
+
+    memoria.consultar_pagina()
+    indice = memoria._cache_indice[1]
+    memoria.consultar_parcelas("Devedor 0001")
+    assert memoria._cache_indice[1] is indice
+
+    memoria.salvar(dados[:10])
+    assert memoria.consultar_pagina().total == 80
+    assert memoria._cache_indice[1] is not indice
@@ -0,0 +1,18 @@
+from dados_sinteticos import gerar_dados
+from repositorio import vencimentos_mensais
+
+
+def test_vencimentos_seguem_o_calendario_do_app():
+    dados = gerar_dados(300, 14, semente=1)
+
+    for devedor in dados:
+        vencimentos = [parcela["vencimento"] for parcela in devedor["parcelas"]]
+        assert vencimentos == vencimentos_mensais(vencimentos[0], 14)
+    dias = {int(devedor["parcelas"][0]["vencimento"][8:]) for devedor in dados}
+    assert dias & {29, 30, 31}
+
+
+def test_mesma_semente_gera_a_mesma_base():
+    assert gerar_dados(20, 6, semente=5) == gerar_dados(20, 6, semente=5)
+    assert gerar_dados(20, 6, semente=5) != gerar_dados(20, 6, semente=6)
+    assert all("id" not in p for d in gerar_dados(5, 3, com_ids=False) for p in d["parcelas"])
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from armazenamento import ArmazenamentoGistDiario
+from client_control import ClientControl
+from cliente_github import ClienteGitHub
+from diario import ADICIONAR_PARCELA, ATUALIZAR_PARCELA, SUBSTITUIR_DEVEDOR, diferencas, ler_diario, reaplicar
+from repositorio import RepositorioDevedores
+from stub_gist import ServidorGistLocal
+
+DADOS = [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False},
+                                      {"id": "a2", "valor": 100.0, "vencimento": "2025-02-10", "paga": False}]},
+         {"nome": "Bia", "parcelas": [{"id": "b1", "valor": 50.0, "vencimento": "2025-01-20", "paga": False}]}]
+
+
+@pytest.fixture
+def servidor():
+    with ServidorGistLocal({"dados.json": json.dumps(DADOS)}) as servidor:
+        yield servidor
+
+
+def _diario(servidor, limite_diario: int = 500) -> ArmazenamentoGistDiario:
+    cliente = ClienteGitHub("token", url_base=servidor.url_base)
+    cliente.verificar_identidade()
+    return ArmazenamentoGistDiario("token", servidor.gist_id, 0.0, limite_diario, cliente=cliente)
+
+
+def _controle(servidor, limite_diario: int = 500) -> ClientControl:
+    return ClientControl(armazenamento=_diario(servidor, limite_diario), autenticar_em_segundo_plano=False)
+
+
+def _relido(servidor) -> list:
+    return _diario(servidor).carregar()
+
+
+def test_gravacao_acrescenta_ao_diario_sem_reescrever_o_instantaneo(servidor):
+    controle = _controle(servidor)
+
+    assert controle.atualizar_parcelas({"a1": {"paga": True}})
+    assert controle.adicionar_parcela("Bia", 70.0, "2025-03-20")
+
+    assert servidor.arquivos["dados.json"] == json.dumps(DADOS)
+    entradas = ler_diario(servidor.arquivos["diario.jsonl"])
+    assert [entrada["op"] for entrada in entradas] == [ATUALIZAR_PARCELA, ADICIONAR_PARCELA]
+    assert entradas[0]["campos"] == {"paga": True}
+    assert all(entrada["autor"] == servidor.login for entrada in entradas)
+    relido = _relido(servidor)
+    assert relido[0]["parcelas"][0]["paga"] is True
+    assert [p["valor"] for p in relido[1]["parcelas"]] == [50.0, 70.0]
+
+
+def test_leitura_reaplica_so_as_entradas_novas(servidor):
+    nossa, outra = _diario(servidor), _diario(servidor)
+    nossa.carregar()
+    repositorio_em_cache = nossa._cache_reaplicado[1]
+    repositorio = RepositorioDevedores.de_dados(outra.carregar())
+    repositorio.remover_parcela("a2")
+    assert outra.salvar(repositorio.para_dados(), repositorio.alterados, outra.versao)
+
+    dados = nossa.carregar()
+
+    assert nossa._cache_reaplicado[1] is repositorio_em_cache
+    assert nossa._cache_reaplicado[2] == 1
+    assert [p["id"] for p in dados[0]["parcelas"]] == ["a1"]
+
+
+def test_alteracao_na_lista_lida_sem_copia_e_gravada(servidor):
+    controle = _controle(servidor)
+
+    dados = controle.consultar_dados(copiar=False)
+    dados[0]["parcelas"][0]["paga"] = True
+    assert controle.atualizar_gist(dados)
+
+    assert _relido(servidor)[0]["parcelas"][0]["paga"] is True
+
+
+def test_diario_acima_do_limite_e_compactado(servidor):
+    controle = _controle(servidor, limite_diario=2)
+    assert controle.atualizar_parcelas({"a1": {"paga": True}})
+    assert controle.atualizar_parcelas({"a2": {"paga": True}})
+    assert "diario.jsonl" in servidor.arquivos
+
+    assert controle.atualizar_parcelas({"b1": {"valor": 55.0}})
+
+    assert "diario.jsonl" not in servidor.arquivos
+    relido = _relido(servidor)
+    assert [p["paga"] for p in relido[0]["parcelas"]] == [True, True]
+    assert relido[1]["parcelas"][0]["valor"] == 55.0
+
+
+def test_compactar_reescreve_o_instantaneo(servidor):
+    controle = _controle(servidor)
+    assert controle.deletar_devedor("Bia")
+    diario = controle.armazenamento
+    assert len(diario.historico()) == 1
+
+    assert diario.compactar()
+
+    assert "diario.jsonl" not in servidor.arquivos
+    assert diario.historico() == []
+    assert [d["nome"] for d in _relido(servidor)] == ["Ana"]
+
+
+def test_diferencas_reaplicadas_reproduzem_os_novos_dados():
+    novos = [
+        # Parcelas reordenadas: o devedor inteiro é substituído.
+        {"nome": "Ana", "parcelas": [DADOS[0]["parcelas"][1], DADOS[0]["parcelas"][0]]},
+        {"nome": "Caio", "parcelas": [{"id": "c1", "valor": 10.0, "vencimento": "2025-05-01", "paga": False}]},
+    ]
+
+    entradas = diferencas(DADOS, novos)
+    repositorio = reaplicar(RepositorioDevedores.de_dados(DADOS), entradas)
+
+    assert SUBSTITUIR_DEVEDOR in [entrada["op"] for entrada in entradas]
+    assert repositorio.para_dados() == novos
+    assert diferencas(DADOS, DADOS) == []
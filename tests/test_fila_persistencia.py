@@ -0,0 +1,92 @@
+import threading
+import time
+
+from armazenamento import ArmazenamentoGist, ArmazenamentoMemoria
+from client_control import ClientControl
+from cliente_github import ClienteGitHub
+from fila_persistencia import FilaPersistencia
+
+
+def _threads_da_fila():
+    return {thread for thread in threading.enumerate() if thread.name == "fila-persistencia"}
+
+
+def test_alteracoes_proximas_viram_uma_gravacao():
+    backend = ArmazenamentoMemoria([])
+    controle = ClientControl(armazenamento=backend, autenticar_em_segundo_plano=False)
+    fila = controle.iniciar_fila_persistencia(atraso=0.1)
+
+    assert controle.cadastrar_novo_devedor("Ana", 2, 10.0, "2025-01-31")
+    assert controle.adicionar_parcela("Ana", 5.0, "2025-04-01")
+    # As consultas já refletem as alterações antes da gravação.
+    assert len(controle.consultar_dados()[0]["parcelas"]) == 3
+
+    assert controle.esvaziar_fila(5.0)
+    assert fila.gravacoes == 1
+    assert [p["vencimento"] for p in backend.carregar()[0]["parcelas"]] == ["2025-01-31", "2025-02-28", "2025-04-01"]
+
+
+def test_mutacao_que_deixa_de_valer_vai_para_falhas():
+    backend = ArmazenamentoMemoria([{"nome": "Ana", "parcelas": []}])
+    controle = ClientControl(armazenamento=backend, autenticar_em_segundo_plano=False)
+    fila = controle.iniciar_fila_persistencia(atraso=0.2)
+
+    assert controle.adicionar_parcela("Ana", 5.0, "2025-04-01")
+    backend.salvar([])  # Outra sessão remove a devedora antes da gravação
+    controle.esvaziar_fila(5.0)
+
+    assert fila.falhas and "Ana" in fila.falhas[0]
+    assert controle.consultar_dados() == []
+
+
+def test_thread_termina_quando_ociosa_e_volta_com_novos_itens():
+    gravados = []
+    fila = FilaPersistencia(lambda itens: gravados.extend(itens) or [], atraso=0.01, ocioso=0.1)
+    antes = _threads_da_fila()
+
+    fila.enfileirar(1)
+    assert len(_threads_da_fila() - antes) == 1
+    assert fila.esvaziar(2.0)
+    time.sleep(0.3)
+    assert not _threads_da_fila() - antes
+
+    fila.enfileirar(2)
+    fila.encerrar()
+    assert gravados == [1, 2]
+
+
+def _controle_gist(servidor, ttl_cache: float = 60.0) -> ClientControl:
+    gist = ArmazenamentoGist("token", servidor.gist_id, ttl_cache,
+                             cliente=ClienteGitHub("token", url_base=servidor.url_base))
+    return ClientControl(armazenamento=gist, autenticar_em_segundo_plano=False)
+
+
+def test_gravacao_em_segundo_plano_reaproveita_o_cache(servidor):
+    controle = _controle_gist(servidor)
+    controle.iniciar_fila_persistencia(atraso=0.05)
+    controle.consultar_dados()
+    servidor.zerar_contadores()
+
+    assert controle.atualizar_parcelas({"a1": {"paga": True}})
+    assert controle.esvaziar_fila(5.0)
+
+    # Só a conferência da versão antes do PATCH, respondida com 304.
+    assert servidor.requisicoes == {"GET gist": 1, "PATCH gist": 1}
+    controle.invalidar_cache()
+    assert controle.consultar_dados()[0]["parcelas"][0]["paga"] is True
+
+
+def test_conflito_na_gravacao_em_segundo_plano_rele_os_dados(servidor):
+    nossa, outra = _controle_gist(servidor), _controle_gist(servidor)
+    fila = nossa.iniciar_fila_persistencia(atraso=0.05)
+    nossa.consultar_dados()
+    assert outra.atualizar_parcelas({"a1": {"valor": 90.0}})
+
+    # A leitura de `nossa` ainda está no TTL: a gravação esbarra na versão nova e
+    # a mesclagem falha; a nova tentativa parte dos dados atuais e prevalece.
+    assert nossa.atualizar_parcelas({"a1": {"valor": 80.0}})
+    assert nossa.esvaziar_fila(10.0)
+
+    assert fila.falhas == []
+    outra.invalidar_cache()
+    assert outra.consultar_dados()[0]["parcelas"][0]["valor"] == 80.0
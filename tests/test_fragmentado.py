@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from armazenamento import ArmazenamentoGistFragmentado
+from cliente_github import ClienteGitHub
+from repositorio import RepositorioDevedores
+from stub_gist import ServidorGistLocal
+
+
+def _dados(n: int) -> list:
+    return [{"nome": f"Devedor {i:02d}", "parcelas": [
+        {"id": f"p{i:02d}", "valor": 10.0 + i, "vencimento": "2025-01-10", "paga": False}]} for i in range(n)]
+
+
+def _fragmentado(servidor, n_fragmentos: int = 4) -> ArmazenamentoGistFragmentado:
+    gist = ArmazenamentoGistFragmentado("token", servidor.gist_id, 0.0, n_fragmentos,
+                                        cliente=ClienteGitHub("token", url_base=servidor.url_base))
+    # Guarda os arquivos enviados em cada PATCH.
+    gist.enviados = []
+    patch = gist.cliente.patch
+
+    def registrar_patch(caminho, **kwargs):
+        gist.enviados.append(kwargs["json"]["files"])
+        return patch(caminho, **kwargs)
+
+    gist.cliente.patch = registrar_patch
+    return gist
+
+
+@pytest.fixture
+def servidor():
+    with ServidorGistLocal({"dados.json": json.dumps(_dados(12))}) as servidor:
+        yield servidor
+
+
+def _migrar(gist) -> list:
+    dados = gist.carregar()
+    assert gist.salvar(dados, versao_esperada=gist.versao)
+    return dados
+
+
+def test_primeira_gravacao_cria_fragmentos_e_remove_o_arquivo_unico(servidor):
+    gist = _fragmentado(servidor)
+
+    dados = _migrar(gist)
+
+    assert sorted(servidor.arquivos) == ["dados_00.json", "dados_01.json", "dados_02.json", "dados_03.json",
+                                         "manifesto.json"]
+    assert gist.enviados[0]["dados.json"] is None
+    relido = _fragmentado(servidor).carregar()
+    assert sorted(relido, key=lambda d: d["nome"]) == sorted(dados, key=lambda d: d["nome"])
+
+
+def test_arquivo_unico_nao_e_lido_depois_da_migracao(servidor):
+    gist = _fragmentado(servidor)
+    _migrar(gist)
+    servidor.arquivos["dados.json"] = json.dumps([{"nome": "Fantasma", "parcelas": []}])
+    servidor.versao += 1
+
+    nomes = {devedor["nome"] for devedor in gist.carregar()}
+
+    assert "Fantasma" not in nomes
+    assert len(nomes) == 12
+
+
+def test_gravacao_envia_so_o_fragmento_alterado(servidor):
+    gist = _fragmentado(servidor)
+    _migrar(gist)
+    repositorio = RepositorioDevedores.de_dados(gist.carregar())
+    repositorio.atualizar_parcela("p05", paga=True)
+
+    assert gist.salvar(repositorio.para_dados(), repositorio.alterados, gist.versao)
+
+    assert list(gist.enviados[-1]) == [gist._nome_fragmento("Devedor 05")]
+    parcela = next(d for d in _fragmentado(servidor).carregar() if d["nome"] == "Devedor 05")["parcelas"][0]
+    assert parcela["paga"] is True
+
+
+def test_sem_alterados_compara_com_os_fragmentos_em_cache(servidor):
+    gist = _fragmentado(servidor)
+    _migrar(gist)
+    dados = [dict(devedor) for devedor in gist.carregar()]
+    dados = [d for d in dados if d["nome"] != "Devedor 07"]
+
+    assert gist.salvar(dados, versao_esperada=gist.versao)
+
+    assert list(gist.enviados[-1]) == [gist._nome_fragmento("Devedor 07")]
+    assert len(gist.carregar()) == 11
+
+
+def test_fragmentos_inalterados_sao_reaproveitados(servidor):
+    gist = _fragmentado(servidor)
+    _migrar(gist)
+    repositorio = RepositorioDevedores.de_dados(gist.carregar())
+    antes = dict(gist._cache_fragmentos)
+    alterado = gist._nome_fragmento("Devedor 03")
+    repositorio.remover("Devedor 03")
+    gist.salvar(repositorio.para_dados(), repositorio.alterados, gist.versao)
+
+    gist.carregar()
+
+    assert set(gist._cache_fragmentos) == set(antes)
+    for nome, (_, devedores) in gist._cache_fragmentos.items():
+        if nome == alterado:
+            assert devedores is not antes[nome][1]
+        else:
+            assert devedores is antes[nome][1]
+
+
+def test_manifesto_prevalece_sobre_o_construtor(servidor):
+    _migrar(_fragmentado(servidor, n_fragmentos=4))
+
+    outro = _fragmentado(servidor, n_fragmentos=16)
+    assert len(outro.carregar()) == 12
+    assert outro.n_fragmentos == 4
+
+
+def test_gravacao_logo_apos_a_migracao_nao_migra_de_novo(servidor):
+    gist = _fragmentado(servidor)
+    dados = _migrar(gist)
+
+    assert gist.salvar(dados, {"devedor 01"})
+
+    assert list(gist.enviados[-1]) == [gist._nome_fragmento("Devedor 01")]
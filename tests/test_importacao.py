@@ -0,0 +1,101 @@
+import io
+
+import pytest
+
+import importacao
+from armazenamento import ArmazenamentoMemoria
+from client_control import ClientControl
+
+
+def _ler(texto: str, nome_arquivo: str = "planilha.csv") -> importacao.PlanoImportacao:
+    return importacao.ler_planilha(io.BytesIO(texto.encode("utf-8")), nome_arquivo, tamanho_bloco=2)
+
+
+def _controle(dados=None) -> ClientControl:
+    return ClientControl(armazenamento=ArmazenamentoMemoria(dados or []), autenticar_em_segundo_plano=False)
+
+
+def test_validacao_por_linha():
+    plano = _ler("nome;valor;vencimento;paga\n"
+                 "Ana;1.234,56;10/01/2025;sim\n"
+                 "Bia;R$ 10,00;2025-02-28;\n"
+                 " ; ; ; \n"
+                 ";10;2025-01-01;\n"
+                 "Caio;abc;2025-01-01;\n"
+                 "Duda;10;2025-13-01;\n"
+                 "Eva;10;2025-01-01;talvez\n"
+                 "Fabi;-5;2025-01-01;não\n")
+
+    assert plano.leiaute == importacao.LEIAUTE_PARCELAS
+    assert plano.linhas_lidas == 7  # A linha em branco é descartada sem erro
+    assert plano.linhas_invalidas == 5
+    assert [erro.linha for erro in plano.erros] == [5, 6, 7, 8, 9]
+    assert plano.devedores["ana"]["parcelas"][0] | {"id": None} == \
+        {"id": None, "id_no_arquivo": False, "valor": 1234.56, "vencimento": "2025-01-10", "paga": True}
+    assert plano.devedores["bia"]["parcelas"][0]["valor"] == 10.0
+
+
+def test_colunas_obrigatorias():
+    with pytest.raises(ValueError, match="vencimento"):
+        _ler("nome,valor\nAna,10\n")
+
+
+def test_formato_nao_suportado():
+    with pytest.raises(ValueError):
+        _ler("nome,valor,vencimento\n", "planilha.ods")
+
+
+def test_cronograma_gera_parcelas_mensais():
+    plano = _ler("nome,n_parcelas,valor_parcela,primeiro_vencimento,parcelas_pagas\n"
+                 "Ana,4,100,31/01/2024,1\n"
+                 "ana,2,5,2024-01-01,\n"
+                 "Bia,0,10,2024-01-01,\n")
+
+    parcelas = plano.devedores["ana"]["parcelas"]
+    assert [p["vencimento"] for p in parcelas] == ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"]
+    assert [p["paga"] for p in parcelas] == [True, False, False, False]
+    assert plano.repetidas_no_arquivo == 1
+    assert [erro.linha for erro in plano.erros] == [3, 4]
+
+
+def test_parcelas_iguais_com_ids_diferentes_sobrevivem_a_ida_e_volta():
+    dados = [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False},
+                                          {"id": "a2", "valor": 100.0, "vencimento": "2025-01-10", "paga": True}]}]
+    plano = _ler("".join(importacao.blocos_csv(dados)))
+
+    controle = _controle()
+    assert controle.importar(plano)
+    assert controle.consultar_dados() == dados
+
+
+def test_reimportar_nao_duplica():
+    plano = _ler("nome,valor,vencimento\nAna,10,2025-01-10\nBia,20,2025-01-10\n")
+    controle = _controle([{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 10.0, "vencimento": "2025-01-10",
+                                                          "paga": False}]}])
+
+    resultado = controle.importar(plano, importacao.DUPLICADOS_ACRESCENTAR)
+    assert resultado
+    assert not controle.importar(plano, importacao.DUPLICADOS_ACRESCENTAR)
+    assert [len(d["parcelas"]) for d in controle.consultar_dados()] == [1, 1]
+
+
+def test_politica_ignorar_mantem_devedores_existentes():
+    plano = _ler("nome,valor,vencimento\nANA,30,2025-03-10\n")
+    controle = _controle([{"nome": "Ana", "parcelas": []}])
+
+    assert not controle.importar(plano, importacao.DUPLICADOS_IGNORAR)
+    assert controle.importar(plano, importacao.DUPLICADOS_ACRESCENTAR)
+    assert controle.consultar_dados()[0]["parcelas"][0]["valor"] == 30.0
+
+
+def test_exportacao_xlsx_ida_e_volta():
+    pytest.importorskip("openpyxl")
+    dados = [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 12.5, "vencimento": "2025-01-10", "paga": True}]},
+             {"nome": "Bia", "parcelas": [{"id": "b1", "valor": 7.0, "vencimento": "2025-02-01", "paga": False}]}]
+    arquivo = io.BytesIO()
+    assert importacao.exportar_xlsx(dados, arquivo) == 2
+    arquivo.seek(0)
+
+    controle = _controle()
+    assert controle.importar(importacao.ler_planilha(arquivo, "parcelas.xlsx"))
+    assert controle.consultar_dados() == dados
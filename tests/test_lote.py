@@ -0,0 +1,100 @@
+import pytest
+
+from armazenamento import ArmazenamentoMemoria
+from client_control import ClientControl
+
+
+class ArmazenamentoContado(ArmazenamentoMemoria):
+    """Backend em memória que conta as gravações e pode simular falhas."""
+
+    def __init__(self, dados=None, falhar: bool = False):
+        super().__init__(dados)
+        self.gravacoes = 0
+        self.falhar = falhar
+
+    def salvar(self, dados, alterados=None, versao_esperada=None) -> bool:
+        self.gravacoes += 1
+        if self.falhar:
+            return False
+        return super().salvar(dados, alterados, versao_esperada)
+
+
+@pytest.fixture
+def armazenamento():
+    return ArmazenamentoContado([{"nome": "Ana", "parcelas": [
+        {"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]}])
+
+
+def test_lote_grava_uma_vez(armazenamento):
+    controle = ClientControl(armazenamento=armazenamento)
+
+    with controle.lote() as lote:
+        controle.cadastrar_novo_devedor("Bia", 2, 50.0, "2025-01-31")
+        controle.adicionar_parcela("Ana", 30.0, "2025-03-10")
+        controle.atualizar_parcelas({"a1": {"paga": True}})
+
+    assert armazenamento.gravacoes == 1
+    assert lote.gravado and lote.erro is None
+    assert all(lote.resultados)
+    dados = {devedor["nome"]: devedor["parcelas"] for devedor in armazenamento.carregar()}
+    assert [p["vencimento"] for p in dados["Bia"]] == ["2025-01-31", "2025-02-28"]
+    assert [(p["valor"], p["paga"]) for p in dados["Ana"]] == [(100.0, True), (30.0, False)]
+
+
+def test_operacao_invalida_nao_impede_as_demais(armazenamento):
+    controle = ClientControl(armazenamento=armazenamento)
+
+    with controle.lote() as lote:
+        controle.adicionar_parcela("Ninguém", 10.0, "2025-01-10")
+        controle.deletar_parcela_por_id("a1")
+
+    assert [resultado.sucesso for resultado in lote.resultados] == [False, True]
+    assert armazenamento.gravacoes == 1
+    assert armazenamento.carregar()[0]["parcelas"] == []
+
+
+def test_lote_sem_alteracoes_nao_grava(armazenamento):
+    controle = ClientControl(armazenamento=armazenamento)
+
+    with controle.lote() as lote:
+        controle.deletar_devedor("Ninguém")
+
+    assert lote.gravado
+    assert armazenamento.gravacoes == 0
+
+
+def test_excecao_no_bloco_descarta_o_lote(armazenamento):
+    controle = ClientControl(armazenamento=armazenamento)
+
+    with pytest.raises(KeyError):
+        with controle.lote():
+            controle.deletar_devedor("Ana")
+            raise KeyError("interrompido")
+
+    assert armazenamento.gravacoes == 0
+    assert controle.listar_devedores() == ["Ana"]
+    # O lote foi encerrado: a próxima mutação grava na hora.
+    assert controle.deletar_devedor("Ana")
+    assert armazenamento.gravacoes == 1
+
+
+def test_lote_aninhado_e_recusado(armazenamento):
+    controle = ClientControl(armazenamento=armazenamento)
+
+    with controle.lote():
+        with pytest.raises(RuntimeError):
+            with controle.lote():
+                pass
+
+
+def test_falha_na_gravacao_marca_os_resultados():
+    armazenamento = ArmazenamentoContado(falhar=True)
+    controle = ClientControl(armazenamento=armazenamento)
+
+    with controle.lote() as lote:
+        controle.cadastrar_novo_devedor("Bia", 1, 50.0, "2025-01-10")
+
+    assert not lote.gravado
+    assert lote.erro == "Falha ao gravar as alterações."
+    assert not lote.resultados[0]
+    assert lote.resultados[0].mensagem.startswith("Não gravado:")
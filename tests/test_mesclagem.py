@@ -0,0 +1,73 @@
+import copy
+
+import pytest
+
+from mesclagem import ConflitoDeMesclagem, mesclar
+
+BASE = [
+    {"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False},
+                                 {"id": "a2", "valor": 100.0, "vencimento": "2025-02-10", "paga": False}]},
+    {"nome": "Bia", "parcelas": [{"id": "b1", "valor": 50.0, "vencimento": "2025-01-05", "paga": False}]},
+]
+
+
+def _parcela(dados, id_parcela):
+    return next(p for d in dados for p in d["parcelas"] if p["id"] == id_parcela)
+
+
+def test_alteracoes_em_devedores_diferentes_sao_combinadas():
+    nossos, deles = copy.deepcopy(BASE), copy.deepcopy(BASE)
+    _parcela(nossos, "a1")["paga"] = True
+    _parcela(deles, "b1")["valor"] = 60.0
+
+    mesclados = mesclar(BASE, nossos, deles)
+
+    assert _parcela(mesclados, "a1")["paga"] is True
+    assert _parcela(mesclados, "b1")["valor"] == 60.0
+
+
+def test_alteracoes_em_parcelas_diferentes_do_mesmo_devedor_sao_combinadas():
+    nossos, deles = copy.deepcopy(BASE), copy.deepcopy(BASE)
+    _parcela(nossos, "a1")["paga"] = True
+    _parcela(deles, "a2")["vencimento"] = "2025-02-15"
+
+    mesclados = mesclar(BASE, nossos, deles)
+
+    assert _parcela(mesclados, "a1")["paga"] is True
+    assert _parcela(mesclados, "a2")["vencimento"] == "2025-02-15"
+
+
+def test_cadastros_das_duas_sessoes_sao_mantidos():
+    nossos, deles = copy.deepcopy(BASE), copy.deepcopy(BASE)
+    nossos.append({"nome": "Caio", "parcelas": []})
+    deles.append({"nome": "Duda", "parcelas": []})
+
+    nomes = [devedor["nome"] for devedor in mesclar(BASE, nossos, deles)]
+
+    assert nomes == ["Ana", "Bia", "Duda", "Caio"]
+
+
+def test_mesma_alteracao_nas_duas_sessoes_nao_conflita():
+    nossos, deles = copy.deepcopy(BASE), copy.deepcopy(BASE)
+    _parcela(nossos, "a1")["paga"] = True
+    _parcela(deles, "a1")["paga"] = True
+
+    assert _parcela(mesclar(BASE, nossos, deles), "a1")["paga"] is True
+
+
+def test_alteracoes_diferentes_na_mesma_parcela_conflitam():
+    nossos, deles = copy.deepcopy(BASE), copy.deepcopy(BASE)
+    _parcela(nossos, "a1")["valor"] = 110.0
+    _parcela(deles, "a1")["valor"] = 120.0
+
+    with pytest.raises(ConflitoDeMesclagem):
+        mesclar(BASE, nossos, deles)
+
+
+def test_devedor_removido_por_uma_sessao_e_alterado_pela_outra_conflita():
+    nossos, deles = copy.deepcopy(BASE), copy.deepcopy(BASE)
+    nossos.pop(1)
+    _parcela(deles, "b1")["paga"] = True
+
+    with pytest.raises(ConflitoDeMesclagem):
+        mesclar(BASE, nossos, deles)
@@ -0,0 +1,121 @@
+import json
+import logging
+
+from armazenamento import ArmazenamentoGist
+from cliente_github import ClienteGitHub
+from metricas import METRICAS, ColetorMetricas, FormatadorJSON, registrar
+
+
+def test_resumo_acumula_contagem_percentis_e_bytes():
+    coletor = ColetorMetricas()
+    for ms in range(1, 21):
+        coletor.observar("http", ms / 1000, 100, metodo="GET", status=200)
+    coletor.observar("http", 0.5, metodo="PATCH", status=200)
+
+    resumo = {linha["rotulos"]["metodo"]: linha for linha in coletor.resumo()}
+
+    assert resumo["GET"]["contagem"] == 20
+    assert resumo["GET"]["rotulos"] == {"metodo": "GET", "status": "200"}
+    assert (resumo["GET"]["p50_ms"], resumo["GET"]["p95_ms"]) == (10.0, 19.0)
+    assert resumo["GET"]["media_ms"] == 10.5
+    assert resumo["GET"]["bytes"] == 2000
+    assert resumo["PATCH"]["contagem"] == 1 and resumo["PATCH"]["bytes"] == 0
+
+
+def test_percentis_usam_so_as_amostras_recentes():
+    coletor = ColetorMetricas(max_amostras=3)
+    for segundos in (10.0, 0.001, 0.002, 0.003):
+        coletor.observar("json_serializar", segundos)
+
+    linha = coletor.resumo()[0]
+
+    assert linha["contagem"] == 4
+    assert linha["p95_ms"] == 3.0
+    assert linha["total_s"] == 10.006
+
+
+def test_medir_aceita_bytes_e_rotulos_definidos_no_bloco():
+    coletor = ColetorMetricas()
+
+    with coletor.medir("json_serializar", origem="gist") as medida:
+        medida["bytes"] = 42
+        medida["formato"] = "compacto"
+
+    linha = coletor.resumo()[0]
+    assert linha["rotulos"] == {"formato": "compacto", "origem": "gist"}
+    assert linha["bytes"] == 42 and linha["contagem"] == 1
+
+
+def test_caches_e_zerar():
+    coletor = ColetorMetricas()
+    for acerto in (True, True, True, False):
+        coletor.contar_cache("gist_ttl", acerto)
+
+    assert coletor.caches() == [{"cache": "gist_ttl", "acertos": 3, "faltas": 1, "taxa_acerto": 0.75}]
+    assert json.loads(coletor.como_json())["caches"][0]["acertos"] == 3
+
+    coletor.observar("http", 0.1)
+    coletor.zerar()
+    assert coletor.resumo() == [] and coletor.caches() == []
+
+
+def test_exportacao_prometheus():
+    coletor = ColetorMetricas()
+    coletor.observar("http", 0.25, 512, metodo="GET", status=200)
+    coletor.observar("http", 0.75, 512, metodo="GET", status=200)
+    coletor.contar_cache("sqlite", True)
+    coletor.contar_cache("sqlite", False)
+
+    assert coletor.como_prometheus() == (
+        '# TYPE clientcontrol_http_segundos summary\n'
+        'clientcontrol_http_segundos{metodo="GET",status="200",quantile="0.5"} 0.25\n'
+        'clientcontrol_http_segundos{metodo="GET",status="200",quantile="0.95"} 0.75\n'
+        'clientcontrol_http_segundos_sum{metodo="GET",status="200"} 1.0\n'
+        'clientcontrol_http_segundos_count{metodo="GET",status="200"} 2\n'
+        '# TYPE clientcontrol_http_bytes_total counter\n'
+        'clientcontrol_http_bytes_total{metodo="GET",status="200"} 1024\n'
+        '# TYPE clientcontrol_cache_acertos_total counter\n'
+        'clientcontrol_cache_acertos_total{cache="sqlite"} 1\n'
+        '# TYPE clientcontrol_cache_faltas_total counter\n'
+        'clientcontrol_cache_faltas_total{cache="sqlite"} 1\n')
+
+
+def test_prometheus_escapa_os_valores_dos_rotulos():
+    coletor = ColetorMetricas()
+    coletor.observar("pagina_renderizar", 0.1, pagina='Co"bran\\ça')
+
+    assert 'pagina="Co\\"bran\\\\ça"' in coletor.como_prometheus()
+
+
+def test_registro_em_json_leva_o_evento_e_os_campos():
+    registro = logging.LogRecord("clientcontrol", logging.WARNING, __file__, 1, "Gist lido.", (), None)
+    registro.evento = "gist_lido"
+    registro.bytes = 10
+
+    saida = json.loads(FormatadorJSON().format(registro))
+
+    assert saida["nivel"] == "WARNING"
+    assert saida["mensagem"] == "Gist lido."
+    assert (saida["evento"], saida["bytes"]) == ("gist_lido", 10)
+
+
+def test_registrar_usa_o_logger_do_clientcontrol(caplog):
+    with caplog.at_level(logging.INFO, logger="clientcontrol"):
+        registrar("teste", "Mensagem de teste.", devedores=3)
+
+    assert caplog.records[-1].evento == "teste"
+    assert caplog.records[-1].devedores == 3
+
+
+def test_leitura_do_gist_alimenta_as_metricas(servidor):
+    METRICAS.zerar()
+    gist = ArmazenamentoGist("token", servidor.gist_id, 60.0,
+                             cliente=ClienteGitHub("token", url_base=servidor.url_base))
+
+    gist.carregar()
+    gist.carregar()
+
+    assert {c["cache"]: (c["acertos"], c["faltas"]) for c in METRICAS.caches()}["gist_ttl"] == (1, 1)
+    http = [linha for linha in METRICAS.resumo() if linha["nome"] == "http"]
+    assert http[0]["rotulos"] == {"metodo": "GET", "status": "200"}
+    assert http[0]["contagem"] == 1 and http[0]["bytes"] > 0
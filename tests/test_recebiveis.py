@@ -0,0 +1,97 @@
+import random
+import time
+from datetime import date
+
+from armazenamento import ArmazenamentoGist, ArmazenamentoMemoria
+from client_control import ClientControl
+from cliente_github import ClienteGitHub
+from dados_sinteticos import gerar_dados
+from recebiveis import FAIXAS_ATRASO, IndiceRecebiveis
+from repositorio import normalizar_nome
+
+HOJE = "2025-06-15"
+
+
+def _referencia(dados):
+    """Os mesmos resumos do índice, calculados percorrendo a base inteira."""
+    totais = {"pago": 0.0, "aberto": 0.0}
+    faixas = {faixa: [0, 0.0] for faixa in FAIXAS_ATRASO}
+    abertas = []
+    for devedor in dados:
+        for parcela in devedor["parcelas"]:
+            totais["pago" if parcela["paga"] else "aberto"] += parcela["valor"]
+            if parcela["paga"]:
+                continue
+            abertas.append((parcela["vencimento"], normalizar_nome(devedor["nome"]), parcela["id"]))
+            atraso = (date.fromisoformat(HOJE) - date.fromisoformat(parcela["vencimento"])).days
+            if atraso > 0:
+                faixa = FAIXAS_ATRASO[0 if atraso <= 30 else 1 if atraso <= 60 else 2 if atraso <= 90 else 3]
+                faixas[faixa][0] += 1
+                faixas[faixa][1] += parcela["valor"]
+    proximos = [id_parcela for vencimento, _, id_parcela in sorted(abertas) if vencimento >= HOJE][:15]
+    return ({chave: round(valor, 2) for chave, valor in totais.items()},
+            {faixa: (qtd, round(total, 2)) for faixa, (qtd, total) in faixas.items()}, proximos)
+
+
+def _resumos(indice: IndiceRecebiveis):
+    totais = indice.totais()
+    return ({"pago": totais["pago"], "aberto": totais["aberto"]},
+            {linha["faixa"]: (linha["parcelas"], linha["total"]) for linha in indice.faixas_atraso(HOJE)},
+            [linha["id"] for linha in indice.proximos_vencimentos(15, HOJE)])
+
+
+def test_indice_acompanha_as_mutacoes():
+    controle = ClientControl(armazenamento=ArmazenamentoMemoria(gerar_dados(40, 12, semente=5)),
+                             autenticar_em_segundo_plano=False)
+    sorteio = random.Random(11)
+    assert _resumos(controle.recebiveis()) == _referencia(controle.consultar_dados())
+
+    for i in range(40):
+        dados = controle.consultar_dados()
+        devedor = sorteio.choice(dados)
+        operacao = sorteio.randrange(4)
+        if operacao == 0:
+            controle.adicionar_parcela(devedor["nome"], float(sorteio.randint(1, 500)),
+                                       f"2025-{sorteio.randint(1, 12):02d}-{sorteio.randint(1, 28):02d}")
+        elif operacao == 1 and devedor["parcelas"]:
+            parcela = sorteio.choice(devedor["parcelas"])
+            controle.atualizar_parcelas({parcela["id"]: {"paga": not parcela["paga"], "valor": 77.0}})
+        elif operacao == 2 and devedor["parcelas"]:
+            controle.deletar_parcela_por_id(sorteio.choice(devedor["parcelas"])["id"])
+        else:
+            controle.cadastrar_novo_devedor(f"Novo {i}", 3, 10.0, "2025-05-31")
+        assert _resumos(controle.recebiveis()) == _referencia(controle.consultar_dados())
+
+
+def test_indice_ve_gravacao_de_outra_sessao_na_primeira_leitura(servidor):
+    def sessao() -> ClientControl:
+        cliente = ClienteGitHub("token", url_base=servidor.url_base)
+        return ClientControl(armazenamento=ArmazenamentoGist("token", servidor.gist_id, 0.2, cliente=cliente),
+                             autenticar_em_segundo_plano=False)
+
+    a, b = sessao(), sessao()
+    a.consultar_dados()
+    assert a.recebiveis().totais()["aberto"] == 100.0
+
+    assert b.adicionar_parcela("Ana", 50.0, "2025-02-10")
+    time.sleep(0.3)  # Fim do TTL: a próxima leitura de `a` revalida com o servidor.
+
+    assert a.recebiveis().totais()["aberto"] == 150.0
+
+
+def test_alteracao_na_fila_parte_da_versao_lida_com_os_dados(servidor):
+    def sessao() -> ClientControl:
+        cliente = ClienteGitHub("token", url_base=servidor.url_base)
+        return ClientControl(armazenamento=ArmazenamentoGist("token", servidor.gist_id, 0.2, cliente=cliente),
+                             autenticar_em_segundo_plano=False)
+
+    a, b = sessao(), sessao()
+    assert a.recebiveis().totais()["aberto"] == 100.0
+    a.iniciar_fila_persistencia(atraso=1.0)
+    assert b.cadastrar_novo_devedor("Bia", 1, 1000.0, "2025-03-10")
+    time.sleep(0.3)  # Fim do TTL: a alteração de `a` carrega a versão gravada por `b`.
+
+    assert a.adicionar_parcela("Ana", 5.0, "2025-04-10")
+
+    assert a.recebiveis().totais()["aberto"] == 1105.0
+    assert a.esvaziar_fila(5.0)
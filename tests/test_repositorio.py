@@ -0,0 +1,63 @@
+import pytest
+
+from repositorio import Devedor, Parcela, RepositorioDevedores, id_parcela_legada
+
+
+def _ids(repositorio: RepositorioDevedores) -> list:
+    return [parcela["id"] for devedor in repositorio.para_dados() for parcela in devedor["parcelas"]]
+
+
+def test_ids_legados_sao_deterministicos_com_entradas_repetidas():
+    # Duas entradas do mesmo devedor, com parcelas na mesma posição e vencimento.
+    dados = [{"nome": "Ana", "parcelas": [{"valor": 100.0, "vencimento": "2025-01-10", "paga": False}]},
+             {"nome": "ana ", "parcelas": [{"valor": 50.0, "vencimento": "2025-01-10", "paga": False}]}]
+
+    primeira = _ids(RepositorioDevedores.de_dados(dados))
+    segunda = _ids(RepositorioDevedores.de_dados(dados))
+
+    assert primeira == segunda
+    assert len(set(primeira)) == 2
+    # A primeira ocorrência mantém o ID de antes da contagem de ocorrências.
+    assert primeira[0] == id_parcela_legada("ana", 0, "2025-01-10")
+
+
+def test_id_repetido_no_conteudo_recebe_id_deterministico():
+    dados = [{"nome": "Ana", "parcelas": [{"id": "x1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]},
+             {"nome": "Bia", "parcelas": [{"id": "x1", "valor": 50.0, "vencimento": "2025-02-10", "paga": False}]}]
+
+    ids = _ids(RepositorioDevedores.de_dados(dados))
+
+    assert ids[0] == "x1"
+    assert ids[1] == id_parcela_legada("bia", 0, "2025-02-10")
+    assert ids == _ids(RepositorioDevedores.de_dados(dados))
+
+
+def test_adicionar_parcela_com_id_existente_levanta_erro():
+    repositorio = RepositorioDevedores.de_dados(
+        [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]}])
+    bia = Devedor("Bia")
+    repositorio.adicionar(bia)
+
+    with pytest.raises(ValueError):
+        repositorio.adicionar_parcela(bia, Parcela(10.0, "2025-03-10", id="a1"))
+
+    assert repositorio.localizar_parcela("a1")[0].nome == "Ana"
+    assert bia.parcelas == {}
+
+
+def test_indices_acompanham_as_alteracoes():
+    repositorio = RepositorioDevedores.de_dados(
+        [{"nome": "Ana", "parcelas": [{"id": "a1", "valor": 100.0, "vencimento": "2025-01-10", "paga": False}]},
+         {"nome": "Bia", "parcelas": [{"id": "b1", "valor": 50.0, "vencimento": "2025-02-10", "paga": True}]}])
+    assert repositorio.alterados == set()
+
+    assert repositorio.encontrar(" ANA").nome == "Ana"
+    repositorio.atualizar_parcela("b1", paga=False)
+    repositorio.remover_parcela("a1")
+
+    assert repositorio.alterados == {"ana", "bia"}
+    assert repositorio.localizar_parcela("a1") is None
+    assert repositorio.localizar_parcela("b1")[1].paga is False
+    assert repositorio.remover("bia").nome == "Bia"
+    assert repositorio.localizar_parcela("b1") is None
+    assert len(repositorio) == 1
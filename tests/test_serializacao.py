@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from dados_sinteticos import gerar_dados
+from serializacao import FORMATO_LEGADO, FORMATOS, FormatoDesconhecido, desserializar, serializar
+
+
+@pytest.mark.parametrize("formato", FORMATOS)
+def test_ida_e_volta_em_cada_formato(formato):
+    dados = gerar_dados(30, 6, semente=1)
+    dados[0]["parcelas"][0]["vencimento"] = "2024-02-29"
+    dados[1]["parcelas"] = []
+
+    assert desserializar(serializar(dados, formato)) == dados
+
+
+def test_lista_vazia():
+    for formato in FORMATOS:
+        assert desserializar(serializar([], formato)) == []
+
+
+def test_formato_legado_e_a_lista_em_json():
+    dados = gerar_dados(2, 2, semente=2)
+    assert json.loads(serializar(dados, FORMATO_LEGADO)) == dados
+
+
+def test_conteudo_desconhecido():
+    with pytest.raises(FormatoDesconhecido):
+        desserializar('{"formato": "outro"}')
@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+from armazenamento import ArmazenamentoSQLite, ConflitoDeVersao, migrar_para_sqlite
+
+
+def _parcela(id_parcela: str, valor: float, vencimento: str = "2025-01-10", paga: bool = False) -> dict:
+    return {"id": id_parcela, "valor": valor, "vencimento": vencimento, "paga": paga}
+
+
+DADOS = [{"nome": "Ana", "parcelas": [_parcela("a1", 100.0), _parcela("a2", 100.0, "2025-02-10")]},
+         {"nome": "Bia", "parcelas": [_parcela("b1", 50.0, paga=True)]},
+         {"nome": "Caio", "parcelas": []}]
+
+
+@pytest.fixture
+def caminho(tmp_path) -> str:
+    return str(tmp_path / "clientcontrol.db")
+
+
+def test_salvar_e_carregar_preservam_a_base(caminho):
+    banco = ArmazenamentoSQLite(caminho)
+
+    assert banco.salvar(DADOS)
+
+    assert ArmazenamentoSQLite(caminho).carregar() == DADOS
+    assert banco.carregar() == DADOS
+    assert banco.versao == "1"
+
+
+def test_carregar_reaproveita_o_cache_ate_a_proxima_gravacao(caminho):
+    banco = ArmazenamentoSQLite(caminho)
+    banco.salvar(DADOS)
+    primeira = banco.carregar()
+
+    assert banco.carregar() is primeira
+    ArmazenamentoSQLite(caminho).salvar(DADOS[:1])
+    assert banco.carregar() == DADOS[:1]
+
+
+def test_alterados_reescreve_so_os_devedores_indicados(caminho):
+    banco = ArmazenamentoSQLite(caminho)
+    banco.salvar(DADOS)
+    novos = [{"nome": "Ana", "parcelas": [_parcela("a1", 100.0, paga=True)]},
+             # Fora de `alterados`: não deve ser gravado.
+             {"nome": "Bia", "parcelas": []},
+             {"nome": "Duda", "parcelas": [_parcela("d1", 10.0)]}]
+
+    assert banco.salvar(novos, alterados={"ana", "caio", "duda"})
+
+    assert banco.carregar() == [{"nome": "Ana", "parcelas": [_parcela("a1", 100.0, paga=True)]},
+                                DADOS[1],
+                                {"nome": "Duda", "parcelas": [_parcela("d1", 10.0)]}]
+
+
+def test_versao_desatualizada_levanta_conflito(caminho):
+    banco = ArmazenamentoSQLite(caminho)
+    banco.salvar(DADOS)
+    banco.carregar()
+    outro = ArmazenamentoSQLite(caminho)
+    outro.salvar(DADOS[:2], versao_esperada="1")
+
+    with pytest.raises(ConflitoDeVersao) as conflito:
+        banco.salvar(DADOS[:1], versao_esperada="1")
+
+    assert conflito.value.versao_atual == "2"
+    assert conflito.value.dados_atuais == DADOS[:2]
+    assert ArmazenamentoSQLite(caminho).carregar() == DADOS[:2]
+
+
+def test_migrar_para_sqlite_atribui_ids_e_substitui_o_conteudo(caminho):
+    ArmazenamentoSQLite(caminho).salvar(DADOS)
+    legado = [{"nome": "Eva", "parcelas": [{"valor": 80.0, "vencimento": "2025-03-10", "paga": False}]}]
+
+    banco = migrar_para_sqlite(legado, caminho)
+
+    dados = ArmazenamentoSQLite(caminho).carregar()
+    assert banco.listar_devedores() == ["Eva"]
+    assert [devedor["nome"] for devedor in dados] == ["Eva"]
+    assert dados[0]["parcelas"][0]["id"]
+    assert {k: v for k, v in dados[0]["parcelas"][0].items() if k != "id"} == legado[0]["parcelas"][0]
+
+
+class ConexaoComGravacaoConcorrente:
+    """Conexão que, antes de consultar as parcelas, deixa outro processo gravar no banco."""
+
+    def __init__(self, conexao: sqlite3.Connection, gravar):
+        self._conexao = conexao
+        self._gravar = gravar
+
+    def execute(self, sql: str, *args):
+        if sql.startswith("SELECT chave_devedor"):
+            self._gravar()
+        return self._conexao.execute(sql, *args)
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+
+def test_carregar_le_um_instantaneo_consistente(caminho):
+    banco = ArmazenamentoSQLite(caminho)
+    banco.salvar(DADOS)
+    banco.invalidar_cache()
+    outro = ArmazenamentoSQLite(caminho)
+    banco._conexao = ConexaoComGravacaoConcorrente(
+        banco._conexao, lambda: outro.salvar([{"nome": "Duda", "parcelas": [_parcela("d1", 10.0)]}], {"duda"}))
+
+    # A gravação concorrente acontece entre as consultas de devedores e de parcelas.
+    assert banco.carregar() == DADOS
+    assert banco.versao == "1"